@@ -0,0 +1,220 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import datos
+import identidades
+
+COL_AUTORES = "Autores | *Autor de correspondencia | ªEstudiante"
+COL_CORRESPONDENCIA = "*Autor de correspondencia"
+
+# Roles de un autor dentro de un producto
+CORRESPONDENCIA = "correspondencia"
+ESTUDIANTE = "estudiante"
+AUTOR = "autor"
+ROLES = [CORRESPONDENCIA, ESTUDIANTE, AUTOR]
+
+
+def _separar_autores(df):
+    """Una fila por (producto, persona) de la columna de autores, con su rol"""
+    personas = (
+        df[COL_AUTORES].astype("string").str.split(";")
+        .explode().str.strip()
+    )
+    personas = personas[personas.notna() & (personas != "")]
+    partes = personas.str.extract(r"^(?P<marca>[*ª]*)\s*(?P<nombre>.*)$")
+    # Igual que antes: "*" al inicio marca correspondencia y "ª" (en cualquier lugar) a un estudiante
+    nombre = partes["nombre"].str.replace("ª", "", regex=False).str.strip()
+    asterisco = partes["marca"].str.contains("*", regex=False).to_numpy(bool)
+    rol = np.where(
+        personas.str.contains("ª", regex=False), ESTUDIANTE,
+        np.where(asterisco, CORRESPONDENCIA, AUTOR)
+    )
+    largo = pd.DataFrame({"fila": personas.index, "nombre": nombre.to_numpy(), "rol": rol, "asterisco": asterisco})
+    largo["posicion"] = largo.groupby("fila").cumcount()
+    return largo[largo["nombre"] != ""]
+
+
+def _separar_correspondencia(df):
+    """Nombre e institución de cada autor de correspondencia.
+
+    Las instituciones pueden contener ";" y paréntesis anidados, por eso se separa
+    sólo en los ";" que preceden a un "*" y la institución llega hasta el último ")".
+    """
+    entradas = (
+        df[COL_CORRESPONDENCIA].astype("string").str.split(r";\s*(?=\*)", regex=True)
+        .explode().str.strip()
+    )
+    entradas = entradas[entradas.notna() & (entradas != "")]
+    partes = entradas.str.extract(r"^\*?\s*(?P<nombre>[^(]*?)\s*(?:\((?P<institucion>.*)\))?\s*$")
+    partes["institucion"] = partes["institucion"].str.strip(" *")
+    partes["fila"] = partes.index
+    return partes.drop_duplicates(["fila", "nombre"])
+
+
+def construir_tabla_autores(df):
+    """Tabla larga producto → autor con rol e institución, y el vocabulario de nombres.
+
+    Regresa ``(tabla, nombres)`` donde ``tabla`` tiene las columnas ``fila`` (posición
+    del producto en el snapshot), ``id_producto``, ``autor_id``, ``rol``, ``institucion``,
+    ``posicion``, ``asterisco`` y ``correspondencia``; ``nombres[autor_id]`` es el nombre del autor.
+
+    ``asterisco`` indica que el nombre lleva "*" en la columna de autores (aunque sea
+    estudiante) y ``correspondencia`` marca a los autores de correspondencia aunque su rol sea
+    ``estudiante``: los que llevan "*" en la columna de autores o aparecen en la
+    columna de autores de correspondencia (la fuente del grafo de grafo.py).
+    """
+    largo = _separar_autores(df)
+    corr = _separar_correspondencia(df)
+    largo = largo.merge(corr, on=["fila", "nombre"], how="left", indicator="origen")
+
+    codigos, nombres = pd.factorize(largo["nombre"], sort=True)
+    tabla = pd.DataFrame({
+        "fila": largo["fila"].to_numpy(np.int32),
+        "id_producto": df.loc[largo["fila"], "id_producto"].to_numpy(),
+        "autor_id": codigos.astype(np.int32),
+        "rol": pd.Categorical(largo["rol"], categories=ROLES),
+        "institucion": largo["institucion"].astype("category"),
+        "posicion": largo["posicion"].to_numpy(np.int16),
+        "asterisco": largo["asterisco"].to_numpy(bool),
+        "correspondencia": largo["asterisco"].to_numpy(bool) | (largo["origen"] == "both").to_numpy(),
+    })
+    return tabla, pd.Index(nombres, name="nombre")
+
+
+def cargar_autores(version=None):
+    """Tabla de autores de la versión vigente de los datos; se construye una vez y se guarda en disco.
+
+    Los ``autor_id`` de la tabla ya son canónicos (``identidades``): las variantes de
+    nombre de un mismo autor comparten el identificador de su representante.
+    """
+    version = version or datos.version_datos()
+    directorio = datos.directorio_version(version)
+    ruta_tabla = os.path.join(directorio, "autores.parquet")
+    ruta_nombres = os.path.join(directorio, "nombres.parquet")
+    if os.path.exists(ruta_tabla) and os.path.exists(ruta_nombres):
+        tabla = pd.read_parquet(ruta_tabla)
+        nombres = pd.Index(pd.read_parquet(ruta_nombres)["nombre"], name="nombre")
+        return tabla, nombres
+
+    tabla, nombres = construir_tabla_autores(
+        datos.cargar_productos(columnas=["id_producto", COL_AUTORES, COL_CORRESPONDENCIA])
+    )
+    canonico = identidades.resolver(nombres, tabla)
+    tabla = identidades.aplicar(tabla, canonico)
+    guardar_autores(tabla, nombres, canonico, version)
+    return tabla, nombres
+
+
+def cargar_identidades(version=None):
+    """Mapa autor_id → identificador canónico (arreglo indexado por autor_id)"""
+    version = version or datos.version_datos()
+    ruta = os.path.join(datos.directorio_version(version), "identidades.parquet")
+    if not os.path.exists(ruta):
+        cargar_autores(version)
+    return pd.read_parquet(ruta)["canonico"].to_numpy()
+
+
+def guardar_autores(tabla, nombres, canonico, version):
+    directorio = datos.directorio_version(version)
+    ruta_tabla = os.path.join(directorio, "autores.parquet")
+    ruta_nombres = os.path.join(directorio, "nombres.parquet")
+    ruta_identidades = os.path.join(directorio, "identidades.parquet")
+    mapa = pd.DataFrame({"autor_id": np.arange(len(canonico), dtype=np.int32), "canonico": canonico})
+    mapa.to_parquet(ruta_identidades + ".tmp", index=False)
+    nombres.to_frame(index=False).to_parquet(ruta_nombres + ".tmp", index=False)
+    tabla.to_parquet(ruta_tabla + ".tmp", index=False)
+    os.replace(ruta_identidades + ".tmp", ruta_identidades)
+    os.replace(ruta_nombres + ".tmp", ruta_nombres)
+    os.replace(ruta_tabla + ".tmp", ruta_tabla)
+
+
+def actualizar_tabla(tabla, nombres, canonico, df, filas):
+    """Tabla de autores con los productos de las posiciones ``filas`` de ``df`` vueltos a separar.
+
+    Sólo se procesan esas filas. Los nombres nuevos se agregan al final del
+    vocabulario para que los ``autor_id`` existentes (y los artefactos que los usan)
+    sigan siendo válidos; por eso ``nombres`` deja de estar en orden alfabético. Los
+    nombres nuevos se resuelven contra los grupos de identidad existentes, que no
+    cambian. Regresa ``(tabla, nombres, canonico)``.
+    """
+    parte, nombres_parte = construir_tabla_autores(df.iloc[filas])
+    nombres = nombres.append(pd.Index(nombres_parte.difference(nombres), name="nombre"))
+    parte["autor_id"] = nombres.get_indexer(nombres_parte[parte["autor_id"]]).astype(np.int32)
+    resto = tabla[~tabla["fila"].isin(filas)]
+    canonico = identidades.resolver(nombres, pd.concat([resto, parte]), previo=canonico)
+    tabla = pd.concat([resto, identidades.aplicar(parte, canonico)], ignore_index=True)
+    tabla["institucion"] = tabla["institucion"].astype("category")
+    return tabla.sort_values(["fila", "posicion"], kind="stable", ignore_index=True), nombres, canonico
+
+
+class IndiceProductos:
+    """Índice invertido autor_id → productos (posiciones en el snapshot).
+
+    Los productos de cada autor están contiguos en ``filas`` (ordenados por
+    posición), entre ``ptr[autor_id]`` y ``ptr[autor_id + 1]``; ``correspondencia``
+    marca los productos en los que el autor es de correspondencia y ``asterisco``
+    aquellos en los que su nombre lleva "*" en la columna de autores. Una consulta
+    es un corte de esos arreglos, sin recorrer la tabla de autores.
+    """
+
+    ARREGLOS = ["ptr", "filas", "correspondencia", "asterisco"]
+
+    def __init__(self, ptr, filas, correspondencia, asterisco):
+        self.ptr, self.filas, self.correspondencia, self.asterisco = ptr, filas, correspondencia, asterisco
+
+    @classmethod
+    def desde_tabla(cls, tabla, n):
+        """Índice de la tabla de autores; ``n`` es el tamaño del vocabulario de nombres"""
+        autor = tabla["autor_id"].to_numpy()
+        fila = tabla["fila"].to_numpy()
+        # Un autor repetido en un producto cuenta una vez, con las marcas de cualquiera de sus apariciones
+        orden = np.lexsort((fila, autor))
+        autor, fila = autor[orden], fila[orden]
+        inicios = np.flatnonzero(np.r_[True, (autor[1:] != autor[:-1]) | (fila[1:] != fila[:-1])])
+        marcas = [np.logical_or.reduceat(tabla[col].to_numpy(bool)[orden], inicios) if len(orden)
+                  else np.zeros(0, dtype=bool) for col in ("correspondencia", "asterisco")]
+        ptr = np.r_[0, np.cumsum(np.bincount(autor[inicios], minlength=n))].astype(np.int64)
+        return cls(ptr, fila[inicios].astype(np.int32), *marcas)
+
+    def guardar(self, ruta):
+        tmp = ruta + ".tmp.npz"
+        np.savez(tmp, **{nombre: getattr(self, nombre) for nombre in self.ARREGLOS})
+        os.replace(tmp, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as archivo:
+            return cls(*(archivo[nombre] for nombre in cls.ARREGLOS))
+
+    def productos(self, autor_id):
+        """Posiciones de los productos del autor y sus marcas de correspondencia y de "*" en cada uno"""
+        inicio, fin = self.ptr[autor_id], self.ptr[autor_id + 1]
+        return self.filas[inicio:fin], self.correspondencia[inicio:fin], self.asterisco[inicio:fin]
+
+
+def cargar_indice_productos(version=None):
+    """Índice autor → productos de la versión vigente; se construye una vez y se guarda en disco"""
+    version = version or datos.version_datos()
+    ruta = os.path.join(datos.directorio_version(version), "productos_autor.npz")
+    if os.path.exists(ruta):
+        return IndiceProductos.cargar(ruta)
+    tabla, nombres = cargar_autores(version)
+    indice = IndiceProductos.desde_tabla(tabla, len(nombres))
+    indice.guardar(ruta)
+    return indice
+
+
+def estudiantes(tabla):
+    """Identificadores de las personas que aparecen como estudiantes en algún producto"""
+    return np.unique(tabla.loc[tabla["rol"] == ESTUDIANTE, "autor_id"].to_numpy())
+
+
+def participantes_por_producto(tabla, filas=None):
+    """Serie fila → arreglo de autor_id (en el orden de la columna de autores)"""
+    if filas is not None:
+        tabla = tabla[tabla["fila"].isin(filas)]
+    tabla = tabla.sort_values(["fila", "posicion"])
+    filas_unicas, inicios = np.unique(tabla["fila"].to_numpy(), return_index=True)
+    return pd.Series(np.split(tabla["autor_id"].to_numpy(), inicios[1:]), index=filas_unicas, dtype=object)
@@ -0,0 +1,272 @@
+"""Benchmark de las etapas de los tableros con datos sintéticos a escala.
+
+Uso: python benchmark.py [--escalas 1 10 100] [--salida archivo.json] [--comparar anterior.json] [--tracemalloc]
+
+El conjunto sintético de escala ``e`` son ``e`` copias de los productos validados
+actuales: la copia ``r`` renombra a sus autores (``"Apellidor Apellido I."``) y un ``CRUCE`` de
+las firmas apunta al mismo autor en otra copia, para que la red quede conectada
+entre copias. Así se conservan la distribución de coordinaciones y de tipos de
+producto, el número de autores por producto y la estructura de la red de
+coautoría. La escala 1 son los datos actuales sin cambios.
+
+Cada escala corre en un proceso nuevo dentro de un directorio temporal (sin
+artefactos en caché) y mide sin Streamlit las etapas de las apps: carga del CSV al
+snapshot, separación de autores, identidades, grafo, índice de distancias (BFS),
+layouts, cubo del Sankey, tendencias por año, figuras de erdos.py y grafo.py y
+Autores.csv. De cada etapa se guarda el tiempo y la memoria residente máxima del
+proceso al terminarla; con ``--tracemalloc`` también el pico de memoria asignada
+durante la etapa (más lento). Los resultados se escriben en JSON con el commit del
+código, para comparar versiones con ``--comparar``.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import datos
+import autores
+import identidades
+import colaboracion
+import distancias
+import posiciones
+import cubo
+import tendencias
+import vistas
+import dibujo
+import resumen_autores
+
+# Fracción de las firmas de una copia que apuntan al mismo autor en otra copia
+CRUCE = 0.05
+# Figuras de erdos.py que se construyen por escala
+FIGURAS = 20
+# Una etapa que tarda más que esta proporción respecto a la referencia se marca
+TOLERANCIA = 1.5
+_DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _copia(nombre, fila, replica, escala):
+    """Nombre del autor en la copia ``replica`` (o, para un ``CRUCE`` de las firmas, en otra copia)"""
+    if escala > 1 and zlib.crc32(f"{fila}|{nombre}".encode("utf-8")) % 10000 < CRUCE * 10000:
+        replica = zlib.crc32(f"{nombre}|{fila}".encode("utf-8")) % escala
+    if replica == 0:
+        return nombre
+    # La marca va en el primer apellido: los autores de otra copia son otras personas (y otro bloque en identidades)
+    primero, espacio, resto = nombre.partition(" ")
+    return f"{primero}{replica}{espacio}{resto}"
+
+
+def _renombrar_autores(texto, fila, replica, escala):
+    if not isinstance(texto, str):
+        return texto
+    partes = []
+    for parte in texto.split(";"):
+        marca = parte[:len(parte) - len(parte.lstrip(" *ª"))]
+        nombre = parte[len(marca):].strip()
+        partes.append(marca + _copia(nombre, fila, replica, escala) if nombre else parte)
+    return ";".join(partes)
+
+
+def _renombrar_correspondencia(texto, fila, replica, escala):
+    if not isinstance(texto, str):
+        return texto
+    entradas = []
+    for entrada in texto.split(";"):
+        inicio = entrada.find("(")
+        nombre = entrada[:inicio] if inicio >= 0 else entrada
+        marca = nombre[:len(nombre) - len(nombre.lstrip(" *"))]
+        limpio = nombre[len(marca):].strip()
+        if limpio:
+            entrada = marca + _copia(limpio, fila, replica, escala) + (entrada[inicio:] if inicio >= 0 else "")
+        entradas.append(entrada)
+    return ";".join(entradas)
+
+
+def sintetico(df, escala):
+    """``escala`` copias de los productos con autores renombrados por copia (ver el docstring del módulo)"""
+    if escala == 1:
+        return df.copy()
+    n = len(df)
+    resultado = pd.concat([df] * escala, ignore_index=True)
+    replica = np.repeat(np.arange(escala), n)
+    fila = np.tile(np.arange(n), escala)
+    resultado["id_producto"] = resultado["id_producto"] + replica * (int(df["id_producto"].max()) + 1)
+    for columna, renombrar in ((autores.COL_AUTORES, _renombrar_autores),
+                               (autores.COL_CORRESPONDENCIA, _renombrar_correspondencia)):
+        resultado[columna] = [renombrar(texto, f, r, escala)
+                              for texto, f, r in zip(resultado[columna].tolist(), fila.tolist(), replica.tolist())]
+    return resultado
+
+
+def _rss_max_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Medidor:
+    """Tiempo y memoria de cada etapa"""
+
+    def __init__(self, con_tracemalloc=False):
+        self.con_tracemalloc = con_tracemalloc
+        self.etapas = {}
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        if self.con_tracemalloc:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        yield
+        registro = {"segundos": round(time.perf_counter() - inicio, 4), "rss_max_mb": round(_rss_max_mb(), 1)}
+        if self.con_tracemalloc:
+            registro["pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            tracemalloc.stop()
+        self.etapas[nombre] = registro
+        print(f"  {nombre:<24}{registro['segundos']:>10.3f} s{registro['rss_max_mb']:>10.0f} MB", flush=True)
+
+
+def medir(escala, con_tracemalloc=False):
+    """Corre todas las etapas con los datos sintéticos de ``escala`` en un directorio temporal"""
+    os.chdir(_DIRECTORIO)
+    base = datos.cargar_productos()
+    tipos = datos.TIPOS_PUBLICACION
+    m = Medidor(con_tracemalloc)
+    with tempfile.TemporaryDirectory() as directorio:
+        with m.etapa("generacion"):
+            sint = sintetico(base, escala)
+            sint.to_csv(os.path.join(directorio, datos.FUENTE_CSV), index=False)
+        del base, sint
+        os.chdir(directorio)
+
+        # Datos: CSV → snapshot Parquet → DataFrame
+        with m.etapa("carga"):
+            version = datos.version_datos()
+        with m.etapa("lectura"):
+            df = datos.cargar_productos()
+
+        # Tabla de autores (erdos.py, grafo.py, exportaciones)
+        with m.etapa("separacion_autores"):
+            tabla, nombres = autores.construir_tabla_autores(df)
+        with m.etapa("identidades"):
+            canonico = identidades.resolver(nombres, tabla)
+        autores.guardar_autores(identidades.aplicar(tabla, canonico), nombres, canonico, version)
+        with m.etapa("indice_productos"):
+            autores.cargar_indice_productos(version)
+
+        # erdos.py: grafo de publicaciones, BFS acotados, layout global y figuras ego
+        with m.etapa("grafo"):
+            grafo = colaboracion.cargar_grafo(tipos=tipos, version=version)
+        with m.etapa("bfs"):
+            indice = distancias.cargar_indice(tipos=tipos, version=version)
+        with m.etapa("layout"):
+            coordenadas = posiciones.layout_global(grafo, "erdos", version)
+        with m.etapa("figuras_erdos"):
+            lista, estudiantes = vistas.opciones(version)
+            contexto = vistas.Contexto(version, nombres, indice, coordenadas, estudiantes)
+            elegidos = nombres.get_indexer(lista)[np.linspace(0, len(lista) - 1, min(FIGURAS, len(lista))).astype(int)]
+            for autor_id in elegidos:
+                vistas.construir_figura(contexto, autor_id, vistas.numeros_erdos(indice, autor_id)[-1])
+
+        # grafo.py: red de autores de correspondencia completa
+        with m.etapa("grafo_correspondencia"):
+            red = colaboracion.cargar_grafo(roles=[autores.CORRESPONDENCIA], version=version)
+        with m.etapa("layout_correspondencia"):
+            posiciones.layout_global(red, "correspondencia", version)
+        with m.etapa("figura_red"):
+            G = red.a_networkx()
+            pos = posiciones.como_diccionario(posiciones.layout_global(red, "correspondencia", version),
+                                              red.nombres, G.nodes())
+            nodos, xy, u, v, peso = dibujo.desde_networkx(G, pos)
+            dibujo.trazas_aristas(xy, u, v, peso)
+            dibujo.traza_nodos(xy, nodos)
+
+        # coordinacion.py: cubo del Sankey y flujos de la categoría de publicaciones
+        with m.etapa("sankey"):
+            tabla_cubo = cubo.construir_cubo(df)
+            for origen, destino in (("coordinacion", "tipo_producto"), ("tipo_producto", "CA"), ("CA", "est")):
+                cubo.flujos(tabla_cubo, origen, destino)
+        with m.etapa("tendencias"):
+            tabla_tendencias = tendencias.construir_tendencias(df)
+            for eje in tendencias.EJES:
+                tendencias.serie(tabla_tendencias, eje, df["coordinacion"].cat.categories,
+                                 datos.TIPOS_PUBLICACION, *tendencias.rango(tabla_tendencias, eje))
+
+        # dashboard.py: Autores.csv y Colaboradores.parquet
+        with m.etapa("resumen_autores"):
+            resumen_autores.construir_resumen(df)
+
+        os.chdir(_DIRECTORIO)
+    return {
+        "escala": escala, "productos": len(df), "nombres": len(nombres),
+        "autores": int(len(np.unique(canonico))), "aristas": int(grafo.adyacencia.nnz // 2),
+        "etapas": m.etapas,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_DIRECTORIO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultados, referencia):
+    """Tabla de tiempos contra una corrida anterior; marca las etapas más lentas que ``TOLERANCIA``"""
+    anteriores = {r["escala"]: r["etapas"] for r in referencia["escalas"]}
+    print(f"\nContra {referencia.get('commit') or referencia['fecha']}:")
+    for resultado in resultados["escalas"]:
+        previas = anteriores.get(resultado["escala"], {})
+        for etapa, registro in resultado["etapas"].items():
+            if etapa in previas and previas[etapa]["segundos"] > 0:
+                razon = registro["segundos"] / previas[etapa]["segundos"]
+                marca = "  ← más lento" if razon > TOLERANCIA else ""
+                print(f"  {resultado['escala']:>4}× {etapa:<24}{previas[etapa]['segundos']:>9.3f} → "
+                      f"{registro['segundos']:>9.3f} s ({razon:.2f}×){marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--salida", help="archivo JSON de resultados (por omisión benchmarks/<commit>.json)")
+    parser.add_argument("--comparar", help="resultados de una corrida anterior")
+    parser.add_argument("--tracemalloc", action="store_true", help="pico de memoria asignada por etapa")
+    args = parser.parse_args()
+
+    commit = _commit()
+    resultados = {
+        "commit": commit, "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "plataforma": platform.platform(), "cpus": os.cpu_count(),
+        "escalas": [],
+    }
+    # Un proceso nuevo por escala: sin cachés en memoria y con su propia memoria máxima
+    contexto = multiprocessing.get_context("spawn")
+    for escala in args.escalas:
+        print(f"Escala {escala}×", flush=True)
+        with contexto.Pool(1) as pool:
+            resultado = pool.apply(medir, (escala, args.tracemalloc))
+        print(f"  {resultado['productos']} productos, {resultado['autores']} autores, {resultado['aristas']} aristas")
+        resultados["escalas"].append(resultado)
+
+    salida = args.salida or os.path.join(_DIRECTORIO, "benchmarks", f"{commit or 'sin-commit'}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=1)
+    print(f"Resultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultados, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
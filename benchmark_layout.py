@@ -0,0 +1,87 @@
+"""Comparación del layout de fuerzas.py (Barnes-Hut sobre rejillas) contra nx.spring_layout.
+
+Uso: python benchmark_layout.py [--escalas 1 4 16] [--sin-networkx]
+
+Con los datos actuales se mide tiempo y dos medidas de calidad para ambos métodos:
+el largo medio de las aristas entre la distancia media de pares al azar (menor es
+mejor) y la mediana de la distancia al vecino más cercano en unidades de la
+distancia ideal ``k`` de Fruchterman-Reingold (cerca de 0 indica nodos encimados).
+Para ver el escalamiento se replica el grafo ``escala`` veces y se unen las copias
+con algunas aristas al azar; networkx sólo se corre en escala 1.
+"""
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+import datos
+import colaboracion
+import fuerzas
+
+
+def calidad(pos, A, rng, pares=20000):
+    coo = sparse.triu(A, k=1).tocoo()
+    aristas = np.linalg.norm(pos[coo.row] - pos[coo.col], axis=1).mean()
+    i, j = rng.integers(0, len(pos), (2, pares))
+    return aristas / np.linalg.norm(pos[i] - pos[j], axis=1).mean()
+
+
+def separacion(pos):
+    escala = np.ptp(pos, axis=0).max() or 1.0
+    distancia, _ = cKDTree(pos / escala).query(pos / escala, 2)
+    return np.median(distancia[:, 1]) * np.sqrt(len(pos))
+
+
+def replicar(A, escala, rng):
+    bloques = sparse.block_diag([A] * escala, format="csr")
+    n = bloques.shape[0]
+    extra = max(escala - 1, 0) * 20
+    u, v = rng.integers(0, n, (2, extra))
+    puentes = sparse.csr_matrix((np.ones(extra), (u, v)), shape=(n, n))
+    return (bloques + puentes + puentes.T).tocsr()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--sin-networkx", action="store_true")
+    args = parser.parse_args()
+
+    grafo = colaboracion.cargar_grafo(tipos=datos.TIPOS_PUBLICACION)
+    grafo = grafo.subgrafo(grafo.nodos())
+    rng = np.random.default_rng(0)
+    print(f"{'método':<12}{'escala':>7}{'nodos':>9}{'aristas':>10}{'segundos':>10}{'calidad':>9}{'separación':>12}")
+
+    if not args.sin_networkx:
+        G = nx.from_scipy_sparse_array(grafo.adyacencia)
+        inicio = time.perf_counter()
+        pos = nx.spring_layout(G, seed=42)
+        segundos = time.perf_counter() - inicio
+        pos = np.array([pos[i] for i in range(len(grafo))])
+        print(f"{'networkx':<12}{1:>7}{len(grafo):>9}{G.number_of_edges():>10}"
+              f"{segundos:>10.2f}{calidad(pos, grafo.adyacencia, rng):>9.3f}{separacion(pos):>12.3f}")
+
+    for escala in args.escalas:
+        A = replicar(grafo.adyacencia, escala, rng)
+        inicio = time.perf_counter()
+        pos = fuerzas.layout(A)
+        segundos = time.perf_counter() - inicio
+        print(f"{'barnes-hut':<12}{escala:>7}{A.shape[0]:>9}{A.nnz // 2:>10}"
+              f"{segundos:>10.2f}{calidad(pos, A, rng):>9.3f}{separacion(pos):>12.3f}")
+
+    # Actualización incremental: se parte del layout anterior con 5% de nodos nuevos
+    A = grafo.adyacencia
+    pos = fuerzas.layout(A).astype(float)
+    pos[rng.random(len(pos)) < 0.05] = np.nan
+    inicio = time.perf_counter()
+    pos = fuerzas.layout(A, inicial=pos, iteraciones=15)
+    segundos = time.perf_counter() - inicio
+    print(f"{'incremental':<12}{1:>7}{A.shape[0]:>9}{A.nnz // 2:>10}"
+          f"{segundos:>10.2f}{calidad(pos, A, rng):>9.3f}{separacion(pos):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
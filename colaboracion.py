@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+import datos
+import autores
+
+
+class CollaborationGraph:
+    """Grafo de coautoría como matriz de adyacencia dispersa (CSR).
+
+    Los nodos son los ``autor_id`` de la tabla de autores y el peso de cada arista
+    es el número de productos que comparten los dos autores. Un subgrafo conserva
+    los identificadores globales en ``ids``; las consultas reciben y regresan
+    identificadores globales.
+    """
+
+    def __init__(self, adyacencia, nombres, ids=None):
+        self.adyacencia = sparse.csr_matrix(adyacencia)
+        self.nombres = nombres
+        self.ids = np.arange(self.adyacencia.shape[0]) if ids is None else np.asarray(ids)
+        self._local = None
+
+    @classmethod
+    def desde_tabla(cls, tabla, nombres):
+        """Construye el grafo a partir de la tabla de autores: A = BᵀB con B la matriz producto × autor"""
+        return cls(_coautoria(tabla, len(nombres)), nombres)
+
+    def actualizar(self, quitar, agregar, nombres):
+        """Grafo con las colaboraciones de ``quitar`` restadas y las de ``agregar`` sumadas.
+
+        ``quitar`` y ``agregar`` son partes de la tabla de autores (los productos
+        antes y después de un cambio); sólo se calcula BᵀB de esos productos. La
+        matriz crece a ``len(nombres)`` si hay autores nuevos.
+        """
+        if len(self.ids) != self.adyacencia.shape[0] or np.any(self.ids != np.arange(len(self.ids))):
+            raise ValueError("Sólo se puede actualizar un grafo completo, no un subgrafo")
+        n = len(nombres)
+        adyacencia = self.adyacencia.copy()
+        adyacencia.resize((n, n))
+        adyacencia = (adyacencia - _coautoria(quitar, n) + _coautoria(agregar, n)).tocsr()
+        adyacencia.eliminate_zeros()
+        adyacencia.sort_indices()
+        return CollaborationGraph(adyacencia, nombres)
+
+    def guardar(self, ruta):
+        np.save(ruta + ".ids.npy", self.ids)
+        sparse.save_npz(ruta + ".tmp.npz", self.adyacencia)
+        os.replace(ruta + ".tmp.npz", ruta)
+
+    @classmethod
+    def cargar(cls, ruta, nombres):
+        return cls(sparse.load_npz(ruta), nombres, np.load(ruta + ".ids.npy"))
+
+    def _a_local(self, ids):
+        if self._local is None:
+            self._local = np.full(len(self.nombres), -1, dtype=np.int64)
+            self._local[self.ids] = np.arange(len(self.ids))
+        return self._local[np.asarray(ids)]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, autor_id):
+        """Igual que en networkx: sólo son nodos los autores con al menos una colaboración"""
+        i = self._a_local(autor_id)
+        return bool(i >= 0 and self.adyacencia.indptr[i + 1] > self.adyacencia.indptr[i])
+
+    def vecinos(self, autor_id):
+        """Identificadores de los colaboradores de un autor"""
+        i = self._a_local(autor_id)
+        inicio, fin = self.adyacencia.indptr[i], self.adyacencia.indptr[i + 1]
+        return self.ids[self.adyacencia.indices[inicio:fin]]
+
+    def pesos(self, autor_id):
+        """Número de productos compartidos con cada vecino (en el orden de ``vecinos``)"""
+        i = self._a_local(autor_id)
+        inicio, fin = self.adyacencia.indptr[i], self.adyacencia.indptr[i + 1]
+        return self.adyacencia.data[inicio:fin]
+
+    def grado(self, ponderado=False):
+        """Grado de cada nodo (en el orden de ``ids``)"""
+        if ponderado:
+            return np.asarray(self.adyacencia.sum(axis=1)).ravel()
+        return np.diff(self.adyacencia.indptr)
+
+    def nodos(self):
+        """Identificadores de los autores con al menos una colaboración"""
+        return self.ids[self.grado() > 0]
+
+    def aristas(self):
+        """Arreglos (u, v, peso) con cada arista una sola vez (u < v), en identificadores globales"""
+        triangular = sparse.triu(self.adyacencia, k=1).tocoo()
+        return self.ids[triangular.row], self.ids[triangular.col], triangular.data
+
+    def subgrafo(self, ids):
+        """Subgrafo inducido por un conjunto de autores"""
+        ids = np.asarray(ids)
+        local = self._a_local(ids)
+        return CollaborationGraph(self.adyacencia[local][:, local], self.nombres, self.ids[local])
+
+    def distancias(self, autor_id):
+        """Distancia (en saltos) de un autor a todos los nodos; -1 si no son alcanzables"""
+        d = csgraph.shortest_path(
+            self.adyacencia, unweighted=True, directed=False, indices=self._a_local(autor_id)
+        )
+        return np.where(np.isinf(d), -1, d).astype(np.int64)
+
+    def a_networkx(self, filtro=None):
+        """Vista networkx (nodos con nombre) producida sólo cuando se necesita.
+
+        ``filtro(u, v)`` recibe arreglos de identificadores globales y regresa una máscara
+        de las aristas que se conservan. Como antes, sólo aparecen los nodos con aristas.
+        """
+        import networkx as nx
+
+        u, v, peso = self.aristas()
+        if filtro is not None:
+            mascara = filtro(u, v)
+            u, v, peso = u[mascara], v[mascara], peso[mascara]
+        G = nx.Graph()
+        G.add_weighted_edges_from(zip(self.nombres[u], self.nombres[v], peso.tolist()))
+        return G
+
+
+def _coautoria(tabla, n):
+    """BᵀB sin diagonal: productos compartidos por cada par de autores de la tabla"""
+    pares = tabla[["fila", "autor_id"]].drop_duplicates()
+    filas, fila_local = np.unique(pares["fila"].to_numpy(), return_inverse=True)
+    incidencia = sparse.csr_matrix(
+        (np.ones(len(pares), dtype=np.int32), (fila_local, pares["autor_id"].to_numpy())),
+        shape=(len(filas), n)
+    )
+    adyacencia = (incidencia.T @ incidencia).tocsr()
+    adyacencia.setdiag(0)
+    adyacencia.eliminate_zeros()
+    return adyacencia
+
+
+def filtrar_tabla(tabla, tipos=None, roles=None, tipo_producto=None):
+    """Renglones de la tabla de autores que entran en una variante del grafo.
+
+    ``tipo_producto`` es una serie indexada por fila (sólo se usa si hay ``tipos``).
+    Con el rol de correspondencia entran también los estudiantes marcados como
+    autores de correspondencia (columna ``correspondencia``).
+    """
+    if tipos is not None:
+        tabla = tabla[tabla["fila"].isin(tipo_producto.index[tipo_producto.isin(tipos)])]
+    if roles is not None:
+        seleccion = tabla["rol"].isin(roles)
+        if autores.CORRESPONDENCIA in roles:
+            seleccion |= tabla["correspondencia"]
+        tabla = tabla[seleccion]
+    return tabla
+
+
+def clave_variante(tipos, roles):
+    """Identificador corto de un filtro (tipos de producto, roles) para nombrar artefactos en disco"""
+    contenido = json.dumps(
+        [sorted(tipos) if tipos is not None else None, sorted(roles) if roles is not None else None],
+        ensure_ascii=False
+    )
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:10]
+
+
+def cargar_grafo(tipos=None, roles=None, version=None):
+    """Grafo de coautoría de una versión de los datos; se construye una vez y se guarda en disco.
+
+    ``tipos`` restringe los productos por ``tipo_producto`` y ``roles`` a los autores con
+    esos roles (p.ej. sólo autores de correspondencia).
+    """
+    version = version or datos.version_datos()
+    tabla, nombres = autores.cargar_autores(version)
+    ruta = os.path.join(datos.directorio_version(version), f"grafo_{clave_variante(tipos, roles)}.npz")
+    if os.path.exists(ruta) and os.path.exists(ruta + ".ids.npy"):
+        return CollaborationGraph.cargar(ruta, nombres)
+
+    tipo_producto = datos.cargar_productos(columnas=["tipo_producto"])["tipo_producto"] if tipos is not None else None
+    grafo = CollaborationGraph.desde_tabla(filtrar_tabla(tabla, tipos, roles, tipo_producto), nombres)
+    guardar_variante(grafo, tipos, roles, version)
+    return grafo
+
+
+def guardar_variante(grafo, tipos, roles, version):
+    """Guarda el grafo de una variante junto con su filtro (para poder actualizarlo en una ingesta)"""
+    ruta = os.path.join(datos.directorio_version(version), f"grafo_{clave_variante(tipos, roles)}.npz")
+    with open(ruta + ".json.tmp", "w", encoding="utf-8") as f:
+        json.dump({"tipos": tipos, "roles": roles}, f, ensure_ascii=False)
+    os.replace(ruta + ".json.tmp", ruta + ".json")
+    grafo.guardar(ruta)
+
+
+def variantes(version):
+    """Filtros ``(tipos, roles)`` de los grafos guardados para una versión de los datos"""
+    directorio = datos.directorio_version(version)
+    encontradas = []
+    for archivo in sorted(os.listdir(directorio)):
+        if archivo.startswith("grafo_") and archivo.endswith(".npz.json"):
+            with open(os.path.join(directorio, archivo), encoding="utf-8") as f:
+                variante = json.load(f)
+            encontradas.append((variante["tipos"], variante["roles"]))
+    return encontradas
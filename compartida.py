@@ -0,0 +1,207 @@
+"""Caché en memoria compartida por todas las sesiones de Streamlit del proceso.
+
+``st.cache_data`` guarda cada entrada serializada y la deserializa en cada acceso:
+cada rerun de cada sesión paga una copia completa del DataFrame. ``st.cache_resource``
+no copia, pero no tiene límite de memoria. Con ``@memoizar`` los objetos derivados
+de los datos se guardan una sola vez por proceso:
+
+- la clave es la función y sus argumentos; el primero es la versión de los datos y,
+  cuando aparece una versión nueva, se descartan las entradas de versiones
+  anteriores de esa función;
+- cada entrada mide su tamaño en memoria; al pasar el presupuesto de la función o
+  el global (``PRESUPUESTO_BYTES``) se desalojan las usadas hace más tiempo (LRU), y
+  una entrada con ``ttl`` se vuelve a calcular al vencer;
+- se entrega el mismo objeto, sin copiarlo y protegido contra escritura: los
+  arreglos de NumPy (también los de matrices dispersas y los atributos de objetos
+  como ``CollaborationGraph``) quedan de sólo lectura, y los DataFrame se entregan
+  como copias superficiales que, con copy-on-write de pandas, no comparten cambios;
+- varias sesiones que piden a la vez una entrada que falta esperan un solo cálculo.
+"""
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# pandas 3 siempre usa copy-on-write; en pandas 2 depende de la opción
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+# Memoria total para las entradas de todas las funciones
+PRESUPUESTO_BYTES = 1024 * 2 ** 20
+
+
+def tamano(objeto, vistos=None):
+    """Bytes aproximados que ocupa un objeto (los arreglos compartidos se cuentan una vez)"""
+    vistos = set() if vistos is None else vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(objeto, pd.DataFrame) else uso)
+    if isinstance(objeto, pd.Index):
+        return int(objeto.memory_usage(deep=True))
+    if isinstance(objeto, np.ndarray):
+        base = objeto if objeto.base is None else objeto.base
+        if base is not objeto and id(base) in vistos:
+            return 0
+        vistos.add(id(base))
+        return int(objeto.nbytes)
+    if sparse.issparse(objeto):
+        return sum(tamano(getattr(objeto, a), vistos) for a in ("data", "indices", "indptr", "row", "col")
+                   if hasattr(objeto, a))
+    if isinstance(objeto, (list, tuple, set, frozenset)):
+        return sys.getsizeof(objeto) + sum(tamano(x, vistos) for x in objeto)
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(tamano(k, vistos) + tamano(v, vistos) for k, v in objeto.items())
+    if hasattr(objeto, "__dict__") and not isinstance(objeto, type):
+        return sys.getsizeof(objeto) + tamano(vars(objeto), vistos)
+    return sys.getsizeof(objeto)
+
+
+def congelar(objeto):
+    """Marca como de sólo lectura los arreglos de NumPy del objeto (y de sus atributos); regresa el objeto"""
+    if isinstance(objeto, np.ndarray):
+        objeto.flags.writeable = False
+    elif sparse.issparse(objeto):
+        for atributo in ("data", "indices", "indptr", "row", "col"):
+            if hasattr(objeto, atributo):
+                getattr(objeto, atributo).flags.writeable = False
+    elif isinstance(objeto, (list, tuple)):
+        for x in objeto:
+            congelar(x)
+    elif isinstance(objeto, dict):
+        for x in objeto.values():
+            congelar(x)
+    elif hasattr(objeto, "__dict__") and not isinstance(objeto, (type, pd.core.base.PandasObject)):
+        for x in vars(objeto).values():
+            congelar(x)
+    return objeto
+
+
+def _vista(objeto):
+    """Lo que se entrega en cada acceso: el mismo objeto, con los DataFrame como copias superficiales"""
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        # Sin copy-on-write (pandas < 3) una copia superficial compartiría los cambios
+        return objeto.copy(deep=not _COPY_ON_WRITE)
+    if isinstance(objeto, tuple):
+        return tuple(_vista(x) for x in objeto)
+    return objeto
+
+
+class _Entrada:
+    __slots__ = ("valor", "bytes", "vence", "funcion")
+
+    def __init__(self, valor, bytes_, vence, funcion):
+        self.valor, self.bytes, self.vence, self.funcion = valor, bytes_, vence, funcion
+
+
+class CacheCompartida:
+    """Entradas por clave ``(función, versión, *argumentos)`` con desalojo LRU por bytes y vencimiento"""
+
+    def __init__(self, presupuesto=PRESUPUESTO_BYTES):
+        self.presupuesto = presupuesto
+        self.presupuestos = {}
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self._calculos = {}
+        self.aciertos = self.fallos = 0
+
+    def _vigente(self, clave):
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if entrada.vence is not None and entrada.vence <= time.monotonic():
+            del self._entradas[clave]
+            return None
+        self._entradas.move_to_end(clave)
+        return entrada
+
+    def obtener(self, clave, calcular, ttl=None):
+        """Valor guardado con ``clave``; si falta se calcula con ``calcular()`` (una sola vez aunque lo pidan varios)"""
+        with self._candado:
+            entrada = self._vigente(clave)
+            if entrada is not None:
+                self.aciertos += 1
+                return entrada.valor
+            calculo = self._calculos.setdefault(clave, threading.Lock())
+
+        with calculo:
+            with self._candado:
+                entrada = self._vigente(clave)
+                if entrada is not None:
+                    # Otra sesión lo calculó mientras se esperaba
+                    self.aciertos += 1
+                    return entrada.valor
+                self.fallos += 1
+            try:
+                valor = congelar(calcular())
+                bytes_ = tamano(valor)
+                with self._candado:
+                    funcion, version = clave[0], clave[1]
+                    # Una versión nueva de los datos deja obsoletas las anteriores de la misma función
+                    for otra in [c for c, e in self._entradas.items() if e.funcion == funcion and c[1] != version]:
+                        del self._entradas[otra]
+                    vence = None if ttl is None else time.monotonic() + ttl
+                    self._entradas[clave] = _Entrada(valor, bytes_, vence, funcion)
+                    self._podar()
+                return valor
+            finally:
+                with self._candado:
+                    self._calculos.pop(clave, None)
+
+    def _podar(self):
+        uso = {}
+        for entrada in self._entradas.values():
+            uso[entrada.funcion] = uso.get(entrada.funcion, 0) + entrada.bytes
+        total = sum(uso.values())
+        # Las entradas más antiguas primero; la recién agregada es la última y se conserva
+        for clave in list(self._entradas)[:-1]:
+            entrada = self._entradas[clave]
+            limite = self.presupuestos.get(entrada.funcion)
+            if total > self.presupuesto or (limite is not None and uso[entrada.funcion] > limite):
+                del self._entradas[clave]
+                total -= entrada.bytes
+                uso[entrada.funcion] -= entrada.bytes
+
+    def descartar(self, funcion=None):
+        """Quita las entradas de una función (o todas)"""
+        with self._candado:
+            for clave in [c for c, e in self._entradas.items() if funcion is None or e.funcion == funcion]:
+                del self._entradas[clave]
+
+    def estadisticas(self):
+        """Entradas, bytes por función, aciertos y fallos"""
+        with self._candado:
+            por_funcion = {}
+            for entrada in self._entradas.values():
+                por_funcion[entrada.funcion] = por_funcion.get(entrada.funcion, 0) + entrada.bytes
+            return {"entradas": len(self._entradas), "bytes": por_funcion,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+CACHE = CacheCompartida()
+
+
+def memoizar(funcion=None, *, ttl=None, presupuesto=None):
+    """Decorador para las funciones ``_load_x(version, ...)`` de las apps.
+
+    ``ttl`` (segundos) vence las entradas y ``presupuesto`` (bytes) limita la memoria
+    de esta función además del límite global.
+    """
+    def decorar(f):
+        nombre = f"{f.__module__}.{f.__qualname__}"
+        if presupuesto is not None:
+            CACHE.presupuestos[nombre] = presupuesto
+
+        @functools.wraps(f)
+        def envoltura(version, *args):
+            return _vista(CACHE.obtener((nombre, version) + args, lambda: f(version, *args), ttl))
+
+        envoltura.descartar = lambda: CACHE.descartar(nombre)
+        return envoltura
+
+    return decorar(funcion) if funcion is not None else decorar
@@ -1,26 +1,94 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
+import datos
+import cubo
+import tendencias
+import compartida
 
-@st.cache_data
+# Derivados de los datos compartidos por todas las sesiones (compartida.py)
 def load_data():
-    file_path = "productos_validados.csv"
-    df = pd.read_csv(file_path)
-    return df
+    return _load_data(datos.version_datos())
+
+@compartida.memoizar
+def _load_data(version):
+    return datos.cargar_productos()
+
+def load_cubo():
+    return _load_cubo(datos.version_datos())
+
+@compartida.memoizar
+def _load_cubo(version):
+    return cubo.cargar_cubo(version)
+
+def load_coordinaciones():
+    return _load_coordinaciones(datos.version_datos())
+
+@compartida.memoizar
+def _load_coordinaciones(version):
+    return sorted(_load_data(version)["coordinacion"].dropna().unique())
+
+def load_articulos():
+    return _load_articulos(datos.version_datos())
+
+@compartida.memoizar
+def _load_articulos(version):
+    """Coordinación y factor de impacto de los artículos científicos (para el diagrama de caja)"""
+    df = _load_data(version)
+    return df.loc[df["tipo_producto"] == "Artículo científico", ["coordinacion", "factor_impacto"]]
+
+def load_tendencias():
+    return _load_tendencias(datos.version_datos())
+
+@compartida.memoizar
+def _load_tendencias(version):
+    return tendencias.cargar_tendencias(version)
+
+EJES_TENDENCIA = {"publicacion": "Publicación", "registro": "Registro"}
+METRICAS_TENDENCIA = {
+    "Productos por año": "productos",
+    "Acumulado en el periodo": "productos_acumulado",
+    f"Suma móvil ({tendencias.VENTANA} años)": "productos_movil",
+    "Registros extemporáneos": "extemporaneos",
+}
+
+# Fragmento: el periodo y la métrica sólo vuelven a ejecutar esta sección, que corta la tabla precalculada
+@st.fragment
+def tendencia(seleccionadas, lista_tipos, categoria):
+    st.subheader(f"Tendencia anual: {categoria}")
+    tabla = load_tendencias()
+    eje = st.radio("Año de", list(EJES_TENDENCIA), format_func=EJES_TENDENCIA.get, horizontal=True,
+                   key="tendencia_eje")
+    primero, ultimo = tendencias.rango(tabla, eje)
+    if primero < ultimo:
+        desde, hasta = st.slider("Periodo", primero, ultimo, (primero, ultimo), key=f"tendencia_periodo_{eje}")
+    else:
+        desde, hasta = primero, ultimo
+    metrica = st.radio("Mostrar", list(METRICAS_TENDENCIA), horizontal=True, key="tendencia_metrica")
+
+    serie = tendencias.serie(tabla, eje, seleccionadas, lista_tipos, desde, hasta)
+    if serie.empty:
+        st.warning("No hay productos de la categoría en el periodo")
+        return
+    import plotly.express as px
+    fig_tendencia = px.line(
+        serie, x="anio", y=METRICAS_TENDENCIA[metrica], color="coordinacion",
+        markers=True,
+        labels={
+            "anio": f"Año de {EJES_TENDENCIA[eje].lower()}",
+            METRICAS_TENDENCIA[metrica]: metrica,
+            "coordinacion": "Coordinación"}
+    )
+    fig_tendencia.update_xaxes(dtick=1)
+    st.plotly_chart(fig_tendencia, use_container_width=True)
 
 def graficos():
-    df = load_data()
-    
     # Filtro de Coordinaciones 
     seleccionadas = st.multiselect(
         "Seleccionar Coordinaciones", 
-        sorted(df["coordinacion"].dropna().unique()),
+        load_coordinaciones(),
         help="Selecciona una o más coordinaciones para filtrar los productos"
     )
-    if seleccionadas:
-        df_coord = df[df["coordinacion"].isin(seleccionadas)] 
-    else:
+    if not seleccionadas:
         st.warning("Selecciona al menos una coordinación para visualizar los datos") 
         return None
     
@@ -61,8 +129,10 @@ def graficos():
     ) 
     lista_tipos = categorias[cat_labels[categoria_seleccionada]]
 
-    # Filtrar el dataframe para que solo muestre productos de la categoría seleccionada
-    df_filtrado = df_coord[df_coord["tipo_producto"].isin(lista_tipos)]
+    # Cortar el cubo precalculado a las coordinaciones y productos de la categoría seleccionada
+    cubo_sankey = load_cubo()
+    df_filtrado = cubo_sankey[cubo_sankey["coordinacion"].isin(seleccionadas)
+                              & cubo_sankey["tipo_producto"].isin(lista_tipos)]
     
 
     # Construcción del Sankey con subcategorías de la categoría seleccionada
@@ -70,62 +140,40 @@ def graficos():
     
     if categoria_seleccionada == "Publicaciones":
         labels = (seleccionadas + lista_tipos 
-                  + ["Corresp. CIAD", "Corresp. no CIAD"] 
-                  + ["Con estudiantes", "Sin estudiantes"])
+                  + [cubo.CORRESP_CIAD, cubo.CORRESP_NO_CIAD] 
+                  + [cubo.CON_ESTUDIANTES, cubo.SIN_ESTUDIANTES])
         label2idx = {label: idx for idx, label in enumerate(labels)}
         
         # de Coordinaciones a tipo de publicación
-        serie_CT = df_filtrado.groupby(
-            ['coordinacion', 'tipo_producto'])['id_producto'].count()
+        serie_CT = cubo.flujos(df_filtrado, 'coordinacion', 'tipo_producto')
         source.extend(label2idx[x[0]] for x in serie_CT.index)
         target.extend(label2idx[x[1]] for x in serie_CT.index)
         values.extend(serie_CT.tolist())
         
         # de tipo de publicación a Corresp. CIAD o Corresp. no CIAD 
-        df_filtrado['provCA'] = (
-            df_filtrado['*Autor de correspondencia']
-            .str.extract(r'(\([^\*]*\))')
-            .replace({r'\(|\)': ''}, regex=True)
-            .isin(df['coordinacion'].unique())
-        )
-        df_filtrado['CA'] = 'Corresp. no CIAD'
-        df_filtrado.loc[df_filtrado['provCA'], 'CA'] = 'Corresp. CIAD'
-        serie_CC = df_filtrado.groupby(['tipo_producto', 'CA'])['id_producto'].count()
+        serie_CC = cubo.flujos(df_filtrado, 'tipo_producto', 'CA')
         source.extend(label2idx[x[0]] for x in serie_CC.index)
         target.extend(label2idx[x[1]] for x in serie_CC.index)
         values.extend(serie_CC.tolist())
         
         # de tipo CIAD a colaboración de estudiantes
-        str_choro = 'Autores | *Autor de correspondencia | ªEstudiante'
-        df_filtrado['estudiante'] = df_filtrado[str_choro].str.contains('ª')
-        df_filtrado['est'] = 'Sin estudiantes'
-        df_filtrado.loc[df_filtrado['estudiante'], 'est'] = 'Con estudiantes'
-        serie_CE = df_filtrado.groupby(['CA', 'est'])['id_producto'].count()
+        serie_CE = cubo.flujos(df_filtrado, 'CA', 'est')
         source.extend(label2idx[x[0]] for x in serie_CE.index)
         target.extend(label2idx[x[1]] for x in serie_CE.index)
         values.extend(serie_CE.tolist())
         
     elif categoria_seleccionada == "Editor/Revisor" and df_filtrado.shape[0] > 0:
-        subtipos = ['indizada (ISI, CYT)', 'indizada (otros indices)',
-                    'no indizada', 'por solicitud de estancias externas',
-                    'institución o asociación académica', 'editorial reconocida']
-        labels = seleccionadas + lista_tipos + subtipos
+        labels = seleccionadas + lista_tipos + cubo.SUBTIPOS_EDITOR
         label2idx = {label: idx for idx, label in enumerate(labels)}
         
         # de Coordinaciones a tipo de editor/revisor
-        serie_CT = df_filtrado.groupby(
-            ['coordinacion', 'tipo_producto'])['id_producto'].count()
+        serie_CT = cubo.flujos(df_filtrado, 'coordinacion', 'tipo_producto')
         source.extend(label2idx[x[0]] for x in serie_CT.index)
         target.extend(label2idx[x[1]] for x in serie_CT.index)
         values.extend(serie_CT.tolist())
         
         # de tipo de editor/revisor a indización
-        df_filtrado['sub'] = 'Otro'
-        for subtipo in subtipos:
-            df_filtrado \
-             .loc[df_filtrado['subtipo_producto'] \
-             .str.contains(subtipo, regex=False), 'sub'] = subtipo
-        serie_CC = df_filtrado.groupby(['tipo_producto', 'sub'])['id_producto'].count()
+        serie_CC = cubo.flujos(df_filtrado, 'tipo_producto', 'sub')
         source.extend(label2idx[x[0]] for x in serie_CC.index)
         target.extend(label2idx[x[1]] for x in serie_CC.index)
         values.extend(serie_CC.tolist())
@@ -137,8 +185,7 @@ def graficos():
         label2idx = {label: idx for idx, label in enumerate(labels)}
         
         # de Coordinaciones a tipo de reconocimiento
-        serie_CT = df_filtrado.groupby(
-            ['coordinacion', 'tipo_producto'])['id_producto'].count()
+        serie_CT = cubo.flujos(df_filtrado, 'coordinacion', 'tipo_producto')
         source.extend(label2idx[x[0]] for x in serie_CT.index)
         target.extend(label2idx[x[1]] for x in serie_CT.index)
         values.extend(serie_CT.tolist())
@@ -146,13 +193,13 @@ def graficos():
         # Nivel de SNI
         if 'Sistema Nacional de Investigadores' in df_filtrado['tipo_producto'].unique(): 
             df_SNI = df_filtrado[df_filtrado['tipo_producto'] == 'Sistema Nacional de Investigadores']
-            serie_SNI = df_SNI.groupby(['tipo_producto', 'subtipo_producto'])['id_producto'].count()
+            serie_SNI = cubo.flujos(df_SNI, 'tipo_producto', 'subtipo_producto')
             source.extend(label2idx[x[0]] for x in serie_SNI.index)
             target.extend(label2idx[x[1]] for x in serie_SNI.index)
             values.extend(serie_SNI.tolist())
         if 'Premios' in df_filtrado['tipo_producto'].unique():
             df_premios = df_filtrado[df_filtrado['tipo_producto'] == 'Premios']
-            serie_premios = df_premios.groupby(['tipo_producto', 'ambito'])['id_producto'].count()
+            serie_premios = cubo.flujos(df_premios, 'tipo_producto', 'ambito')
             source.extend(label2idx[x[0]] for x in serie_premios.index)
             target.extend(label2idx[x[1]] for x in serie_premios.index)
             values.extend(serie_premios.tolist())
@@ -161,14 +208,13 @@ def graficos():
         label2idx = {label: idx for idx, label in enumerate(labels)}
         
         # de Coordinaciones a tipo de evento
-        serie_CT = df_filtrado.groupby(
-            ['coordinacion', 'tipo_producto'])['id_producto'].count()
+        serie_CT = cubo.flujos(df_filtrado, 'coordinacion', 'tipo_producto')
         source.extend(label2idx[x[0]] for x in serie_CT.index)
         target.extend(label2idx[x[1]] for x in serie_CT.index)
         values.extend(serie_CT.tolist())
         
         # de tipo de evento a ámbito
-        serie_CC = df_filtrado.groupby(['tipo_producto', 'ambito'])['id_producto'].count()
+        serie_CC = cubo.flujos(df_filtrado, 'tipo_producto', 'ambito')
         source.extend(label2idx[x[0]] for x in serie_CC.index)
         target.extend(label2idx[x[1]] for x in serie_CC.index)
         values.extend(serie_CC.tolist())
@@ -191,10 +237,13 @@ def graficos():
         st.plotly_chart(fig_sankey, use_container_width=True)
     else:
         st.warning("No hay datos para mostrar en el gráfico Sankey") 
+
+    tendencia(seleccionadas, lista_tipos, categoria_seleccionada)
            
     st.subheader("Impacto de artículos por coordinación")
     
-    df_articulos = df.loc[df['tipo_producto'] == 'Artículo científico',:]
+    df_articulos = load_articulos()
+    import plotly.express as px
     fig_box = px.box(
         df_articulos, x='coordinacion', y='factor_impacto',
         points="all",
@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+
+import datos
+
+# Etiquetas de los nodos derivados del Sankey de coordinacion.graficos
+CORRESP_CIAD = "Corresp. CIAD"
+CORRESP_NO_CIAD = "Corresp. no CIAD"
+CON_ESTUDIANTES = "Con estudiantes"
+SIN_ESTUDIANTES = "Sin estudiantes"
+OTRO = "Otro"
+
+# Subtipos de editor/revisor (si un subtipo contiene varios, gana el último)
+SUBTIPOS_EDITOR = ['indizada (ISI, CYT)', 'indizada (otros indices)',
+                   'no indizada', 'por solicitud de estancias externas',
+                   'institución o asociación académica', 'editorial reconocida']
+
+DIMENSIONES = ["coordinacion", "tipo_producto", "subtipo_producto", "ambito", "CA", "est", "sub"]
+
+
+def _bandera(mascara, si, no):
+    # Categorías en orden alfabético, como al agrupar las etiquetas de texto
+    return pd.Categorical(mascara.map({True: si, False: no}), categories=sorted([si, no]))
+
+
+def construir_cubo(df, coordinaciones=None):
+    """Conteo de productos por (coordinación, tipo, subtipo, ámbito, CA, estudiantes, subtipo de editor).
+
+    Las operaciones de texto se hacen una vez por producto (o por subtipo distinto);
+    los filtros del tablero sólo cortan y suman las celdas del cubo. ``coordinaciones``
+    (por omisión las de ``df``) son las instituciones que cuentan como CIAD.
+    """
+    # Autor de correspondencia cuya institución (entre paréntesis) es una coordinación del CIAD
+    institucion = (
+        df['*Autor de correspondencia']
+        .str.extract(r'(\([^\*]*\))', expand=False)
+        .str.replace(r'\(|\)', '', regex=True)
+    )
+    ca = institucion.isin(df['coordinacion'].unique() if coordinaciones is None else coordinaciones)
+    estudiante = df['Autores | *Autor de correspondencia | ªEstudiante'].str.contains('ª').fillna(False)
+
+    # Subtipo de editor/revisor: se evalúa sobre las categorías, no sobre cada fila
+    subtipos = df['subtipo_producto'].cat.categories.to_series()
+    sub = pd.Series(OTRO, index=subtipos.index)
+    for subtipo in SUBTIPOS_EDITOR:
+        sub[subtipos.str.contains(subtipo, regex=False)] = subtipo
+
+    llaves = df[["coordinacion", "tipo_producto", "subtipo_producto", "ambito"]].assign(
+        CA=_bandera(ca, CORRESP_CIAD, CORRESP_NO_CIAD),
+        est=_bandera(estudiante.astype(bool), CON_ESTUDIANTES, SIN_ESTUDIANTES),
+        sub=pd.Categorical(df['subtipo_producto'].map(sub), categories=sorted(SUBTIPOS_EDITOR + [OTRO])),
+    )
+    llaves["n"] = df["id_producto"].notna().astype("int32")
+    cubo = llaves.groupby(DIMENSIONES, observed=True, dropna=False)["n"].sum().reset_index()
+    return cubo[cubo["n"] > 0].reset_index(drop=True)
+
+
+def cargar_cubo(version=None):
+    """Cubo de conteos de una versión de los datos; se construye una vez y se guarda en disco"""
+    version = version or datos.version_datos()
+    ruta = os.path.join(datos.directorio_version(version), "cubo_sankey.parquet")
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    cubo = construir_cubo(datos.cargar_productos())
+    guardar_cubo(cubo, version)
+    return cubo
+
+
+def guardar_cubo(cubo, version):
+    ruta = os.path.join(datos.directorio_version(version), "cubo_sankey.parquet")
+    tmp = ruta + ".tmp"
+    cubo.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def actualizar_cubo(cubo, previas, nuevas, coordinaciones):
+    """Cubo con los conteos de los productos ``previas`` restados y los de ``nuevas`` sumados.
+
+    Sirve mientras no cambie el conjunto de ``coordinaciones`` (de todos los
+    productos), porque de él depende la bandera CA de todas las filas. Las
+    categorías quedan en orden alfabético, como en un cubo construido desde cero.
+    """
+    quitar = construir_cubo(previas, coordinaciones)
+    quitar["n"] = -quitar["n"]
+    partes = [cubo, construir_cubo(nuevas, coordinaciones), quitar]
+    todo = pd.concat([parte.astype({d: object for d in DIMENSIONES}) for parte in partes], ignore_index=True)
+    suma = todo.groupby(DIMENSIONES, dropna=False)["n"].sum().reset_index()
+    suma = suma[suma["n"] != 0].reset_index(drop=True)
+    return suma.astype({d: "category" for d in DIMENSIONES} | {"n": cubo["n"].dtype})
+
+
+def flujos(cubo, origen, destino):
+    """Conteos (origen, destino) → productos, como el ``groupby(...).count()`` sobre los productos"""
+    return cubo.groupby([origen, destino], observed=True)["n"].sum()
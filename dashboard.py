@@ -1,10 +1,52 @@
+import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+import datos
+import metricas
+import compartida
 
+AUTORES = "Autores.csv"
+COLABORADORES = "Colaboradores.parquet"
 
-df = pd.read_csv("Autores.csv")
+
+# Tablas generadas por resumen_autores.py; se vuelven a leer sólo si cambia el archivo
+def load_autores():
+    return _load_autores(os.path.getmtime(AUTORES))
+
+@compartida.memoizar
+def _load_autores(mtime):
+    return pd.read_csv(AUTORES)
+
+def load_colaboradores():
+    return _load_colaboradores(os.path.getmtime(COLABORADORES))
+
+@compartida.memoizar
+def _load_colaboradores(mtime):
+    # Aristas ordenadas por autor_id: los colaboradores de un autor son un corte contiguo
+    return pd.read_parquet(COLABORADORES)
+
+
+# Métricas de la red de colaboración precalculadas por metricas.py, indexadas por nombre (None si faltan)
+def load_metricas():
+    version = datos.version_datos()
+    return _load_metricas(version, os.path.exists(metricas.ruta_metricas(version=version)))
+
+@compartida.memoizar
+def _load_metricas(version, existe):
+    tabla = metricas.leer_metricas(version=version)
+    return None if tabla is None else tabla.drop_duplicates("nombre").set_index("nombre")
+
+
+df = load_autores()
+metricas_red = load_metricas()
+colaboradores = load_colaboradores()
+
+# Índice nombre → fila (la primera, si un nombre aparece con dos instituciones)
+fila_nombre = pd.Series(np.arange(len(df)), index=df["Nombre"])
+fila_nombre = fila_nombre[~fila_nombre.index.duplicated()]
 
 
 investigadores = df["Nombre"].unique().tolist()
@@ -22,7 +64,7 @@ if seleccionado == "Institución":
     st.write(f"Investigadores de la institución {institucion_seleccionada}")
     st.dataframe(investigadores_institucion[["Nombre"]])
 
-    columnas_proyectos = df.columns[4:-1] 
+    columnas_proyectos = df.columns[4:]
 
     proyectos_institucion = investigadores_institucion[columnas_proyectos]
     proyectos_institucion_suma = proyectos_institucion.sum()
@@ -42,11 +84,24 @@ else:
     if investigador_seleccionado != "Todos":
         st.write(f"Análisis del investigador: {investigador_seleccionado}")
 
-        institucion_investigador = df.loc[df["Nombre"] == investigador_seleccionado, "Institución"].values[0]
+        fila = fila_nombre[investigador_seleccionado]
+        institucion_investigador = df.at[fila, "Institución"]
         st.write(f"Este investigador pertenece a: {institucion_investigador}")
 
-        columnas_proyectos = df.columns[4:-1]  # Excluye "Nombre", "Institución", "No. Documentos AC" y "No. Documentos No AC"
-        proyectos_investigador = df.loc[df["Nombre"] == investigador_seleccionado, columnas_proyectos].values[0]
+        if metricas_red is None:
+            st.info("Las métricas de la red de esta versión de los datos aún no se calculan (python metricas.py).")
+        elif investigador_seleccionado in metricas_red.index:
+            m = metricas_red.loc[investigador_seleccionado]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Colaboradores", int(m["grado"]))
+            col2.metric("Intermediación", f"{m['intermediacion']:.4f}")
+            col3.metric("Colaboradores estudiantes", f"{m['proporcion_estudiantes']:.0%}" if m["grado"] else "—")
+            if m["grado"]:
+                st.write(f"Componente {int(m['componente'])}, comunidad {int(m['comunidad'])} "
+                         f"({int(m['grado_ponderado'])} productos compartidos)")
+
+        columnas_proyectos = df.columns[4:]  # Excluye "Nombre", "Institución", "No. Documentos AC" y "No. Documentos No AC"
+        proyectos_investigador = df.loc[fila, columnas_proyectos].values
 
         proyectos_investigador = dict(zip(columnas_proyectos, proyectos_investigador))
         proyectos_investigador = {k: v for k, v in proyectos_investigador.items() if v > 0}
@@ -60,7 +115,9 @@ else:
             st.write(f"{tipo}: {cantidad}")
 
         st.write("Red de colaboración")
-        colaboraciones = eval(df.loc[df["Nombre"] == investigador_seleccionado, "Colaboradores"].values[0])
+        inicio, fin = np.searchsorted(colaboradores["autor_id"].to_numpy(), [fila, fila + 1])
+        vecinos = colaboradores.iloc[inicio:fin]
+        colaboraciones = dict(zip(vecinos["colaborador"].astype(str), vecinos["n"].tolist()))
 
         G = nx.Graph()
         G.add_node(investigador_seleccionado)  # Nodo principal
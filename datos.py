@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import lector_excel
+
+# 📂 Fuentes de datos
+FUENTE_CSV = "productos_validados.csv"
+FUENTE_XLSX = "Productos validados.xlsx"
+HOJA_INV = "Productos validados - INV"
+
+# 📦 Snapshot columnar compartido por todos los módulos del tablero
+DIR_CACHE = "cache"
+SNAPSHOT = os.path.join(DIR_CACHE, "productos.parquet")
+META = os.path.join(DIR_CACHE, "productos.json")
+# Filas nuevas o cambiadas de cada exportación ingerida, aplicadas encima de la fuente
+DIR_INGESTAS = os.path.join(DIR_CACHE, "ingestas")
+
+# Revisión del formato de los artefactos derivados: al cambiar cómo se construyen
+# (p.ej. la resolución de identidades) se incrementa y se reconstruyen en otro directorio
+REVISION_ARTEFACTOS = 5
+
+COLUMNAS_CATEGORICAS = ["coordinacion", "tipo_producto", "subtipo_producto", "ambito"]
+
+# Tipos de producto que cuentan como publicación
+TIPOS_PUBLICACION = [
+    'Artículo científico', 'Capítulo de libro', 'Libro',
+    'Publicaciones derivadas de eventos colectivos',
+    'Subcapítulo o artículo de libro', 'Informe interno anual de actividades'
+]
+
+
+def fuente_datos():
+    """Regresa la fuente a usar: el CSV limpio si existe, si no el Excel institucional"""
+    return FUENTE_CSV if os.path.exists(FUENTE_CSV) else FUENTE_XLSX
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _leer_meta():
+    try:
+        with open(META, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_meta(meta):
+    tmp = META + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, META)
+
+
+def _huella(fuente):
+    """Huella de la fuente: mtime y tamaño; el hash sólo se calcula si éstos cambian"""
+    st = os.stat(fuente)
+    meta = _leer_meta()
+    if (meta and meta["fuente"] == fuente
+            and meta["mtime"] == st.st_mtime_ns and meta["tamano"] == st.st_size):
+        return meta, False
+    nueva = {
+        "fuente": fuente, "mtime": st.st_mtime_ns, "tamano": st.st_size,
+        "sha256": _sha256(fuente), "ingestas": meta.get("ingestas", []) if meta else []
+    }
+    # Si sólo cambió el mtime (p.ej. un checkout) el contenido sigue siendo válido
+    vigente = meta is not None and meta["sha256"] == nueva["sha256"] and os.path.exists(SNAPSHOT)
+    return nueva, not vigente
+
+
+def _version(meta):
+    """Versión de los datos: hash corto de la fuente y de las ingestas aplicadas encima"""
+    if not meta.get("ingestas"):
+        return meta["sha256"][:16]
+    h = hashlib.sha256(meta["sha256"].encode("ascii"))
+    for ingesta in meta["ingestas"]:
+        h.update(ingesta["sha256"].encode("ascii"))
+    return h.hexdigest()[:16]
+
+
+def leer_fuente(fuente, hoja=HOJA_INV, dtype=None):
+    """Lee la fuente original (CSV o Excel) y tipa las columnas"""
+    if fuente.endswith(".xlsx"):
+        df = pd.read_excel(fuente, sheet_name=hoja, dtype=dtype)
+    else:
+        df = pd.read_csv(fuente, dtype=dtype)
+    return tipar(df)
+
+
+def tipar(df):
+    """Quita el índice exportado por pandas y convierte las columnas de baja cardinalidad a categóricas"""
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df.reset_index(drop=True)
+
+
+def actualizar_snapshot(fuente=None, forzar=False):
+    """Regenera el snapshot Parquet si la fuente cambió. Regresa la versión de los datos"""
+    fuente = fuente or fuente_datos()
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    meta, cambio = _huella(fuente)
+    if cambio or forzar:
+        ingestas = meta.get("ingestas", [])
+        if fuente.endswith(".xlsx"):
+            # El Excel se convierte en streaming directo al snapshot, sin pasar por un DataFrame
+            lector_excel.convertir(fuente, SNAPSHOT, HOJA_INV, COLUMNAS_CATEGORICAS)
+            df = pd.read_parquet(SNAPSHOT) if ingestas else None
+        else:
+            df = leer_fuente(fuente)
+        for ingesta in ingestas:
+            df = aplicar_delta(df, pd.read_parquet(os.path.join(DIR_INGESTAS, ingesta["delta"])))[0]
+        if df is not None:
+            _escribir_snapshot(df)
+    if meta != _leer_meta():
+        _escribir_meta(meta)
+    return _version(meta)
+
+
+def _escribir_snapshot(df):
+    tmp = SNAPSHOT + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, SNAPSHOT)
+
+
+def aplicar_delta(df, delta):
+    """Inserta o reemplaza por ``id_producto`` las filas de ``delta``.
+
+    Una fila reemplazada conserva su posición y las nuevas se agregan al final, así
+    que la posición (``fila``) de los demás productos no cambia. Regresa el nuevo
+    DataFrame y las posiciones reemplazadas y agregadas.
+    """
+    delta = delta.reindex(columns=df.columns)
+    posicion = pd.Index(df["id_producto"]).get_indexer(delta["id_producto"])
+    existe = posicion >= 0
+    orden = np.arange(len(df))
+    orden[posicion[existe]] = len(df) + np.flatnonzero(existe)
+    orden = np.concatenate([orden, len(df) + np.flatnonzero(~existe)])
+    combinado = tipar(pd.concat([df, delta], ignore_index=True).iloc[orden])
+    return combinado, np.sort(posicion[existe]), np.arange(len(df), len(combinado))
+
+
+def _alinear(nuevo, df):
+    """Columnas de ``nuevo`` (leídas como texto) con los tipos del snapshot.
+
+    Una exportación pequeña puede inferir otro tipo que la fuente completa (p.ej.
+    números en una columna de texto); leyéndola como texto el contenido de las
+    columnas de texto queda igual que en la fuente y sólo se convierten las numéricas.
+    """
+    nuevo = nuevo.reindex(columns=df.columns)
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            numeros = pd.to_numeric(nuevo[col])
+            nuevo[col] = numeros if numeros.hasnans else numeros.astype(df[col].dtype)
+    return nuevo
+
+
+def _cambios(df, nuevo):
+    """Filas de ``nuevo`` cuyo ``id_producto`` no está en ``df`` o cuyo contenido es distinto"""
+    posicion = pd.Index(df["id_producto"]).get_indexer(nuevo["id_producto"])
+    existe = posicion >= 0
+    # Se comparan juntas para que ambas partes queden con los mismos tipos de columna
+    juntas = pd.concat([df.iloc[posicion[existe]], nuevo[existe]], ignore_index=True).astype(str)
+    firmas = pd.util.hash_pandas_object(juntas, index=False).to_numpy()
+    distinto = np.ones(len(nuevo), dtype=bool)
+    distinto[existe] = firmas[:existe.sum()] != firmas[existe.sum():]
+    return nuevo[distinto]
+
+
+def ingerir(ruta, hoja=HOJA_INV):
+    """Aplica al snapshot las filas nuevas o cambiadas (por ``id_producto``) de una exportación.
+
+    El delta se guarda en ``cache/ingestas`` y queda registrado en la meta, de modo
+    que se vuelve a aplicar si la fuente principal se regenera. Regresa ``None`` si
+    no hay cambios; si no, un diccionario con la versión anterior y la nueva, las
+    posiciones reemplazadas y agregadas y las filas previas de las reemplazadas.
+    """
+    anterior = actualizar_snapshot()
+    meta = _leer_meta()
+    meta.setdefault("ingestas", [])
+    sha = _sha256(ruta)
+    if any(ingesta["sha256"] == sha for ingesta in meta["ingestas"]):
+        return None
+    nuevo = leer_fuente(ruta, hoja, dtype=str)
+    if "id_producto" not in nuevo.columns:
+        raise ValueError(f"{ruta} no tiene la columna id_producto; no se pueden identificar sus productos")
+    df = pd.read_parquet(SNAPSHOT)
+    nuevo = _alinear(nuevo.dropna(subset=["id_producto"]), df).drop_duplicates("id_producto", keep="last")
+    delta = _cambios(df, nuevo)
+    if delta.empty:
+        return None
+
+    os.makedirs(DIR_INGESTAS, exist_ok=True)
+    archivo = sha[:16] + ".parquet"
+    delta.to_parquet(os.path.join(DIR_INGESTAS, archivo + ".tmp"), index=False)
+    os.replace(os.path.join(DIR_INGESTAS, archivo + ".tmp"), os.path.join(DIR_INGESTAS, archivo))
+    combinado, cambiadas, nuevas = aplicar_delta(df, delta)
+    previas = df.iloc[cambiadas]
+    _escribir_snapshot(combinado)
+    meta["ingestas"].append({"archivo": os.path.basename(ruta), "sha256": sha, "delta": archivo})
+    _escribir_meta(meta)
+    return {"anterior": anterior, "version": _version(meta),
+            "cambiadas": cambiadas, "nuevas": nuevas, "previas": previas}
+
+
+def version_datos():
+    """Versión (hash corto del contenido y de las ingestas) de los datos vigentes; actualiza el snapshot si es necesario"""
+    return actualizar_snapshot()
+
+
+def directorio_version(version=None):
+    """Directorio de artefactos derivados (autores, grafo, índices) de una versión de los datos"""
+    ruta = os.path.join(DIR_CACHE, f"{version or version_datos()}-r{REVISION_ARTEFACTOS}")
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+
+def cargar_productos(columnas=None):
+    """Carga los productos validados desde el snapshot columnar"""
+    actualizar_snapshot()
+    return pd.read_parquet(SNAPSHOT, columns=columnas)
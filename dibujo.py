@@ -0,0 +1,194 @@
+"""Trazas de Plotly (WebGL) para dibujar redes grandes.
+
+Las coordenadas se arman con NumPy y se dibujan con ``go.Scattergl``: todas las
+aristas van en una sola traza de líneas encadenadas en trazos continuos, y como
+son arreglos float32 Plotly las envía al navegador codificadas en binario en
+lugar de listas de números en JSON. Para redes muy densas se pueden diezmar las aristas
+(``decimar``) o agregarlas entre regiones del plano (``agregar``).
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# Tope de aristas que pasan grafo.py y vistas.py a ``trazas_aristas``; por omisión no se diezma
+MAX_ARISTAS = 5000
+# Celdas por lado de la rejilla de la vista agregada
+CELDAS = 24
+# Anchos de línea de la vista agregada, de menor a mayor peso
+ANCHOS = (0.5, 1.5, 3.0)
+
+
+def desde_networkx(G, pos, atributo="weight"):
+    """Nodos, coordenadas (n × 2) y aristas (u, v, peso) como arreglos a partir de un grafo networkx"""
+    nodos = list(G.nodes())
+    xy = np.array([pos[n] for n in nodos], dtype=np.float32).reshape(-1, 2)
+    indice = pd.Index(nodos)
+    if G.number_of_edges():
+        a, b, peso = zip(*G.edges(data=atributo, default=1))
+    else:
+        a, b, peso = [], [], []
+    u, v = indice.get_indexer(list(a)), indice.get_indexer(list(b))
+    return nodos, xy, u, v, np.asarray(peso, dtype=np.float32)
+
+
+def recorridos(u, v):
+    """Índices de nodos que recorren todas las aristas como trazos continuos, con -1 entre trazos.
+
+    En cada nodo se emparejan sus aristas de dos en dos; seguir esas parejas parte
+    el grafo en caminos y ciclos, y cada uno se dibuja sin repetir puntos. Así una
+    arista cuesta poco más de un punto en lugar de tres (origen, destino, NaN).
+
+    Sin ciclos de Python: cada arista recorrida en un sentido es un nodo de un grafo
+    dirigido cuyo sucesor es la arista emparejada en su destino; sus componentes
+    (``csgraph``) son los trazos, cada uno dos veces (uno por sentido, se conserva
+    uno), y el orden dentro de cada trazo sale de la distancia a su final.
+    """
+    m = len(u)
+    if not m:
+        return np.zeros(0, dtype=np.int64)
+    # Extremo j: arista j % m, lado j // m; recorrer la arista desde el extremo j termina en el extremo j ± m
+    extremos = np.concatenate([u, v])
+    opuesto = (np.arange(2 * m) + m) % (2 * m)
+    orden = np.argsort(extremos, kind="stable")
+    ordenados = extremos[orden]
+    inicio_grupo = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+    rango = np.arange(2 * m) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, 2 * m]))
+    par = np.flatnonzero((rango[:-1] % 2 == 0) & (ordenados[:-1] == ordenados[1:]))
+    companero = np.full(2 * m, -1)
+    companero[orden[par]], companero[orden[par + 1]] = orden[par + 1], orden[par]
+
+    # Sucesor de cada sentido: al llegar al extremo opuesto se sigue por la arista emparejada ahí
+    siguiente = companero[opuesto]
+    origen = np.flatnonzero(siguiente >= 0)
+    enlaces = sparse.csr_matrix((np.ones(len(origen)), (origen, siguiente[origen])), shape=(2 * m, 2 * m))
+    _, trazo = csgraph.connected_components(enlaces, directed=True, connection="weak")
+    minimo = np.full(trazo.max() + 1, 2 * m)
+    np.minimum.at(minimo, trazo, np.arange(2 * m))
+    # De los dos sentidos de cada trazo se conserva el que contiene el extremo de menor índice
+    conservar = minimo[trazo] < minimo[trazo[opuesto]]
+    # Los caminos empiezan en su extremo sin pareja; los ciclos se cortan en su extremo de menor índice
+    ciclo = np.bincount(trazo, weights=companero < 0) == 0
+    cabeza = conservar & ((companero < 0) | (ciclo[trazo] & (np.arange(2 * m) == minimo[trazo])))
+    # Cortados los ciclos, cada trazo conservado es un camino: la distancia de cada sentido al
+    # final de su camino se obtiene duplicando saltos (log de la longitud pasos) y da su orden
+    salto = np.where(conservar & (siguiente >= 0), siguiente, -1)
+    corte = salto >= 0
+    corte[corte] = cabeza[salto[corte]]
+    salto[corte] = -1
+    distancia = (salto >= 0).astype(np.int64)
+    activos = np.flatnonzero(salto >= 0)
+    while len(activos):
+        distancia[activos] += distancia[salto[activos]]
+        salto[activos] = salto[salto[activos]]
+        activos = activos[salto[activos] >= 0]
+    elegidos = np.flatnonzero(conservar)
+    recorrido = elegidos[np.lexsort((-distancia[elegidos], trazo[elegidos]))]
+
+    # Cada cabeza abre un trazo (-1 y su primer punto); cada sentido agrega el punto al que llega
+    es_cabeza = cabeza[recorrido]
+    tamano = 1 + 2 * es_cabeza
+    fin = np.cumsum(tamano)
+    secuencia = np.empty(fin[-1], dtype=np.int64)
+    inicio = fin - tamano
+    secuencia[inicio[es_cabeza]] = -1
+    secuencia[inicio[es_cabeza] + 1] = extremos[recorrido[es_cabeza]]
+    secuencia[fin - 1] = extremos[opuesto[recorrido]]
+    return secuencia[1:]
+
+
+def segmentos(xy, u, v):
+    """Arreglos x, y (float32, NaN entre trazos) que dibujan las aristas en una sola traza de líneas"""
+    secuencia = recorridos(u, v)
+    puntos = xy[secuencia].astype(np.float32)
+    puntos[secuencia < 0] = np.nan
+    return puntos[:, 0], puntos[:, 1]
+
+
+def decimar(u, v, peso, max_aristas):
+    """Índices de las aristas que se conservan (a lo más ``max_aristas``).
+
+    Cada nodo conserva su arista de mayor peso, para que nadie quede suelto; el
+    resto se llena con las de mayor peso y, a igual peso, las de nodos de menor
+    grado (las de los nodos muy conectados son las más redundantes). Si esas
+    aristas de cada nodo ya pasan de ``max_aristas`` se conservan las primeras en
+    el mismo orden, y algunos nodos quedan sin arista.
+    """
+    m = len(u)
+    if m <= max_aristas:
+        return np.arange(m)
+    grado = np.bincount(np.concatenate([u, v]))
+    orden = np.lexsort((np.minimum(grado[u], grado[v]), -peso))
+
+    # Primera aparición de cada nodo en el orden: su arista más pesada
+    extremos = np.concatenate([u[orden], v[orden]])
+    posicion = np.tile(np.arange(m), 2)
+    _, primera = np.unique(extremos, return_index=True)
+    esqueleto = np.zeros(m, dtype=bool)
+    esqueleto[posicion[primera]] = True
+
+    elegidas = np.flatnonzero(esqueleto)[:max_aristas]
+    resto = np.flatnonzero(~esqueleto)[:max(max_aristas - len(elegidas), 0)]
+    return np.sort(orden[np.concatenate([elegidas, resto])])
+
+
+def agregar(xy, u, v, peso, celdas=CELDAS):
+    """Red por regiones: los nodos se agrupan en una rejilla ``celdas × celdas``.
+
+    Regresa el centro de cada región ocupada, cuántos nodos tiene y las aristas
+    (cu, cv, peso total) entre regiones distintas.
+    """
+    minimo = xy.min(axis=0)
+    escala = max(float(np.ptp(xy, axis=0).max()), 1e-9)
+    celda = np.minimum(((xy - minimo) / escala * celdas).astype(np.int64), celdas - 1)
+    ocupadas, region = np.unique(celda[:, 0] * celdas + celda[:, 1], return_inverse=True)
+    cuantos = np.bincount(region)
+    centros = np.stack([np.bincount(region, xy[:, d]) / cuantos for d in (0, 1)], axis=1)
+
+    ru, rv = np.minimum(region[u], region[v]), np.maximum(region[u], region[v])
+    distintas = ru != rv
+    clave, total = np.unique(ru[distintas] * len(ocupadas) + rv[distintas], return_inverse=True)
+    suma = np.bincount(total, peso[distintas], minlength=len(clave))
+    return centros.astype(np.float32), cuantos, clave // len(ocupadas), clave % len(ocupadas), suma
+
+
+def trazas_aristas(xy, u, v, peso=None, color="#aaa", ancho=1, max_aristas=None):
+    """Traza ``Scattergl`` de las aristas; con ``max_aristas`` se diezman si pasan de ese número"""
+    if max_aristas is not None:
+        peso = np.ones(len(u), dtype=np.float32) if peso is None else np.asarray(peso)
+        elegidas = decimar(u, v, peso, max_aristas)
+        u, v = u[elegidas], v[elegidas]
+    x, y = segmentos(xy, u, v)
+    return [go.Scattergl(x=x, y=y, mode="lines", line=dict(width=ancho, color=color), hoverinfo="none")]
+
+
+def traza_nodos(xy, texto, color="blue", tamano=10):
+    """Traza ``Scattergl`` de los nodos con su nombre al pasar el cursor"""
+    return go.Scattergl(x=xy[:, 0], y=xy[:, 1], mode="markers", marker=dict(size=tamano, color=color),
+                        text=list(texto), hoverinfo="text")
+
+
+def trazas_regiones(xy, u, v, peso=None, color_aristas="#aaa", color_nodos="blue", celdas=CELDAS):
+    """Vista agregada (red vista de lejos): una marca por región y aristas entre regiones.
+
+    El tamaño de cada marca crece con los nodos de la región y el ancho de cada
+    arista con el peso total de las colaboraciones que resume (tres clases).
+    """
+    if not len(xy):
+        return []
+    peso = np.ones(len(u), dtype=np.float32) if peso is None else np.asarray(peso)
+    centros, cuantos, cu, cv, suma = agregar(xy, u, v, peso, celdas)
+    trazas = []
+    if len(suma):
+        clase = np.searchsorted(np.quantile(suma, [1 / 3, 2 / 3]), suma, side="right")
+        for c, ancho in enumerate(ANCHOS):
+            x, y = segmentos(centros, cu[clase == c], cv[clase == c])
+            trazas.append(go.Scattergl(x=x, y=y, mode="lines", line=dict(width=ancho, color=color_aristas),
+                                       hoverinfo="none"))
+    trazas.append(go.Scattergl(
+        x=centros[:, 0], y=centros[:, 1], mode="markers",
+        marker=dict(size=(6 + 4 * np.sqrt(cuantos)).astype(np.float32), color=color_nodos),
+        customdata=cuantos.astype(np.int32), hovertemplate="%{customdata} nodos<extra></extra>"
+    ))
+    return trazas
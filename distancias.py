@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+from scipy.sparse import csgraph
+
+import datos
+import colaboracion
+
+# Profundidad máxima guardada en el índice
+K_MAX = 3
+# Orígenes por bloque de BFS (acota la memoria de la matriz de distancias)
+TAMANO_BLOQUE = 256
+
+
+def _rangos(inicio, largos):
+    """Concatena los rangos [inicio, inicio + largo) sin ciclos de Python"""
+    return np.repeat(inicio - np.cumsum(largos) + largos, largos) + np.arange(largos.sum())
+
+
+def _expandir(indptr, indices, nodos):
+    """Todas las aristas (nodo, vecino) de un conjunto de nodos de una matriz CSR, sin ciclos de Python"""
+    inicios = indptr[nodos]
+    largos = indptr[nodos + 1] - inicios
+    return np.repeat(nodos, largos), indices[_rangos(inicios, largos)]
+
+
+def _empalmar(ptr_viejo, viejos, ptr_nuevo, nuevos, recalculados):
+    """Une dos juegos de arreglos por origen: de ``nuevos`` los orígenes recalculados, de ``viejos`` el resto"""
+    n = len(ptr_nuevo) - 1
+    largo_viejo = np.zeros(n, dtype=np.int64)
+    largo_viejo[:len(ptr_viejo) - 1] = np.diff(ptr_viejo)
+    largo_viejo[recalculados] = 0
+    largo_nuevo = np.diff(ptr_nuevo)
+    ptr = np.r_[0, np.cumsum(largo_viejo + largo_nuevo)]
+    destino_viejo = _rangos(ptr[:-1], largo_viejo)
+    destino_nuevo = _rangos(ptr[:-1], largo_nuevo)
+    origen_viejo = _rangos(np.r_[ptr_viejo[:-1], np.zeros(n + 1 - len(ptr_viejo), dtype=np.int64)], largo_viejo)
+    origen_nuevo = _rangos(ptr_nuevo[:-1], largo_nuevo)
+    unidos = []
+    for viejo, nuevo in zip(viejos, nuevos):
+        arreglo = np.empty(ptr[-1], dtype=viejo.dtype)
+        arreglo[destino_viejo] = viejo[origen_viejo]
+        arreglo[destino_nuevo] = nuevo[origen_nuevo]
+        unidos.append(arreglo)
+    return ptr, unidos
+
+
+class IndiceErdos:
+    """Resultados de BFS acotados a ``k`` saltos para cada autor del grafo.
+
+    Para cada origen se guardan sus nodos alcanzables ordenados por distancia y los
+    enlaces hijo → padre entre capas consecutivas (los que dibuja ``G_filtered``),
+    en arreglos enteros contiguos. Una consulta es un corte de esos arreglos.
+    """
+
+    ARREGLOS = ["nodos_ptr", "nodos", "distancia", "aristas_ptr", "hijo", "padre", "distancia_hijo"]
+
+    def __init__(self, nodos_ptr, nodos, distancia, aristas_ptr, hijo, padre, distancia_hijo, k=K_MAX):
+        self.nodos_ptr, self.nodos, self.distancia = nodos_ptr, nodos, distancia
+        self.aristas_ptr, self.hijo, self.padre, self.distancia_hijo = aristas_ptr, hijo, padre, distancia_hijo
+        self.k = k
+
+    @classmethod
+    def desde_grafo(cls, grafo, k=K_MAX, origenes=None):
+        """Índice con un BFS por nodo del grafo (o sólo por los ``origenes``, en posiciones locales)"""
+        A = grafo.adyacencia
+        n = A.shape[0]
+        nodos, distancia, hijos, padres, distancia_hijo = [], [], [], [], []
+        n_nodos = np.zeros(n + 1, dtype=np.int64)
+        n_aristas = np.zeros(n + 1, dtype=np.int64)
+        # Los orígenes se recorren en orden de autor_id para que los punteros sean acumulables
+        orden_origen = np.argsort(grafo.ids)
+        if origenes is not None:
+            orden_origen = orden_origen[np.isin(orden_origen, origenes)]
+        for inicio in range(0, len(orden_origen), TAMANO_BLOQUE):
+            bloque = orden_origen[inicio:inicio + TAMANO_BLOQUE]
+            D = csgraph.dijkstra(A, directed=False, unweighted=True, indices=bloque, limit=k + 0.5)
+            for origen, d in zip(bloque, D):
+                alcanzados = np.flatnonzero(np.isfinite(d))
+                dist = d[alcanzados].astype(np.int8)
+                orden = np.argsort(dist, kind="stable")
+                alcanzados, dist = alcanzados[orden], dist[orden]
+
+                # Enlaces de cada nodo (distancia ≥ 1) a sus vecinos de la capa anterior
+                u, v = _expandir(A.indptr, A.indices, alcanzados[dist > 0])
+                du = d[u]
+                enlace = d[v] == du - 1
+                u, v, du = u[enlace], v[enlace], du[enlace].astype(np.int8)
+                orden = np.argsort(du, kind="stable")
+
+                nodos.append(grafo.ids[alcanzados].astype(np.int32))
+                distancia.append(dist)
+                hijos.append(grafo.ids[u[orden]].astype(np.int32))
+                padres.append(grafo.ids[v[orden]].astype(np.int32))
+                distancia_hijo.append(du[orden])
+                n_nodos[origen + 1] = len(alcanzados)
+                n_aristas[origen + 1] = len(u)
+
+        # Los punteros se indexan por autor_id global
+        nodos_ptr = np.zeros(len(grafo.nombres) + 1, dtype=np.int64)
+        aristas_ptr = np.zeros(len(grafo.nombres) + 1, dtype=np.int64)
+        nodos_ptr[grafo.ids + 1] = n_nodos[1:]
+        aristas_ptr[grafo.ids + 1] = n_aristas[1:]
+        vacio8, vacio32 = np.array([], dtype=np.int8), np.array([], dtype=np.int32)
+        return cls(
+            np.cumsum(nodos_ptr), np.concatenate(nodos or [vacio32]),
+            np.concatenate(distancia or [vacio8]), np.cumsum(aristas_ptr),
+            np.concatenate(hijos or [vacio32]), np.concatenate(padres or [vacio32]),
+            np.concatenate(distancia_hijo or [vacio8]), k
+        )
+
+    def actualizar(self, anterior, grafo):
+        """Índice de ``grafo`` recalculando sólo los orígenes cuya vecindad pudo cambiar.
+
+        ``anterior`` es el grafo (completo) con el que se construyó este índice. Una
+        arista que aparece o desaparece sólo altera las capas de los orígenes a menos
+        de ``k`` saltos de alguno de sus extremos, en el grafo anterior o en el nuevo;
+        los cambios de peso no alteran las distancias. Los autores nuevos siempre se
+        recalculan. El resto de los orígenes se copia del índice actual. Regresa el
+        nuevo índice y los orígenes recalculados.
+        """
+        A = grafo.adyacencia
+        n = A.shape[0]
+        previa = anterior.adyacencia.copy()
+        previa.resize(A.shape)
+        cambiados = np.flatnonzero(np.diff(((A != 0) != (previa != 0)).tocsr().indptr))
+        recalcular = np.zeros(n, dtype=bool)
+        recalcular[len(self.nodos_ptr) - 1:] = True
+        for matriz in (previa, A):
+            if len(cambiados):
+                d = csgraph.dijkstra(matriz, directed=False, unweighted=True, indices=cambiados,
+                                     limit=self.k - 0.5, min_only=True)
+                recalcular |= np.isfinite(d)
+        recalculados = np.flatnonzero(recalcular)
+
+        parcial = IndiceErdos.desde_grafo(grafo, self.k, origenes=recalculados)
+        nodos_ptr, (nodos, distancia) = _empalmar(
+            self.nodos_ptr, [self.nodos, self.distancia],
+            parcial.nodos_ptr, [parcial.nodos, parcial.distancia], recalculados
+        )
+        aristas_ptr, (hijo, padre, distancia_hijo) = _empalmar(
+            self.aristas_ptr, [self.hijo, self.padre, self.distancia_hijo],
+            parcial.aristas_ptr, [parcial.hijo, parcial.padre, parcial.distancia_hijo], recalculados
+        )
+        return IndiceErdos(nodos_ptr, nodos, distancia, aristas_ptr, hijo, padre, distancia_hijo, self.k), recalculados
+
+    def guardar(self, ruta):
+        tmp = ruta + ".tmp.npz"
+        np.savez(tmp, k=self.k, **{nombre: getattr(self, nombre) for nombre in self.ARREGLOS})
+        os.replace(tmp, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as archivo:
+            return cls(*(archivo[nombre] for nombre in cls.ARREGLOS), k=int(archivo["k"]))
+
+    def _corte(self, ptr, distancias, autor_id, k):
+        if k > self.k:
+            raise ValueError(f"El índice sólo guarda hasta {self.k} saltos")
+        inicio, fin = ptr[autor_id], ptr[autor_id + 1]
+        return inicio, inicio + np.searchsorted(distancias[inicio:fin], k, side="right")
+
+    def capas(self, autor_id, k):
+        """Nodos a distancia ≤ k del autor y su distancia (ordenados por capa)"""
+        inicio, fin = self._corte(self.nodos_ptr, self.distancia, autor_id, k)
+        return self.nodos[inicio:fin], self.distancia[inicio:fin]
+
+    def enlaces(self, autor_id, k):
+        """Enlaces (hijo, padre) entre capas consecutivas hasta distancia k"""
+        inicio, fin = self._corte(self.aristas_ptr, self.distancia_hijo, autor_id, k)
+        return self.hijo[inicio:fin], self.padre[inicio:fin]
+
+    def max_distancia(self, autor_id):
+        """Mayor distancia alcanzada (acotada a ``k``); 0 si el autor no tiene colaboraciones"""
+        inicio, fin = self.nodos_ptr[autor_id], self.nodos_ptr[autor_id + 1]
+        return int(self.distancia[fin - 1]) if fin > inicio else 0
+
+
+def cargar_indice(tipos=None, roles=None, version=None, k=K_MAX):
+    """Índice de distancias del grafo de coautoría; se construye una vez por versión de los datos"""
+    version = version or datos.version_datos()
+    clave = colaboracion.clave_variante(tipos, roles)
+    ruta = os.path.join(datos.directorio_version(version), f"erdos_{clave}_k{k}.npz")
+    if os.path.exists(ruta):
+        return IndiceErdos.cargar(ruta)
+    indice = IndiceErdos.desde_grafo(colaboracion.cargar_grafo(tipos, roles, version), k)
+    indice.guardar(ruta)
+    return indice
+
+
+if __name__ == "__main__":
+    # Construcción fuera de línea del índice usado por erdos.py
+    cargar_indice(tipos=datos.TIPOS_PUBLICACION)
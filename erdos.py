@@ -1,54 +1,139 @@
+import os
 import streamlit as st
-import pandas as pd
-import networkx as nx
-import plotly.graph_objects as go
-import plotly.express as px
-import re
+import datos
+import autores
+import colaboracion
+import distancias
+import posiciones
+import vistas
+import metricas
+import compartida
+
+# Definir los tipos de producto permitidos
+TIPOS_PERMITIDOS = datos.TIPOS_PUBLICACION
 
-@st.cache_data
 def load_data():
-    """Carga los datos desde CSV y filtra solo los tipos de producto permitidos"""
-    file_path = "productos_validados.csv"
-    df = pd.read_csv(file_path)
+    return _load_data(datos.version_datos())
 
-    # Definir los tipos de producto permitidos
-    tipos_permitidos = [
-        'Artículo científico', 'Capítulo de libro', 'Libro',
-        'Publicaciones derivadas de eventos colectivos',
-        'Subcapítulo o artículo de libro', 'Informe interno anual de actividades'
-    ]
+@compartida.memoizar
+def _load_data(version):
+    """Carga los datos desde el snapshot y filtra solo los tipos de producto permitidos"""
+    df = datos.cargar_productos()
 
     # Filtrar el DataFrame para incluir solo los productos válidos
-    df = df[df["tipo_producto"].isin(tipos_permitidos)]
+    df = df[df["tipo_producto"].isin(TIPOS_PERMITIDOS)]
 
     return df
 
+def load_autores():
+    return _load_autores(datos.version_datos())
+
+@compartida.memoizar
+def _load_autores(version):
+    """Tabla de autores ya separada (producto → autor, rol, institución)"""
+    return autores.cargar_autores(version)
+
+def load_indice():
+    return _load_indice(datos.version_datos())
+
+@compartida.memoizar
+def _load_indice(version):
+    """Índice precalculado de distancias de Erdős (k ≤ 3) para cada investigador"""
+    return distancias.cargar_indice(tipos=TIPOS_PERMITIDOS, version=version)
+
+def load_productos_autor():
+    return _load_productos_autor(datos.version_datos())
+
+@compartida.memoizar
+def _load_productos_autor(version):
+    """Índice invertido autor → productos y las columnas del snapshot que se muestran por producto.
+
+    ``productos`` conserva todas las filas del snapshot (se indexa por posición);
+    ``permitido`` marca las de los tipos permitidos.
+    """
+    indice = autores.cargar_indice_productos(version)
+    productos = datos.cargar_productos(columnas=["tipo_producto", "titulo"])
+    permitido = productos["tipo_producto"].isin(TIPOS_PERMITIDOS).to_numpy()
+    return indice, productos, permitido
+
+def load_opciones():
+    return _load_opciones(datos.version_datos())
+
+@compartida.memoizar
+def _load_opciones(version):
+    """Autores de correspondencia de productos permitidos (en orden alfabético) y los estudiantes"""
+    return vistas.opciones(version)
+
+def load_metricas():
+    version = datos.version_datos()
+    return _load_metricas(version, os.path.exists(metricas.ruta_metricas(TIPOS_PERMITIDOS, version=version)))
+
+@compartida.memoizar
+def _load_metricas(version, existe):
+    """Métricas por autor (una fila por autor_id) precalculadas por metricas.py; None si faltan"""
+    return metricas.leer_metricas(tipos=TIPOS_PERMITIDOS, version=version)
+
+def load_layout_global():
+    return _load_layout_global(datos.version_datos())
+
+@compartida.memoizar
+def _load_layout_global(version):
+    """Coordenadas de la red completa (float32 por autor_id) para arrancar los layouts ego"""
+    grafo = colaboracion.cargar_grafo(tipos=TIPOS_PERMITIDOS, version=version)
+    return posiciones.layout_global(grafo, "erdos", version)
+
+def load_contexto():
+    return _load_contexto(datos.version_datos())
+
+@compartida.memoizar
+def _load_contexto(version):
+    """Lo necesario para construir la figura de un investigador (si no está en la caché de vistas)"""
+    _, nombres = _load_autores(version)
+    _, estudiantes = _load_opciones(version)
+    return vistas.Contexto(version, nombres, _load_indice(version), _load_layout_global(version), estudiantes)
+
 def erdos_graph():
     df = load_data()
-
-    # Extraer solo los nombres de *Autores de correspondencia sin instituciones y sin separaciones incorrectas
-    def extraer_autores_correspondencia(texto):
-        if isinstance(texto, str):
-            texto_limpio = re.sub(r"\(.*?\)", "", texto)  
-            autores_limpios = [autor.strip().lstrip("*") for autor in texto_limpio.split(";") if autor.strip()]
-            return autores_limpios
-        return []
-
-    df["autores_correspondencia"] = df["*Autor de correspondencia"].apply(extraer_autores_correspondencia)
-
-    # Lista única de autores de correspondencia para la selección
-    autores_correspondencia_unicos = sorted(set(df["autores_correspondencia"].explode().dropna()))
+    _, nombres = load_autores()
+    autores_correspondencia_unicos, _ = load_opciones()
 
     st.subheader("Red de Colaboraciones basada en el Número de Erdős")
 
     # Selección de autor base
     selected_author = st.selectbox("Selecciona un investigador base:", autores_correspondencia_unicos)
+    if selected_author is None:
+        st.info("No hay investigadores de correspondencia en los productos permitidos.")
+        return
+    autor_id = nombres.get_loc(selected_author)
+
+    # Métricas del investigador en la red de publicaciones
+    tabla_metricas = load_metricas()
+    col1, col2, col3, col4 = st.columns(4)
+    if tabla_metricas is None:
+        for col, etiqueta in zip((col1, col2, col3, col4), ("Colaboradores", "Productos compartidos", "Intermediación",
+                                                          "Colaboradores estudiantes")):
+            col.metric(etiqueta, "—")
+        st.info("Las métricas de esta versión de los datos aún no se calculan (python metricas.py).")
+    else:
+        metricas_autor = tabla_metricas.iloc[autor_id]
+        col1.metric("Colaboradores", int(metricas_autor["grado"]))
+        col2.metric("Productos compartidos", int(metricas_autor["grado_ponderado"]))
+        col3.metric("Intermediación", f"{metricas_autor['intermediacion']:.4f}")
+        col4.metric("Colaboradores estudiantes", f"{metricas_autor['proporcion_estudiantes']:.0%}"
+                    if metricas_autor["grado"] else "—")
+        if metricas_autor["grado"]:
+            st.caption(f"Componente {metricas_autor['componente']} · comunidad {metricas_autor['comunidad']}")
 
     # Lista completa de todos los tipos de productos posibles
     all_product_types = df["tipo_producto"].dropna().unique()
 
-    # Filtrar los productos en los que ha participado el autor seleccionado
-    productos_participacion = df[df["autores_correspondencia"].apply(lambda autores: selected_author in autores)]["tipo_producto"]
+    # Productos permitidos en los que el autor seleccionado es de correspondencia (corte del índice invertido)
+    indice_productos, productos, permitido = load_productos_autor()
+    filas, es_correspondencia, asterisco = indice_productos.productos(autor_id)
+    elegidos = permitido[filas] & es_correspondencia
+    # La marca del título es el "*" del autor en la columna de autores, como antes
+    filas_autor, marca = filas[elegidos], asterisco[elegidos]
+    productos_participacion = productos["tipo_producto"].iloc[filas_autor]
 
     # Contar la cantidad de productos por tipo
     productos_count = productos_participacion.value_counts().reindex(all_product_types, fill_value=0).reset_index()
@@ -63,6 +148,7 @@ def erdos_graph():
         #st.dataframe(productos_count)
 
         # Crear la gráfica de barras
+        import plotly.express as px
         fig_bar = px.bar(productos_count, x="Tipo de Producto", y="Cantidad", 
                          title=f"Distribución de Tipos de Producto para {selected_author}",
                          labels={"Cantidad": "Número de Productos", "Tipo de Producto": "Tipo de Producto"},
@@ -72,104 +158,30 @@ def erdos_graph():
         st.plotly_chart(fig_bar, use_container_width=True)
 
     # Filtrar los proyectos en los que ha participado
-    proyectos_participacion = df[df["autores_correspondencia"].apply(lambda autores: selected_author in autores)][["titulo", "Autores | *Autor de correspondencia | ªEstudiante"]].dropna()
+    titulos = productos["titulo"].iloc[filas_autor]
+    proyectos_participacion = titulos[titulos.notna().to_numpy()]
+    marca = marca[titulos.notna().to_numpy()]
 
     # Mostrar lista de proyectos solo si existen
     if not proyectos_participacion.empty:
         st.write(f"Productos en los que ha participado {selected_author}:")
-        for _, row in proyectos_participacion.iterrows():
-            titulo = row["titulo"]
-            autores = row["Autores | *Autor de correspondencia | ªEstudiante"]
-
-            # Verificar si el autor fue "Autor de correspondencia" y agregar * al inicio del título
-            if any(persona.strip().lstrip("*") == selected_author and persona.startswith("*") for persona in autores.split(";")):
-                st.write(f"🔹 *{titulo}")  # Agregar * al inicio del título
-            else:
-                st.write(f"🔹 {titulo}")
-
-    # Extraer todos los nombres de la columna "Autores | *Autor de correspondencia | ªEstudiante"
-    def extraer_todos_autores(texto):
-        autores, estudiantes = [], []
-        if isinstance(texto, str):
-            for persona in texto.split(";"):
-                persona = persona.strip().lstrip("*")
-                if "ª" in persona:
-                    persona = persona.replace("ª", "").strip()
-                    estudiantes.append(persona)
-                else:
-                    autores.append(persona)
-        return autores, estudiantes
-
-    df["autores"], df["estudiantes"] = zip(*df["Autores | *Autor de correspondencia | ªEstudiante"].apply(extraer_todos_autores))
-
-    # Construcción del grafo considerando solo los autores de la columna "Autores | *Autor de correspondencia | ªEstudiante"
-    G = nx.Graph()
-    for _, row in df.iterrows():
-        todos_participantes = row["autores"] + row["estudiantes"]
-        for i in range(len(todos_participantes)):
-            for j in range(i + 1, len(todos_participantes)):
-                G.add_edge(todos_participantes[i], todos_participantes[j])
+        for titulo, es_autor_correspondencia in zip(proyectos_participacion, marca):
+            # Si el autor lleva "*" en la columna de autores se agrega * al inicio del título
+            st.write(f"🔹 {'*' if es_autor_correspondencia else ''}{titulo}")
+
+    # Distancias precalculadas en el grafo de la columna "Autores | *Autor de correspondencia | ªEstudiante"
+    indice = load_indice()
 
     # Cálculo del número de Erdős (máx. 2 niveles)
-    erdos_numbers = nx.single_source_shortest_path_length(G, selected_author) if selected_author in G else {}
-    max_erdos = min(max(erdos_numbers.values(), default=1), 2)
-    erdos_options = list(range(1, max_erdos + 1)) if max_erdos > 0 else []
+    erdos_options = vistas.numeros_erdos(indice, autor_id)
 
     if not erdos_options:
         st.warning("Este investigador no tiene conexiones más allá de sí mismo.")
     else:
         selected_erdos = st.selectbox("Selecciona el número de Erdős (máx. 2):", erdos_options)
 
-        # Filtrar nodos dentro del número de Erdős seleccionado
-        filtered_nodes = {node: distance for node, distance in erdos_numbers.items() if distance <= selected_erdos}
-        G_filtered = nx.Graph()
-
-        # Construcción del grafo con restricciones de conexión
-        for node, level in filtered_nodes.items():
-            if level == 1:
-                G_filtered.add_edge(selected_author, node)
-            elif level > 1:
-                for neighbor in G.neighbors(node):
-                    if neighbor in filtered_nodes and erdos_numbers[neighbor] == level - 1:
-                        G_filtered.add_edge(node, neighbor)
-
-        pos = nx.spring_layout(G_filtered, seed=42)
-
-        edge_x, edge_y, node_x, node_y, node_color, node_text = [], [], [], [], [], []
-        estudiantes_list = set(df["estudiantes"].explode().dropna())
-
-        for edge in G_filtered.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-
-        for node in G_filtered.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            node_text.append(node)
-            if node == selected_author:
-                node_color.append("yellow")
-            elif node in estudiantes_list:
-                node_color.append("red")
-            else:
-                node_color.append("blue")
-
-        fig_graph = go.Figure()
-        fig_graph.add_trace(go.Scatter(x=edge_x, y=edge_y, line=dict(width=1, color='black'), mode='lines'))
-        fig_graph.add_trace(go.Scatter(x=node_x, y=node_y, mode='markers', marker=dict(size=10, color=node_color), text=node_text, hoverinfo='text'))
-
-        # Fondo personalizado y sin ejes
-        fig_graph.update_layout(
-            title="Grafo de Colaboraciones con Número de Erdős",
-            showlegend=False,
-            xaxis=dict(showgrid=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, zeroline=False, visible=False),
-            plot_bgcolor="white", #"#0f1116",
-            paper_bgcolor="white", #"#0f1116",
-            font=dict(color="black")
-        )
+        # Figura generada por ``python vistas.py`` (o la primera vez que alguien la pide)
+        fig_graph = vistas.figura(load_contexto(), autor_id, selected_erdos)
 
         st.plotly_chart(fig_graph, use_container_width=True)
 
@@ -0,0 +1,213 @@
+"""Experimentos de clases desbalanceadas de empleado.py, en paralelo.
+
+Cada estrategia (``under``, ``over``, ``weight``) hace su búsqueda de
+hiperparámetros con ``kt.Hyperband``, entrena el mejor modelo y lo evalúa con
+X_test, en su propio proceso y con su propio directorio del tuner
+(``salida/<estrategia>``), así que las tres corren a la vez. Cada proceso limita
+los hilos de TensorFlow para no competir por los núcleos con los demás.
+
+Con ``trabajadores > 1`` los brackets de Hyperband de una estrategia también se
+reparten: se usa el modo distribuido de keras_tuner, con un proceso ``chief`` que
+lleva el oráculo y ``trabajadores`` procesos que entrenan las pruebas.
+
+Los procesos leen las matrices de promocion.py (mmap, sin copiarlas) en lotes
+remuestreados por índice (muestreo.py). Al final se escribe
+``salida/comparacion.csv`` con una fila por estrategia, y cada estrategia deja en
+su directorio el modelo (``modelo.keras``) y su ``resultado.json``.
+
+Uso: python experimentos.py [employee_promotion.csv] [--estrategias under over weight] [--trabajadores N] [--hilos N]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import promocion
+
+ESTRATEGIAS = ("under", "over", "weight")
+DIR_SALIDA = "salida"
+# Épocas máximas de Hyperband por estrategia (la de weight reusaba el tuner de over en el cuaderno)
+MAX_EPOCAS = {"under": 100, "over": 10, "weight": 10}
+EPOCAS = 20
+SEMILLA = 42
+# Puerto del oráculo de la primera estrategia en el modo distribuido
+PUERTO = 8470
+
+
+def construir_modelo(hp, n_atributos):
+    """Red densa con número de capas, activaciones, unidades y optimizador elegidos por el tuner"""
+    from keras.layers import Dense, Input, LeakyReLU
+    from keras.models import Sequential
+    from keras.optimizers import SGD, Adagrad, Adam
+
+    model = Sequential()
+    model.add(Input(shape=(n_atributos,)))
+
+    for i in range(hp.Int("num_layers", 1, 3)):  # Tune número de capas
+        activation_choice = hp.Choice(f"activation_{i}", ["relu", "selu", "leaky_relu"])
+        units = hp.Int(f'units_{i}', min_value=1, max_value=4, step=1)
+
+        if activation_choice == "leaky_relu":
+            model.add(Dense(units))
+            model.add(LeakyReLU(alpha=0.1))
+        else:
+            model.add(Dense(units, activation=activation_choice))
+
+    model.add(Dense(1, activation='sigmoid', name="predictions"))
+
+    # Hiperparámetros del optimizador
+    lr = hp.Choice('lr', values=[1e-2, 1e-3, 1e-4])
+    hp_optimizers = hp.Choice('optimizer', values=["SGD", "Adam", "Adagrad"])
+
+    optimizers_dict = {
+        "Adam": Adam(learning_rate=lr, clipvalue=1.0),
+        "SGD": SGD(learning_rate=lr, clipvalue=1.0),
+        "Adagrad": Adagrad(learning_rate=lr, clipvalue=1.0)
+    }
+
+    model.compile(
+        optimizer=optimizers_dict[hp_optimizers],
+        loss="binary_crossentropy",
+        metrics=['accuracy']
+    )
+
+    return model
+
+
+def _limitar_hilos(hilos):
+    """Hilos de TensorFlow y de las bibliotecas numéricas; antes de importar TensorFlow"""
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[variable] = str(hilos)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(hilos)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def correr(estrategia, fuente=promocion.FUENTE, hilos=1, rol=None, puerto=None):
+    """Búsqueda, entrenamiento y evaluación de una estrategia (en un proceso propio).
+
+    ``rol`` es None fuera del modo distribuido, ``"chief"`` o ``"tuner<i>"``; sólo
+    el ``chief`` entrena el mejor modelo y regresa el resultado.
+    """
+    if rol is not None:
+        os.environ.update({"KERASTUNER_TUNER_ID": rol, "KERASTUNER_ORACLE_IP": "127.0.0.1",
+                           "KERASTUNER_ORACLE_PORT": str(puerto)})
+    _limitar_hilos(hilos)
+    import keras
+    import keras_tuner as kt
+    from keras.callbacks import EarlyStopping
+
+    import muestreo
+    import puntuacion
+
+    keras.utils.set_random_seed(SEMILLA)
+    inicio = time.perf_counter()
+    X_train, X_test, y_train, y_test = promocion.abrir(promocion.directorio(fuente))
+    # Remuestreo por índices sobre las matrices mapeadas; la validación son las últimas filas de X_train
+    ajuste, validacion = muestreo.particion(len(y_train))
+    entrenamiento = muestreo.LotesBalanceados(X_train, y_train, ajuste, estrategia)
+    validar = muestreo.LotesBalanceados(X_train, y_train, validacion, None if estrategia == "weight" else estrategia,
+                                        fijo=True)
+
+    directorio = os.path.join(DIR_SALIDA, estrategia)
+    tuner = kt.Hyperband(
+        lambda hp: construir_modelo(hp, X_train.shape[1]),
+        objective            = kt.Objective("val_accuracy", "max"),
+        executions_per_trial = 1,
+        max_epochs           = MAX_EPOCAS[estrategia],
+        factor               = 3,
+        seed                 = SEMILLA,
+        directory            = directorio,
+        project_name         = 'tuner',
+        # En modo distribuido ejecutar() ya limpió el directorio; si cada proceso lo
+        # sobrescribiera, uno que arranca tarde borraría el estado del oráculo
+        overwrite            = rol is None
+    )
+    early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+    tuner.search(entrenamiento, validation_data=validar, verbose=0, callbacks=[early_stop])
+    if rol is not None and rol != "chief":
+        return None
+
+    best_hps = tuner.get_best_hyperparameters()[0]
+    mi_mejor_modelo = tuner.hypermodel.build(best_hps)
+    # Como en el cuaderno, el mejor modelo se entrena con X_train sin remuestrear
+    historial = mi_mejor_modelo.fit(muestreo.LotesBalanceados(X_train, y_train, ajuste),
+                                    validation_data=muestreo.LotesBalanceados(X_train, y_train, validacion, fijo=True),
+                                    epochs=EPOCAS, verbose=0)
+    mi_mejor_modelo.save(os.path.join(directorio, "modelo.keras"))
+
+    prueba = muestreo.LotesBalanceados(X_test, y_test, fijo=True, tamano_lote=puntuacion.LOTE)
+    perdida, _ = mi_mejor_modelo.evaluate(prueba, verbose=0)
+    matriz = puntuacion.matrices({estrategia: mi_mejor_modelo}, X_test, y_test)[estrategia][0]
+    resultado = {
+        "estrategia": estrategia,
+        "segundos": round(time.perf_counter() - inicio, 1),
+        "hiperparametros": best_hps.values,
+        "historia": {k: [float(x) for x in v] for k, v in historial.history.items()},
+        "perdida": float(perdida),
+        **puntuacion.metricas(matriz),
+    }
+    with open(os.path.join(directorio, "resultado.json"), "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+    return resultado
+
+
+def ejecutar(estrategias=ESTRATEGIAS, fuente=promocion.FUENTE, trabajadores=1, hilos=None):
+    """Corre las estrategias en paralelo. Regresa los resultados y escribe la tabla de comparación"""
+    # Las matrices se escriben aquí una vez, antes de repartir el trabajo
+    promocion.preparar(fuente)
+    if trabajadores > 1:
+        roles = ["chief"] + [f"tuner{i}" for i in range(trabajadores)]
+    else:
+        roles = [None]
+    for estrategia in estrategias:
+        shutil.rmtree(os.path.join(DIR_SALIDA, estrategia), ignore_errors=True)
+    tareas = [(estrategia, rol, PUERTO + i) for i, estrategia in enumerate(estrategias) for rol in roles]
+    hilos = hilos or max(1, (os.cpu_count() or 1) // len(tareas))
+
+    # spawn: TensorFlow no es seguro tras fork; un proceso por tarea para que cada uno limite sus hilos
+    with ProcessPoolExecutor(max_workers=len(tareas), mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as ejecutor:
+        futuros = [ejecutor.submit(correr, estrategia, fuente, hilos, rol, puerto)
+                   for estrategia, rol, puerto in tareas]
+        resultados = [r for r in (futuro.result() for futuro in futuros) if r is not None]
+
+    comparacion = pd.DataFrame([{k: v for k, v in r.items() if k not in ("historia", "hiperparametros", "matriz")}
+                                | {"matriz": json.dumps(r["matriz"])} for r in resultados])
+    os.makedirs(DIR_SALIDA, exist_ok=True)
+    comparacion.to_csv(os.path.join(DIR_SALIDA, "comparacion.csv"), index=False)
+    return resultados
+
+
+def cargar_resultados(estrategias=ESTRATEGIAS):
+    """Resultados guardados por ``correr``"""
+    resultados = []
+    for estrategia in estrategias:
+        with open(os.path.join(DIR_SALIDA, estrategia, "resultado.json"), encoding="utf-8") as f:
+            resultados.append(json.load(f))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fuente", nargs="?", default=promocion.FUENTE)
+    parser.add_argument("--estrategias", nargs="+", default=list(ESTRATEGIAS), choices=ESTRATEGIAS)
+    parser.add_argument("--trabajadores", type=int, default=1, help="procesos por estrategia para los brackets")
+    parser.add_argument("--hilos", type=int, help="hilos de TensorFlow por proceso")
+    args = parser.parse_args()
+    resultados = ejecutar(args.estrategias, args.fuente, args.trabajadores, args.hilos)
+    for r in resultados:
+        print(f"{r['estrategia']:<8}{r['segundos']:>8.1f} s  exactitud {r['exactitud']:.3f}  "
+              f"precisión {r['precision']:.3f}  exhaustividad {r['exhaustividad']:.3f}  F1 {r['f1']:.3f}")
+    print(f"Comparación en {os.path.join(DIR_SALIDA, 'comparacion.csv')}")
+
+
+if __name__ == "__main__":
+    main()
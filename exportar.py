@@ -0,0 +1,240 @@
+"""Exportación en streaming del grafo de colaboración (Cytoscape.js, NDJSON y vis-network).
+
+Sustituye los volcados completos de los cuadernos (``grafo_cytoscape.json`` con
+sangría y el ``graph.html`` de pyvis). Los elementos se generan uno a uno desde el
+grafo en caché (matriz CSR recorrida por bloques de filas) y se escriben conforme
+se generan, así que la memoria no crece con el tamaño del archivo. Una ruta que
+termina en ``.gz`` se escribe comprimida.
+
+Además de la red completa se pueden escribir fragmentos por coordinación o por red
+ego de cada autor, con un ``indice.json`` para que un visor los cargue bajo demanda.
+
+Uso: python exportar.py [directorio de salida]  (por omisión, ``exportes`` en el directorio de la versión)
+"""
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+
+import datos
+import autores
+import colaboracion
+
+INVESTIGADOR = "investigador"
+ESTUDIANTE = "estudiante"
+COLABORACION = "colaboración"
+ASESORIA = "asesoría"
+# Colores de los nodos en vis-network (como en el graph.html de pyvis)
+COLORES = {INVESTIGADOR: "red", ESTUDIANTE: "blue"}
+# Filas de la matriz de adyacencia que se convierten a aristas a la vez
+FILAS_POR_BLOQUE = 4096
+
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def abrir(ruta):
+    """Archivo de texto UTF-8 para escribir; comprimido con gzip si la ruta termina en .gz"""
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "wt", encoding="utf-8")
+    return open(ruta, "w", encoding="utf-8")
+
+
+def estudiantes(tabla, n):
+    """Máscara por autor_id de los autores que aparecen como estudiantes"""
+    mascara = np.zeros(n, dtype=bool)
+    mascara[autores.estudiantes(tabla)] = True
+    return mascara
+
+
+def elementos(grafo, es_estudiante, nodos=None):
+    """Genera los elementos de Cytoscape.js (``{"group", "data"}``): primero los nodos, luego las aristas.
+
+    ``nodos`` son los autor_id que se incluyen (por omisión todos los del grafo);
+    cada arista aparece una vez, con el número de productos compartidos en ``weight``.
+    """
+    nodos = grafo.ids if nodos is None else np.asarray(nodos)
+    for inicio in range(0, len(nodos), FILAS_POR_BLOQUE):
+        bloque = nodos[inicio:inicio + FILAS_POR_BLOQUE]
+        for autor_id, nombre in zip(bloque.tolist(), grafo.nombres[bloque].tolist()):
+            tipo = ESTUDIANTE if es_estudiante[autor_id] else INVESTIGADOR
+            yield {"group": "nodes", "data": {"id": f"a{autor_id}", "label": nombre, "type": tipo}}
+
+    A = grafo.adyacencia
+    for inicio in range(0, A.shape[0], FILAS_POR_BLOQUE):
+        bloque = A[inicio:inicio + FILAS_POR_BLOQUE].tocoo()
+        arriba = bloque.col > bloque.row + inicio
+        u = grafo.ids[bloque.row[arriba] + inicio]
+        v = grafo.ids[bloque.col[arriba]]
+        for a, b, peso in zip(u.tolist(), v.tolist(), bloque.data[arriba].tolist()):
+            etiqueta = ASESORIA if es_estudiante[a] or es_estudiante[b] else COLABORACION
+            yield {"group": "edges", "data": {"id": f"a{a}-a{b}", "source": f"a{a}", "target": f"a{b}",
+                                              "label": etiqueta, "weight": int(peso)}}
+
+
+def escribir_cytoscape(ruta, elems):
+    """JSON compacto con la forma de grafo_cytoscape.json: ``{"elements": {"nodes": [...], "edges": [...]}}``"""
+    cuenta = {"nodes": 0, "edges": 0}
+    with abrir(ruta) as f:
+        f.write('{"elements":{"nodes":[')
+        grupo = "nodes"
+        for elemento in elems:
+            if elemento["group"] != grupo:
+                f.write('],"edges":[')
+                grupo = "edges"
+            f.write(("," if cuenta[grupo] else "") + _JSON.encode({"data": elemento["data"]}))
+            cuenta[grupo] += 1
+        f.write(']}}' if grupo == "edges" else '],"edges":[]}}')
+    return cuenta
+
+
+def escribir_ndjson(ruta, elems):
+    """Un elemento de Cytoscape.js por línea (se puede leer y agregar al visor por partes)"""
+    cuenta = {"nodes": 0, "edges": 0}
+    with abrir(ruta) as f:
+        for elemento in elems:
+            f.write(_JSON.encode(elemento) + "\n")
+            cuenta[elemento["group"]] += 1
+    return cuenta
+
+
+_HTML_INICIO = """<html>
+<head>
+<meta charset="utf-8">
+<script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+<style>#mynetwork {width: 100%; height: 750px; border: 1px solid lightgray;}</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script type="text/javascript">
+var nodes = new vis.DataSet(), edges = new vis.DataSet();
+var options = {"edges": {"color": {"inherit": true}, "smooth": {"enabled": true, "type": "dynamic"}},
+               "physics": {"enabled": true, "stabilization": {"enabled": true, "fit": true, "iterations": 1000}}};
+var network = new vis.Network(document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, options);
+var colores = __COLORES__;
+function agregar(lineas) {
+  var n = [], e = [];
+  lineas.forEach(function (el) {
+    var d = el.data;
+    if (el.group === "nodes") {
+      n.push({id: d.id, label: d.label, color: colores[d.type], shape: "dot", size: 10});
+    } else {
+      e.push({id: d.id, from: d.source, to: d.target, label: d.label, width: 1});
+    }
+  });
+  nodes.update(n);
+  edges.update(e);
+}
+"""
+
+_HTML_FUENTE = """fetch(__FUENTE__).then(function (r) { return r.text(); }).then(function (texto) {
+  agregar(texto.split("\\n").filter(Boolean).map(JSON.parse));
+});
+"""
+
+_HTML_FIN = """</script>
+</body>
+</html>
+"""
+
+
+def escribir_html(ruta, elems=None, fuente=None, por_bloque=1000):
+    """Página de vis-network con el grafo.
+
+    Con ``elems`` los elementos se escriben dentro de la página en bloques de
+    ``por_bloque``; con ``fuente`` (URL de un NDJSON sin comprimir) la página lo
+    descarga al abrirse y el HTML queda de tamaño fijo.
+    """
+    cuenta = {"nodes": 0, "edges": 0}
+    with abrir(ruta) as f:
+        f.write(_HTML_INICIO.replace("__COLORES__", _JSON.encode(COLORES)))
+        if fuente is not None:
+            f.write(_HTML_FUENTE.replace("__FUENTE__", _JSON.encode(fuente)))
+        bloque = []
+        for elemento in elems or ():
+            bloque.append(_JSON.encode(elemento))
+            cuenta[elemento["group"]] += 1
+            if len(bloque) == por_bloque:
+                f.write("agregar([" + ",".join(bloque) + "]);\n")
+                bloque = []
+        if bloque:
+            f.write("agregar([" + ",".join(bloque) + "]);\n")
+        f.write(_HTML_FIN)
+    return cuenta
+
+
+ESCRITORES = {"ndjson": escribir_ndjson, "json": escribir_cytoscape}
+
+
+def _escribir_fragmentos(directorio, fragmentos, formato, comprimir):
+    escribir = ESCRITORES[formato]
+    indice = []
+    for nombre, archivo, elems in fragmentos:
+        archivo = f"{archivo}.{formato}" + (".gz" if comprimir else "")
+        cuenta = escribir(os.path.join(directorio, archivo), elems)
+        indice.append({"nombre": nombre, "archivo": archivo, "nodos": cuenta["nodes"], "aristas": cuenta["edges"]})
+    with abrir(os.path.join(directorio, "indice.json")) as f:
+        json.dump(indice, f, ensure_ascii=False)
+    return indice
+
+
+def fragmentos_coordinacion(directorio, version=None, formato="ndjson", comprimir=True):
+    """Un archivo por coordinación con la red de los productos de esa coordinación"""
+    version = version or datos.version_datos()
+    tabla, nombres = autores.cargar_autores(version)
+    productos = datos.cargar_productos(columnas=["coordinacion"])
+    es_estudiante = estudiantes(tabla, len(nombres))
+
+    def generar():
+        for i, coordinacion in enumerate(productos["coordinacion"].cat.categories):
+            filas = np.flatnonzero((productos["coordinacion"] == coordinacion).to_numpy())
+            parte = tabla[tabla["fila"].isin(filas)]
+            grafo = colaboracion.CollaborationGraph.desde_tabla(parte, nombres)
+            yield coordinacion, f"coordinacion_{i}", elementos(grafo, es_estudiante, np.unique(parte["autor_id"]))
+
+    return _escribir_fragmentos(os.path.join(directorio, "coordinacion"), generar(), formato, comprimir)
+
+
+def fragmentos_ego(directorio, autor_ids=None, version=None, formato="ndjson", comprimir=True):
+    """Un archivo por autor con su red ego (el autor, sus colaboradores y las aristas entre ellos)"""
+    version = version or datos.version_datos()
+    tabla, nombres = autores.cargar_autores(version)
+    grafo = colaboracion.cargar_grafo(version=version)
+    es_estudiante = estudiantes(tabla, len(nombres))
+    autor_ids = grafo.nodos() if autor_ids is None else np.asarray(autor_ids)
+
+    def generar():
+        for autor_id in autor_ids.tolist():
+            ego = grafo.subgrafo(np.r_[autor_id, grafo.vecinos(autor_id)])
+            yield nombres[autor_id], f"ego_{autor_id}", elementos(ego, es_estudiante)
+
+    return _escribir_fragmentos(os.path.join(directorio, "ego"), generar(), formato, comprimir)
+
+
+def exportar_red(directorio=None, version=None):
+    """Red completa en formato Cytoscape.js y como página de vis-network.
+
+    Se escriben ``grafo_cytoscape.json`` y ``graph.html`` en ``directorio`` (por
+    omisión ``exportes`` en el directorio de la versión), no sobre los archivos de
+    los cuadernos que están en el repositorio: sus nodos usan otros identificadores.
+    """
+    version = version or datos.version_datos()
+    directorio = directorio or os.path.join(datos.directorio_version(version), "exportes")
+    ruta_json, ruta_html = os.path.join(directorio, "grafo_cytoscape.json"), os.path.join(directorio, "graph.html")
+    tabla, nombres = autores.cargar_autores(version)
+    grafo = colaboracion.cargar_grafo(version=version)
+    es_estudiante = estudiantes(tabla, len(nombres))
+    # Sólo los identificadores canónicos (las variantes de nombre no son nodos)
+    nodos = np.unique(tabla["autor_id"])
+    cuenta = escribir_cytoscape(ruta_json, elementos(grafo, es_estudiante, nodos))
+    escribir_html(ruta_html, elementos(grafo, es_estudiante, nodos))
+    return cuenta
+
+
+if __name__ == "__main__":
+    directorio = sys.argv[1] if len(sys.argv) > 1 else os.path.join(datos.directorio_version(), "exportes")
+    exportar_red(directorio)
+    fragmentos_coordinacion(directorio)
+    fragmentos_ego(directorio)
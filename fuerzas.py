@@ -0,0 +1,191 @@
+"""Layout de fuerzas (Fruchterman-Reingold) vectorizado con NumPy para redes grandes.
+
+La repulsión entre todos los pares se aproxima como en Barnes-Hut con una jerarquía
+de rejillas (un quadtree regular): en cada nivel un nodo siente, agregadas en su
+centro de masa, a las celdas hijas de las vecinas de su celda padre que no son
+vecinas de su propia celda (a lo más 27 por nivel). En el nivel más fino la
+repulsión con los nodos de su celda y de las 8 vecinas es exacta. Así cada par de
+nodos se cuenta una sola vez y el costo por iteración es O(n log n). La atracción
+se calcula sobre las aristas de la matriz dispersa.
+"""
+import numpy as np
+from scipy import sparse
+
+SEMILLA = 42
+# Distancia mínima entre nodos (igual que networkx)
+DISTANCIA_MINIMA = 0.01
+# Atracción hacia el centro relativa a la distancia ideal k: evita que las componentes
+# desconectadas se alejen sin límite y encojan al resto al reescalar
+GRAVEDAD = 0.05
+# Nodos promedio por celda en el nivel más fino de la jerarquía
+NODOS_POR_CELDA = 2
+# Pares por bloque al calcular la repulsión exacta de vecindad
+PARES_POR_BLOQUE = 1 << 22
+
+# Desplazamientos de las 6 × 6 celdas hijas de las 3 × 3 vecinas de la celda padre
+_HIJAS = np.stack(np.meshgrid(np.arange(6), np.arange(6), indexing="ij"), axis=-1).reshape(-1, 2)
+_VECINAS = np.stack(np.meshgrid(np.arange(-1, 2), np.arange(-1, 2), indexing="ij"), axis=-1).reshape(-1, 2)
+
+
+def _niveles(n):
+    return int(np.clip(np.ceil(0.5 * np.log2(max(n / NODOS_POR_CELDA, 1))), 2, 10))
+
+
+def _rangos(inicio, largos):
+    """Concatena los rangos [inicio, inicio + largo) sin ciclos de Python"""
+    return np.repeat(inicio - np.cumsum(largos) + largos, largos) + np.arange(largos.sum())
+
+
+def _repulsion(pos, k2):
+    n = len(pos)
+    minimo = pos.min(axis=0)
+    escala = max(np.ptp(pos, axis=0).max(), 1e-9)
+    unitaria = (pos - minimo) / escala
+    pos32 = pos.astype(np.float32)
+    fuerza = np.zeros((n, 2), dtype=np.float32)
+    niveles = _niveles(n)
+
+    for nivel in range(2, niveles + 1):
+        g = 2 ** nivel
+        celda = np.minimum((unitaria * g).astype(np.int64), g - 1)
+        ident = celda[:, 0] * g + celda[:, 1]
+        ocupadas, nodo_ocupada, masa = np.unique(ident, return_inverse=True, return_counts=True)
+        masa = masa.astype(np.float32)
+        cx_masa = np.bincount(nodo_ocupada, pos32[:, 0]).astype(np.float32) / masa
+        cy_masa = np.bincount(nodo_ocupada, pos32[:, 1]).astype(np.float32) / masa
+        posicion = np.full(g * g, -1)
+        posicion[ocupadas] = np.arange(len(ocupadas))
+
+        # Lista de interacción de cada celda ocupada: hijas de las vecinas del padre que no son vecinas suyas
+        ox, oy = ocupadas // g, ocupadas % g
+        cx = (2 * (ox // 2) - 2)[:, None] + _HIJAS[:, 0]
+        cy = (2 * (oy // 2) - 2)[:, None] + _HIJAS[:, 1]
+        valida = ((cx >= 0) & (cx < g) & (cy >= 0) & (cy < g)
+                  & ((np.abs(cx - ox[:, None]) > 1) | (np.abs(cy - oy[:, None]) > 1)))
+        destino = np.where(valida, posicion[np.where(valida, cx * g + cy, 0)], -1)
+        valida = destino >= 0
+        largos = valida.sum(axis=1)
+        destinos = destino[valida]
+        inicio = np.cumsum(largos) - largos
+
+        # Cada nodo interactúa con la lista de su celda
+        l = largos[nodo_ocupada]
+        nodo = np.repeat(np.arange(n), l)
+        otra = destinos[_rangos(inicio[nodo_ocupada], l)]
+        dx = pos32[nodo, 0] - cx_masa[otra]
+        dy = pos32[nodo, 1] - cy_masa[otra]
+        peso = masa[otra] / np.maximum(dx * dx + dy * dy, np.float32(DISTANCIA_MINIMA ** 2))
+        fuerza[:, 0] += np.bincount(nodo, dx * peso, minlength=n)
+        fuerza[:, 1] += np.bincount(nodo, dy * peso, minlength=n)
+
+    fuerza += _repulsion_vecindad(pos32, celda, g)
+    return fuerza.astype(pos.dtype) * k2
+
+
+def _repulsion_vecindad(pos, celda, g):
+    """Repulsión exacta con los nodos de la propia celda y de las 8 vecinas (nivel más fino)"""
+    n = len(pos)
+    ident = celda[:, 0] * g + celda[:, 1]
+    orden = np.argsort(ident, kind="stable")
+    ocupadas, cuenta = np.unique(ident, return_counts=True)
+    inicio = np.cumsum(cuenta) - cuenta
+    posicion = np.full(g * g, -1)
+    posicion[ocupadas] = np.arange(len(ocupadas))
+    fuerza = np.zeros((n, 2), dtype=np.float32)
+
+    for desplazamiento in _VECINAS:
+        vecina = celda + desplazamiento
+        i = np.flatnonzero(((vecina >= 0) & (vecina < g)).all(axis=1))
+        vid = posicion[vecina[i, 0] * g + vecina[i, 1]]
+        i, vid = i[vid >= 0], vid[vid >= 0]
+        largos = cuenta[vid]
+        if not largos.sum():
+            continue
+        # Bloques de nodos con a lo más PARES_POR_BLOQUE pares cada uno
+        acumulado = np.cumsum(largos)
+        cortes = np.searchsorted(acumulado, np.arange(PARES_POR_BLOQUE, acumulado[-1], PARES_POR_BLOQUE))
+        for a, b in zip(np.r_[0, cortes], np.r_[cortes, len(i)]):
+            l = largos[a:b]
+            origen = np.repeat(i[a:b], l)
+            destino = orden[_rangos(inicio[vid[a:b]], l)]
+            distintos = origen != destino
+            origen, destino = origen[distintos], destino[distintos]
+            delta = pos[origen] - pos[destino]
+            peso = 1.0 / np.maximum((delta ** 2).sum(axis=1), np.float32(DISTANCIA_MINIMA ** 2))
+            fuerza[:, 0] += np.bincount(origen, delta[:, 0] * peso, minlength=n)
+            fuerza[:, 1] += np.bincount(origen, delta[:, 1] * peso, minlength=n)
+    return fuerza
+
+
+def _atraccion(pos, u, v, w, k):
+    delta = pos[u] - pos[v]
+    distancia = np.sqrt((delta ** 2).sum(axis=1))
+    f = delta * (w * distancia / k)[:, None]
+    n = len(pos)
+    return -np.stack([np.bincount(u, f[:, d], minlength=n) for d in (0, 1)], axis=1)
+
+
+def _fruchterman_reingold(A, pos, iteraciones, temperatura):
+    """Iteraciones de Fruchterman-Reingold con temperatura que se enfría linealmente"""
+    n = A.shape[0]
+    if n < 2:
+        return pos
+    k = np.sqrt(1.0 / n)
+    coo = A.tocoo()
+    u, v, w = coo.row, coo.col, coo.data.astype(pos.dtype)
+    paso = temperatura / (iteraciones + 1)
+    for _ in range(iteraciones):
+        desplazamiento = _repulsion(pos, k * k) + _atraccion(pos, u, v, w, k)
+        desplazamiento -= GRAVEDAD * (pos - pos.mean(axis=0)) / k
+        largo = np.maximum(np.sqrt((desplazamiento ** 2).sum(axis=1)), DISTANCIA_MINIMA)
+        pos = pos + desplazamiento * (temperatura / largo)[:, None]
+        temperatura -= paso
+    return pos
+
+
+def layout(adyacencia, inicial=None, iteraciones=50, semilla=SEMILLA):
+    """Posiciones (n × 2, float32, centradas y escaladas a [-1, 1]) de un grafo disperso.
+
+    Sin ``inicial`` se arranca de posiciones aleatorias en el cuadro unitario, como
+    ``nx.spring_layout``. Con ``inicial`` (n × 2, NaN para nodos nuevos) sólo se
+    refina a baja temperatura, lo que permite actualizar un layout guardado cuando
+    el grafo crece.
+    """
+    A = sparse.csr_matrix(adyacencia, dtype=np.float64)
+    n = A.shape[0]
+    rng = np.random.default_rng(semilla)
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+
+    if inicial is None:
+        pos = _fruchterman_reingold(A, rng.random((n, 2)), iteraciones, 0.1)
+        return _reescalar(pos)
+
+    pos = np.array(inicial, dtype=np.float64)
+    nuevos = np.isnan(pos).any(axis=1)
+    if nuevos.all():
+        pos = rng.random((n, 2))
+    elif nuevos.any():
+        # Los nodos nuevos arrancan en el promedio de sus vecinos ya ubicados
+        conocidos = (~nuevos).astype(float)
+        suma = A @ (np.nan_to_num(pos) * conocidos[:, None])
+        cuantos = A @ conocidos
+        con_vecinos = nuevos & (cuantos > 0)
+        pos[con_vecinos] = suma[con_vecinos] / cuantos[con_vecinos, None]
+        # Los que no tienen vecinos ubicados caen al azar dentro de la región ocupada
+        sin_vecinos = nuevos & ~con_vecinos
+        minimo, maximo = pos[~nuevos].min(axis=0), pos[~nuevos].max(axis=0)
+        pos[sin_vecinos] = minimo + rng.random((sin_vecinos.sum(), 2)) * (maximo - minimo)
+    # Se regresa a la escala natural de Fruchterman-Reingold (cuadro unitario)
+    pos = (pos - pos.min(axis=0)) / (np.ptp(pos, axis=0).max() or 1.0)
+    pos = _fruchterman_reingold(A, pos, iteraciones, 0.02)
+    return _reescalar(pos)
+
+
+def _reescalar(pos):
+    """Igual que ``nx.rescale_layout``: centra y escala para que el máximo absoluto sea 1"""
+    pos = pos - pos.mean(axis=0)
+    escala = np.abs(pos).max()
+    if escala > 0:
+        pos = pos / escala
+    return pos.astype(np.float32)
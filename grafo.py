@@ -1,49 +1,50 @@
 import streamlit as st
-import pandas as pd
-import networkx as nx
 import plotly.graph_objects as go
-import re
+import datos
+import autores
+import colaboracion
+import posiciones
+import dibujo
+import compartida
 
 # 📌 Configurar la página en modo ancho
 st.set_page_config(layout="wide")
 
 # 📂 Cargar los datos
-@st.cache_data
 def load_data():
-    file_path = "productos_validados.csv"
-    df = pd.read_csv(file_path)
-    return df
+    return _load_data(datos.version_datos())
+
+@compartida.memoizar
+def _load_data(version):
+    return datos.cargar_productos()
 
 df = load_data()
 
-# 📌 Función para extraer nombres sin asteriscos e incluir "*Pendiente"
-def extraer_nombres(autores_str):
-    if not isinstance(autores_str, str):
-        return []
-    
-    nombres = []
-    for autor in autores_str.split(";"):
-        autor = autor.strip()
-        autor = re.sub(r"\(.*$", "", autor).strip()  # Remover institución
-        autor = autor.lstrip("*")  # Quitar asteriscos
-        
-        if autor.lower() == "pendiente":  # Si aparece "Pendiente", incluirlo
-            nombres.append("Pendiente")
+# 📌 Grafo de Colaboraciones entre autores de correspondencia (precalculado)
+# Son los marcados con "*" en la columna de autores o listados en "*Autor de correspondencia",
+# incluidos los estudiantes (ver colaboracion.filtrar_tabla)
+def load_grafo():
+    return _load_grafo(datos.version_datos())
+
+@compartida.memoizar
+def _load_grafo(version):
+    return colaboracion.cargar_grafo(roles=[autores.CORRESPONDENCIA], version=version)
 
-        elif autor:
-            nombres.append(autor)
-    
-    return nombres
+grafo = load_grafo()
 
-df["autores_correspondencia"] = df["*Autor de correspondencia"].apply(extraer_nombres)
+# Nodos, coordenadas y aristas del dibujo completo (se arman una vez por versión de los datos)
+def load_dibujo():
+    return _load_dibujo(datos.version_datos())
 
-# 📌 Crear Grafo de Colaboraciones (Incluir "Pendiente")
-G = nx.Graph()
-for autores in df["autores_correspondencia"]:
-    if len(autores) > 1:
-        for i in range(len(autores)):
-            for j in range(i + 1, len(autores)):
-                G.add_edge(autores[i], autores[j])
+@compartida.memoizar
+def _load_dibujo(version):
+    grafo = _load_grafo(version)
+    G = grafo.a_networkx()
+    # Layout de fuerzas (fuerzas.py) calculado una sola vez por versión de los datos
+    pos = posiciones.como_diccionario(
+        posiciones.layout_global(grafo, "correspondencia", version), grafo.nombres, G.nodes()
+    )
+    return dibujo.desde_networkx(G, pos)
 
 # 📌 Interfaz con Tabs en Streamlit
 tab1, tab2, tab3 = st.tabs(["📊 Gráfico Sankey", "🔗 Grafo de Colaboraciones (Erdős)", "🌐 Grafo Completo de Colaboraciones"])
@@ -51,25 +52,19 @@ tab1, tab2, tab3 = st.tabs(["📊 Gráfico Sankey", "🔗 Grafo de Colaboracione
 with tab3:
     st.subheader("🌐 Grafo Completo de Colaboraciones")
 
-    pos = nx.spring_layout(G, seed=42)
-
-    edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-
-    node_x, node_y, node_text = [], [], []
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
+    # Trazas WebGL armadas con NumPy; la vista agregada agrupa los nodos por región del plano
+    agregado = st.checkbox("Vista agregada por regiones", value=False)
+    nodos, xy, u, v, peso = load_dibujo()
 
     fig_full_graph = go.Figure()
-    fig_full_graph.add_trace(go.Scatter(x=edge_x, y=edge_y, line=dict(width=1, color='#aaa'), hoverinfo='none', mode='lines'))
-    fig_full_graph.add_trace(go.Scatter(x=node_x, y=node_y, mode='markers', marker=dict(size=10, color='blue'), text=node_text, hoverinfo='text'))
+    if agregado:
+        fig_full_graph.add_traces(dibujo.trazas_regiones(xy, u, v, peso, color_aristas='#aaa', color_nodos='blue'))
+    else:
+        fig_full_graph.add_traces(dibujo.trazas_aristas(xy, u, v, peso, color='#aaa', max_aristas=dibujo.MAX_ARISTAS))
+        fig_full_graph.add_trace(dibujo.traza_nodos(xy, nodos, color='blue'))
+        if len(u) > dibujo.MAX_ARISTAS:
+            st.caption(f"Se dibujan {dibujo.MAX_ARISTAS} de {len(u)} colaboraciones (las de mayor peso, al menos "
+                       "una por investigador); la vista agregada las resume todas.")
 
     fig_full_graph.update_layout(
         title="🌐 Grafo Completo de Colaboraciones entre Investigadores",
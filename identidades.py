@@ -0,0 +1,187 @@
+"""Resolución de identidades: variantes de nombre del mismo autor → un identificador canónico.
+
+El mismo investigador aparece con y sin acentos, con guion entre apellidos, en
+mayúsculas o con más o menos iniciales ("Aguirre Sánchez J.", "Aguirre-Sanchez J.",
+"Aguirre Sánchez J.R."). Cada nombre se normaliza (sin acentos ni puntuación, en
+mayúsculas) y se separa en apellidos e iniciales. Sólo se comparan nombres del
+mismo bloque (código fonético del primer apellido + primera inicial), así que el
+número de comparaciones crece casi linealmente; dentro de los bloques la
+similitud de trigramas de los apellidos se calcula para todos los pares a la vez
+con matrices dispersas.
+
+Dos nombres se unen si sus apellidos suenan igual token por token, la
+similitud pasa de ``UMBRAL``, sus iniciales son compatibles (una es prefijo de la
+otra) y nunca aparecen en un mismo producto: dos variantes de una persona no
+firman juntas. El representante de cada grupo es una variante bien escrita
+(mayúsculas y minúsculas, con acentos) y, entre ellas, la que tiene más productos.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Similitud mínima (coseno de trigramas de los apellidos) para unir dos nombres
+UMBRAL = 0.7
+# Partículas de los apellidos compuestos
+PARTICULAS = {"DE", "DEL", "LA", "LAS", "LOS", "Y", "DA", "DI", "DOS", "VAN", "VON"}
+_PARTICULAS_MINUSCULAS = {p.lower() for p in PARTICULAS}
+# Sustituciones fonéticas (en orden) para comparar apellidos por cómo suenan en español
+_FONETICA = [("LL", "Y"), ("QU", "K"), ("CE", "SE"), ("CI", "SI"), ("C", "K"), ("Z", "S"), ("V", "B"),
+             ("W", "U"), ("H", ""), ("GE", "JE"), ("GI", "JI"), ("X", "J"), ("Y", "I")]
+_REPETIDAS = re.compile(r"(.)\1+")
+# Apellido bien escrito: inicial mayúscula y el resto en minúsculas, con las letras del español
+_APELLIDO = re.compile(r"^[A-ZÁÉÍÓÚÜÑ][a-záéíóúüñ']+$")
+_ACENTOS = set("áéíóúüñÁÉÍÓÚÜÑ")
+
+
+def normalizar(nombre):
+    """Mayúsculas sin acentos; guiones a espacios; sólo letras, números, puntos y espacios"""
+    nombre = unicodedata.normalize("NFKD", nombre)
+    nombre = "".join(c for c in nombre if not unicodedata.combining(c)).upper().replace("-", " ")
+    return " ".join(re.sub(r"[^A-Z0-9. ]", "", nombre).split())
+
+
+def fonetica(palabra):
+    """Código fonético de una palabra: sustituciones del español y sin letras repetidas.
+
+    Las vocales se conservan: sin ellas apellidos distintos comparten código
+    ("MORELOS" y "MORALES").
+    """
+    for antes, despues in _FONETICA:
+        palabra = palabra.replace(antes, despues)
+    return _REPETIDAS.sub(r"\1", palabra)
+
+
+def forma(nombre):
+    """Qué tan bien escrito está un nombre, para elegir representante: (apellidos bien escritos, acentos)"""
+    apellidos = [t for t in nombre.replace("-", " ").split() if "." not in t and len(t) > 1]
+    bien = bool(apellidos) and all(_APELLIDO.match(t) or t.lower() in _PARTICULAS_MINUSCULAS for t in apellidos)
+    return int(bien), sum(c in _ACENTOS for c in nombre)
+
+
+def claves(nombres):
+    """Apellidos, iniciales, código fonético y bloque de cada nombre"""
+    filas = []
+    for nombre in nombres:
+        apellidos, iniciales = [], ""
+        for token in normalizar(nombre).split():
+            if "." in token or len(token) == 1:
+                iniciales += "".join(parte[0] for parte in token.split(".") if parte)
+            else:
+                apellidos.append(token)
+        codigos = [fonetica(a) for a in apellidos]
+        principal = next((c for a, c in zip(apellidos, codigos) if a not in PARTICULAS), " ".join(codigos))
+        filas.append((" ".join(apellidos), iniciales, " ".join(codigos), f"{principal}|{iniciales[:1]}"))
+    return pd.DataFrame(filas, columns=["apellidos", "iniciales", "fonetica", "bloque"])
+
+
+def candidatos(bloques):
+    """Pares (i, j), i < j, de nombres del mismo bloque"""
+    grupos = pd.Series(np.arange(len(bloques))).groupby(np.asarray(bloques)).indices.values()
+    pares = [(g[a], g[b]) for g in grupos if len(g) > 1 for a, b in zip(*np.triu_indices(len(g), 1))]
+    if not pares:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    i, j = np.array(pares, dtype=np.int64).T
+    return i, j
+
+
+def _trigramas(textos):
+    """Matriz dispersa (texto × trigrama) con filas de norma 1"""
+    filas, columnas, vocabulario = [], [], {}
+    for fila, texto in enumerate(textos):
+        texto = f" {texto} "
+        for p in range(len(texto) - 2):
+            filas.append(fila)
+            columnas.append(vocabulario.setdefault(texto[p:p + 3], len(vocabulario)))
+    X = sparse.csr_matrix((np.ones(len(filas)), (filas, columnas)), shape=(len(textos), len(vocabulario)))
+    norma = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    return sparse.diags(1 / np.maximum(norma, 1e-12)) @ X
+
+
+def similitud(apellidos, i, j):
+    """Coseno de trigramas de los apellidos para cada par (i, j)"""
+    X = _trigramas(list(apellidos))
+    return np.asarray(X[i].multiply(X[j]).sum(axis=1)).ravel()
+
+
+def _compatibles(a, b):
+    return a.startswith(b) or b.startswith(a)
+
+
+def resolver(nombres, tabla, previo=None):
+    """Identificador canónico de cada nombre (arreglo indexado por autor_id).
+
+    ``tabla`` es la tabla de autores (para saber en qué productos aparece cada
+    nombre). Con ``previo`` (el mapa de una versión anterior, para los primeros
+    ``len(previo)`` nombres) los grupos existentes no cambian: los nombres nuevos
+    sólo se unen a un grupo existente o entre sí.
+    """
+    n = len(nombres)
+    fijos = 0 if previo is None else len(previo)
+    raiz = np.arange(n)
+    if previo is not None:
+        raiz[:fijos] = previo
+
+    def encontrar(x):
+        while raiz[x] != x:
+            raiz[x] = raiz[raiz[x]]
+            x = raiz[x]
+        return x
+
+    info = claves(nombres)
+    i, j = candidatos(info["bloque"])
+    if previo is not None:
+        nuevo = np.maximum(i, j) >= fijos
+        i, j = i[nuevo], j[nuevo]
+    puntaje = similitud(info["apellidos"], i, j)
+    fon, ini = info["fonetica"].to_numpy(), info["iniciales"].to_numpy()
+    unir = (fon[i] == fon[j]) & (puntaje >= UMBRAL)
+    unir &= np.array([_compatibles(a, b) for a, b in zip(ini[i], ini[j])], dtype=bool)
+    orden = np.argsort(-puntaje[unir], kind="stable")
+
+    # Productos e iniciales de cada grupo (la inicial más larga; el grupo es una cadena de prefijos)
+    productos = {}
+    for autor_id, filas in tabla.groupby("autor_id")["fila"]:
+        productos.setdefault(encontrar(autor_id), set()).update(filas.tolist())
+    iniciales = {}
+    for x in range(n):
+        r = encontrar(x)
+        if len(ini[x]) > len(iniciales.get(r, "")):
+            iniciales[r] = ini[x]
+
+    for a, b in zip(i[unir][orden].tolist(), j[unir][orden].tolist()):
+        ra, rb = encontrar(a), encontrar(b)
+        if ra == rb or (ra < fijos and rb < fijos):
+            continue
+        if productos.get(ra, set()) & productos.get(rb, set()):
+            continue
+        if not _compatibles(iniciales.get(ra, ""), iniciales.get(rb, "")):
+            continue
+        # Un grupo existente conserva su identificador
+        if rb < fijos:
+            ra, rb = rb, ra
+        raiz[rb] = ra
+        productos[ra] = productos.get(ra, set()) | productos.pop(rb, set())
+        iniciales[ra] = max(iniciales.get(ra, ""), iniciales.pop(rb, ""), key=len)
+
+    grupo = np.array([encontrar(x) for x in range(n)])
+    # Representante de los grupos nuevos: la variante mejor escrita y, a igual forma, la de más
+    # productos (a igualdad, el menor autor_id)
+    cuenta = np.bincount(tabla["autor_id"].to_numpy(), minlength=n)
+    bien, acentos = np.array([forma(nombre) for nombre in nombres], dtype=np.int64).reshape(-1, 2).T
+    orden = np.lexsort((np.arange(n), -cuenta, -acentos, -bien, grupo))
+    primero = np.r_[True, grupo[orden][1:] != grupo[orden][:-1]]
+    representante = pd.Series(orden[primero], index=grupo[orden][primero])
+    canonico = representante.reindex(grupo).to_numpy().copy()
+    if previo is not None:
+        # Los grupos existentes mantienen su representante
+        existente = grupo < fijos
+        canonico[existente] = grupo[existente]
+    return canonico.astype(np.int32)
+
+
+def aplicar(tabla, canonico):
+    """Tabla de autores con cada autor_id sustituido por su identificador canónico"""
+    return tabla.assign(autor_id=canonico[tabla["autor_id"].to_numpy()])
@@ -0,0 +1,121 @@
+"""Ingesta incremental de exportaciones de productos validados.
+
+Una exportación (CSV o Excel con la hoja de productos validados) se compara por
+``id_producto`` con el snapshot: sólo las filas nuevas o cambiadas se aplican
+(``datos.ingerir``). Los artefactos ya construidos de la versión anterior de los
+datos se actualizan con esas filas en lugar de reconstruirse:
+
+- tabla de autores: se vuelven a separar sólo los productos que cambiaron, los
+  autores nuevos se agregan al final del vocabulario y se resuelven contra las
+  identidades existentes (el índice autor → productos se regenera desde la tabla);
+- grafos de colaboración: se restan y suman las coautorías de esos productos;
+- índices de distancias: sólo se recalculan los orígenes cercanos a las aristas
+  que aparecieron o desaparecieron;
+- métricas por investigador: se recalculan (dependen de todo el grafo); las de
+  las variantes que muestran las apps se calculan siempre, porque las apps sólo
+  las leen;
+- cubo del Sankey: se restan y suman los conteos de esos productos;
+- tendencias por año: se reconstruyen (es una agregación barata de los productos).
+
+Los artefactos que no existían (y los layouts) se construyen cuando se pidan.
+
+Uso: python ingesta.py exportacion.xlsx [hoja]
+"""
+import os
+import sys
+
+import numpy as np
+
+import datos
+import autores
+import colaboracion
+import cubo
+import distancias
+import metricas
+import tendencias
+
+
+def _actualizar_grafos(anterior, version, previos, actuales, cambio, productos):
+    (tabla_previa, nombres_previos), (tabla, nombres) = previos, actuales
+    filas = np.r_[cambio["cambiadas"], cambio["nuevas"]]
+    quitar_base = tabla_previa[tabla_previa["fila"].isin(cambio["cambiadas"])]
+    agregar_base = tabla[tabla["fila"].isin(filas)]
+    for tipos, roles in colaboracion.variantes(anterior):
+        clave = colaboracion.clave_variante(tipos, roles)
+        ruta = os.path.join(datos.directorio_version(anterior), f"grafo_{clave}.npz")
+        previo = colaboracion.CollaborationGraph.cargar(ruta, nombres_previos)
+        quitar = colaboracion.filtrar_tabla(quitar_base, tipos, roles, cambio["previas"]["tipo_producto"])
+        agregar = colaboracion.filtrar_tabla(agregar_base, tipos, roles, productos["tipo_producto"])
+        grafo = previo.actualizar(quitar, agregar, nombres)
+        colaboracion.guardar_variante(grafo, tipos, roles, version)
+        yield f"grafo {clave}: {grafo.adyacencia.nnz // 2} aristas"
+
+        for archivo in sorted(os.listdir(datos.directorio_version(anterior))):
+            if archivo.startswith(f"erdos_{clave}_k") and archivo.endswith(".npz"):
+                indice, recalculados = distancias.IndiceErdos.cargar(
+                    os.path.join(datos.directorio_version(anterior), archivo)
+                ).actualizar(previo, grafo)
+                indice.guardar(os.path.join(datos.directorio_version(version), archivo))
+                yield f"{archivo}: {len(recalculados)} de {len(nombres)} orígenes recalculados"
+
+        if os.path.exists(metricas.ruta_metricas(tipos, roles, anterior)):
+            # Las métricas son globales (intermediación, comunidades): se recalculan con el grafo nuevo
+            metricas.cargar_metricas(tipos, roles, version)
+            yield f"metricas_{clave}: recalculadas"
+
+
+def _actualizar_cubo(anterior, version, cambio, productos):
+    filas = np.r_[cambio["cambiadas"], cambio["nuevas"]]
+    coordinaciones = productos["coordinacion"].unique()
+    previas = set(productos["coordinacion"].drop(filas)) | set(cambio["previas"]["coordinacion"])
+    if previas != set(coordinaciones):
+        # Cambió qué instituciones cuentan como CIAD: la bandera CA de todas las filas puede cambiar
+        cubo.guardar_cubo(cubo.construir_cubo(productos), version)
+        return "cubo: reconstruido (cambiaron las coordinaciones)"
+    nuevo = cubo.actualizar_cubo(cubo.cargar_cubo(anterior), cambio["previas"], productos.iloc[filas], coordinaciones)
+    cubo.guardar_cubo(nuevo, version)
+    return f"cubo: {len(nuevo)} celdas"
+
+
+def ingerir(ruta, hoja=datos.HOJA_INV):
+    """Aplica una exportación y actualiza los artefactos de la versión anterior. Regresa la versión vigente"""
+    cambio = datos.ingerir(ruta, hoja)
+    if cambio is None:
+        print("Sin cambios")
+        return datos.version_datos()
+    anterior, version = cambio["anterior"], cambio["version"]
+    print(f"{len(cambio['cambiadas'])} productos cambiados y {len(cambio['nuevas'])} nuevos: "
+          f"versión {anterior} → {version}")
+    origen = datos.directorio_version(anterior)
+    productos = datos.cargar_productos()
+
+    if os.path.exists(os.path.join(origen, "autores.parquet")):
+        tabla_previa, nombres_previos = autores.cargar_autores(anterior)
+        tabla, nombres, canonico = autores.actualizar_tabla(
+            tabla_previa, nombres_previos, autores.cargar_identidades(anterior),
+            productos, np.r_[cambio["cambiadas"], cambio["nuevas"]]
+        )
+        autores.guardar_autores(tabla, nombres, canonico, version)
+        print(f"autores: {len(nombres) - len(nombres_previos)} nombres nuevos")
+        if os.path.exists(os.path.join(origen, "productos_autor.npz")):
+            # El índice autor → productos es un ordenamiento de la tabla: se vuelve a generar
+            indice = autores.IndiceProductos.desde_tabla(tabla, len(nombres))
+            indice.guardar(os.path.join(datos.directorio_version(version), "productos_autor.npz"))
+        previos, actuales = (tabla_previa, nombres_previos), (tabla, nombres)
+        for mensaje in _actualizar_grafos(anterior, version, previos, actuales, cambio, productos):
+            print(mensaje)
+
+    for tipos in metricas.VARIANTES_APPS:
+        # Las apps no calculan métricas: la versión nueva siempre las lleva (no hace nada si ya se actualizaron)
+        metricas.cargar_metricas(tipos=tipos, version=version)
+    if os.path.exists(os.path.join(origen, "cubo_sankey.parquet")):
+        print(_actualizar_cubo(anterior, version, cambio, productos))
+    if os.path.exists(os.path.join(origen, "tendencias.parquet")):
+        tabla_tendencias = tendencias.construir_tendencias(productos)
+        tendencias.guardar_tendencias(tabla_tendencias, version)
+        print(f"tendencias: {len(tabla_tendencias)} filas")
+    return version
+
+
+if __name__ == "__main__":
+    ingerir(*sys.argv[1:3])
@@ -0,0 +1,183 @@
+"""Lectura en streaming de hojas de Excel a Parquet.
+
+``pd.read_excel`` carga el libro completo en memoria antes de armar el DataFrame.
+Aquí la hoja se recorre fila por fila con openpyxl en modo de sólo lectura y se
+convierte en bloques de ``FILAS_POR_BLOQUE`` filas a columnas tipadas de Arrow, que
+se escriben conforme se leen. La memoria queda acotada por el tamaño del bloque
+(más la tabla de cadenas compartidas del libro, que openpyxl siempre carga).
+
+Como el tipo de una columna sólo se conoce al terminar la hoja, cada bloque se
+escribe primero con sus propios tipos; al final se unifican (entero → real →
+texto) y los bloques se reescriben en un solo Parquet. Las columnas categóricas
+se guardan como diccionario con las categorías en orden alfabético, igual que
+``datos.tipar``.
+
+Varias hojas o archivos se convierten en paralelo, un proceso por hoja.
+
+Uso: python lector_excel.py archivo.xlsx[:hoja] [...]
+"""
+import datetime
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Filas de la hoja que se convierten y escriben a la vez
+FILAS_POR_BLOQUE = 10000
+# Textos que ``pd.read_excel`` toma como valor faltante (sus ``na_values`` por omisión)
+FALTANTES = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+             "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+# Orden de promoción cuando una columna cambia de tipo entre bloques
+_PROMOCION = [pa.null(), pa.int64(), pa.float64(), pa.string()]
+
+
+def _columna(valores):
+    """Arreglo de Arrow con el tipo más estrecho que admite todos los valores del bloque"""
+    valores = [None if isinstance(v, str) and v in FALTANTES else v for v in valores]
+    tipos = {type(v) for v in valores if v is not None}
+    if not tipos:
+        return pa.nulls(len(valores))
+    if tipos == {bool}:
+        return pa.array(valores, type=pa.bool_())
+    if tipos == {int}:
+        return pa.array(valores, type=pa.int64())
+    if tipos <= {int, float}:
+        return pa.array(valores, type=pa.float64())
+    if tipos <= {datetime.datetime, datetime.date}:
+        return pa.array(valores, type=pa.timestamp("us"))
+    # Columna mixta (p.ej. ISBN o factor de impacto escritos a veces como número): texto
+    return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+def _unificar(tipos):
+    tipos = set(tipos) - {pa.null()}
+    if not tipos:
+        return pa.null()
+    if len(tipos) == 1:
+        return tipos.pop()
+    if tipos <= set(_PROMOCION):
+        return max(tipos, key=_PROMOCION.index)
+    return pa.string()
+
+
+def bloques(ruta, hoja=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera la hoja como tablas de Arrow de a lo más ``filas_por_bloque`` filas.
+
+    ``hoja`` es el nombre de la hoja (por omisión la primera). Como ``pd.read_excel``
+    la primera fila es el encabezado; se omiten las columnas sin encabezado y las
+    filas vacías.
+    """
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = (libro[hoja] if hoja is not None else libro.worksheets[0]).iter_rows(values_only=True)
+        encabezado = next(filas, ())
+        columnas = [i for i, nombre in enumerate(encabezado) if nombre is not None]
+        nombres = [str(encabezado[i]) for i in columnas]
+        bloque, generados = [], 0
+        for fila in filas:
+            if any(v is not None for v in fila):
+                bloque.append(fila)
+            if len(bloque) == filas_por_bloque:
+                yield _tabla(nombres, columnas, bloque)
+                bloque, generados = [], generados + 1
+        if bloque or not generados:
+            yield _tabla(nombres, columnas, bloque)
+    finally:
+        libro.close()
+
+
+def _tabla(nombres, columnas, filas):
+    arreglos = [_columna([fila[i] if i < len(fila) else None for fila in filas]) for i in columnas]
+    return pa.table(arreglos, names=nombres)
+
+
+def convertir(ruta, destino, hoja=None, categoricas=(), filas_por_bloque=FILAS_POR_BLOQUE):
+    """Convierte una hoja de Excel a un archivo Parquet sin cargarla completa. Regresa el número de filas"""
+    partes = destino + ".partes"
+    shutil.rmtree(partes, ignore_errors=True)
+    os.makedirs(partes)
+    try:
+        esquemas, valores = [], {}
+        for i, tabla in enumerate(bloques(ruta, hoja, filas_por_bloque)):
+            pq.write_table(tabla, os.path.join(partes, f"{i:06d}.parquet"))
+            esquemas.append(tabla.schema)
+            for col in categoricas:
+                if col in tabla.column_names:
+                    valores.setdefault(col, set()).update(
+                        v for v in pc.unique(tabla[col].cast(pa.string())).to_pylist() if v is not None
+                    )
+
+        # Esquema final: tipos unificados entre bloques y categóricas como diccionario ordenado
+        campos, diccionarios = [], {}
+        for nombre in esquemas[0].names:
+            tipo = _unificar(esquema.field(nombre).type for esquema in esquemas)
+            if nombre in valores:
+                diccionarios[nombre] = pa.array(sorted(valores[nombre]), type=pa.string())
+                tipo = pa.dictionary(pa.int32(), pa.string())
+            campos.append(pa.field(nombre, tipo))
+        esquema = pa.schema(campos)
+
+        filas = 0
+        with pq.ParquetWriter(destino + ".tmp", esquema) as escritor:
+            for i in range(len(esquemas)):
+                tabla = pq.read_table(os.path.join(partes, f"{i:06d}.parquet"))
+                columnas = []
+                for campo in esquema:
+                    columna = tabla[campo.name].combine_chunks()
+                    if campo.name in diccionarios:
+                        texto = columna.cast(pa.string())
+                        indices = pc.index_in(texto, value_set=diccionarios[campo.name]).cast(pa.int32())
+                        columna = pa.DictionaryArray.from_arrays(indices, diccionarios[campo.name])
+                    else:
+                        columna = columna.cast(campo.type)
+                    columnas.append(columna)
+                escritor.write_table(pa.table(columnas, schema=esquema))
+                filas += tabla.num_rows
+        os.replace(destino + ".tmp", destino)
+        return filas
+    finally:
+        shutil.rmtree(partes, ignore_errors=True)
+
+
+def _convertir(trabajo):
+    ruta, hoja, destino, categoricas = trabajo
+    return destino, convertir(ruta, destino, hoja, categoricas)
+
+
+def convertir_varias(trabajos, procesos=None):
+    """Convierte en paralelo varias hojas ``(ruta, hoja, destino, categoricas)``; un proceso por hoja"""
+    trabajos = list(trabajos)
+    if len(trabajos) == 1:
+        return [_convertir(trabajos[0])]
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        return list(ejecutor.map(_convertir, trabajos))
+
+
+def hojas(ruta):
+    """Nombres de las hojas de un libro (sin leer su contenido)"""
+    libro = openpyxl.load_workbook(ruta, read_only=True)
+    try:
+        return libro.sheetnames
+    finally:
+        libro.close()
+
+
+if __name__ == "__main__":
+    import datos
+
+    directorio = os.path.join(datos.DIR_CACHE, "excel")
+    os.makedirs(directorio, exist_ok=True)
+    trabajos = []
+    for argumento in sys.argv[1:]:
+        ruta, hoja = (argumento, None) if os.path.exists(argumento) else argumento.rsplit(":", 1)
+        base = os.path.splitext(os.path.basename(ruta))[0]
+        for nombre in [hoja] if hoja else hojas(ruta):
+            destino = os.path.join(directorio, f"{base} - {nombre}.parquet")
+            trabajos.append((ruta, nombre, destino, datos.COLUMNAS_CATEGORICAS))
+    for destino, filas in convertir_varias(trabajos):
+        print(f"{destino}: {filas} filas")
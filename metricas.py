@@ -0,0 +1,204 @@
+"""Métricas por investigador del grafo de colaboración, calculadas fuera de línea.
+
+Para cada autor: grado, grado ponderado (productos compartidos), intermediación
+aproximada, componente conexa, comunidad y proporción de colaboradores que son
+estudiantes. Las apps sólo leen la tabla guardada en el directorio de la versión
+de los datos (``leer_metricas``); la generan ``python metricas.py`` o la ingesta.
+
+- La intermediación se estima con el algoritmo de Brandes desde ``MUESTRAS``
+  orígenes al azar (todos si el grafo es más chico), normalizada como en networkx.
+  Los orígenes se procesan en lotes de ``POR_LOTE`` a la vez: los BFS del lote
+  avanzan capa por capa con productos matriz dispersa × matriz densa, y los lotes
+  se reparten en un pool de procesos.
+- Las comunidades se obtienen por propagación de etiquetas ponderada, en orden
+  aleatorio por grupos de nodos (cada grupo es un producto disperso).
+- Componentes y comunidades se numeran por tamaño (0 es la más grande); los
+  autores sin colaboraciones tienen -1.
+
+La tabla tiene una fila por nombre (``autor_id``); las variantes de un mismo autor
+repiten las métricas de su identificador canónico.
+
+Uso: python metricas.py [procesos]
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+import datos
+import autores
+import colaboracion
+
+# Tipos de producto de las variantes que muestran dashboard.py (red completa) y erdos.py (publicaciones)
+VARIANTES_APPS = (None, datos.TIPOS_PUBLICACION)
+# Orígenes muestreados para estimar la intermediación
+MUESTRAS = 512
+# Orígenes cuyos BFS avanzan juntos (columnas de las matrices densas)
+POR_LOTE = 64
+# Rondas máximas de la propagación de etiquetas y grupos de nodos por ronda
+ITERACIONES = 50
+GRUPOS = 8
+SEMILLA = 0
+
+_MATRIZ = None
+
+
+def _iniciar(matriz):
+    global _MATRIZ
+    _MATRIZ = matriz
+
+
+def _intermediacion_lote(fuentes):
+    """Dependencias de Brandes acumuladas de un lote de orígenes (BFS simultáneos)"""
+    A = _MATRIZ
+    n, b = A.shape[0], len(fuentes)
+    columnas = np.arange(b)
+    distancia = np.full((n, b), -1, dtype=np.int32)
+    caminos = np.zeros((n, b))
+    distancia[fuentes, columnas] = 0
+    caminos[fuentes, columnas] = 1
+
+    # Hacia adelante: número de caminos más cortos desde cada origen, capa por capa
+    nivel = 0
+    while True:
+        llegan = A @ np.where(distancia == nivel, caminos, 0)
+        nuevos = (llegan > 0) & (distancia < 0)
+        if not nuevos.any():
+            break
+        nivel += 1
+        distancia[nuevos] = nivel
+        caminos[nuevos] = llegan[nuevos]
+
+    # Hacia atrás: dependencia de cada origen en cada nodo
+    dependencia = np.zeros((n, b))
+    for d in range(nivel, 0, -1):
+        coeficiente = np.where(distancia == d, (1 + dependencia) / np.maximum(caminos, 1), 0)
+        previos = distancia == d - 1
+        dependencia[previos] += (caminos * (A @ coeficiente))[previos]
+    dependencia[fuentes, columnas] = 0
+    return dependencia.sum(axis=1)
+
+
+def intermediacion(adyacencia, muestras=MUESTRAS, procesos=None, semilla=SEMILLA):
+    """Intermediación normalizada (caminos por número de saltos) estimada con ``muestras`` orígenes"""
+    A = sparse.csr_matrix((adyacencia != 0).astype(np.float64))
+    activos = np.flatnonzero(np.diff(A.indptr))
+    n = len(activos)
+    if n < 3:
+        return np.zeros(A.shape[0])
+    rng = np.random.default_rng(semilla)
+    fuentes = activos if n <= muestras else np.sort(rng.choice(activos, muestras, replace=False))
+    lotes = [fuentes[i:i + POR_LOTE] for i in range(0, len(fuentes), POR_LOTE)]
+    if procesos == 1 or len(lotes) == 1:
+        _iniciar(A)
+        total = sum(map(_intermediacion_lote, lotes))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar, initargs=(A,)) as ejecutor:
+            total = sum(ejecutor.map(_intermediacion_lote, lotes))
+    # Igual que networkx (normalized=True, k=muestras) en un grafo no dirigido
+    return total * (n / len(fuentes)) / ((n - 1) * (n - 2))
+
+
+def comunidades(adyacencia, semilla=SEMILLA, iteraciones=ITERACIONES, grupos=GRUPOS):
+    """Etiqueta de comunidad de cada nodo por propagación de etiquetas ponderada.
+
+    En cada ronda los nodos se recorren en orden aleatorio por grupos; cada nodo
+    toma la etiqueta con más peso entre sus vecinos (conserva la suya en un empate).
+    """
+    A = sparse.csr_matrix(adyacencia, dtype=np.float64)
+    n = A.shape[0]
+    etiqueta = np.arange(n)
+    activos = np.flatnonzero(np.diff(A.indptr))
+    rng = np.random.default_rng(semilla)
+    for _ in range(iteraciones):
+        cambios = 0
+        for grupo in np.array_split(rng.permutation(activos), grupos):
+            if not len(grupo):
+                continue
+            pertenencia = sparse.csr_matrix((np.ones(n), (np.arange(n), etiqueta)), shape=(n, n))
+            peso = A[grupo] @ pertenencia
+            # La etiqueta actual gana los empates
+            peso = peso + sparse.csr_matrix((np.full(len(grupo), 1e-6), (np.arange(len(grupo)), etiqueta[grupo])),
+                                            shape=peso.shape)
+            nueva = np.asarray(peso.argmax(axis=1)).ravel()
+            cambios += int(np.count_nonzero(nueva != etiqueta[grupo]))
+            etiqueta[grupo] = nueva
+        if not cambios:
+            break
+    return etiqueta
+
+
+def _por_tamano(etiqueta, activo):
+    """Renumera las etiquetas por tamaño (0 la más grande, a igualdad la de menor etiqueta); -1 fuera de ``activo``"""
+    valores, inversa, cuenta = np.unique(etiqueta[activo], return_inverse=True, return_counts=True)
+    rango = np.empty(len(valores), dtype=np.int32)
+    rango[np.lexsort((valores, -cuenta))] = np.arange(len(valores))
+    resultado = np.full(len(etiqueta), -1, dtype=np.int32)
+    resultado[activo] = rango[inversa]
+    return resultado
+
+
+def calcular_metricas(grafo, tabla, canonico, muestras=MUESTRAS, procesos=None, semilla=SEMILLA):
+    """Tabla de métricas (una fila por ``autor_id`` de ``grafo.nombres``) de un grafo completo"""
+    A = grafo.adyacencia
+    grado = grafo.grado()
+    activo = grado > 0
+    es_estudiante = np.zeros(A.shape[0], dtype=bool)
+    es_estudiante[autores.estudiantes(tabla)] = True
+    con_estudiantes = (A != 0).astype(np.int32) @ es_estudiante.astype(np.int32)
+
+    _, componente = csgraph.connected_components(A, directed=False)
+    metricas = pd.DataFrame({
+        "grado": grado.astype(np.int32),
+        "grado_ponderado": grafo.grado(ponderado=True).astype(np.int32),
+        "intermediacion": intermediacion(A, muestras, procesos, semilla),
+        "componente": _por_tamano(componente, activo),
+        "comunidad": _por_tamano(comunidades(A, semilla), activo),
+        "proporcion_estudiantes": np.where(activo, con_estudiantes / np.maximum(grado, 1), np.nan),
+    })
+    # Cada nombre con las métricas de su identificador canónico
+    metricas = metricas.iloc[canonico].reset_index(drop=True)
+    metricas.insert(0, "autor_id", np.arange(len(canonico), dtype=np.int32))
+    metricas.insert(1, "nombre", grafo.nombres.to_numpy())
+    metricas.insert(2, "canonico", canonico.astype(np.int32))
+    return metricas
+
+
+def ruta_metricas(tipos=None, roles=None, version=None):
+    version = version or datos.version_datos()
+    return os.path.join(datos.directorio_version(version), f"metricas_{colaboracion.clave_variante(tipos, roles)}.parquet")
+
+
+def leer_metricas(tipos=None, roles=None, version=None):
+    """Métricas guardadas de una variante, o None si todavía no se calculan (nunca las calcula)"""
+    ruta = ruta_metricas(tipos, roles, version)
+    return pd.read_parquet(ruta) if os.path.exists(ruta) else None
+
+
+def cargar_metricas(tipos=None, roles=None, version=None, procesos=None):
+    """Métricas del grafo de coautoría de una versión de los datos; se calculan una vez y se guardan en disco"""
+    version = version or datos.version_datos()
+    ruta = ruta_metricas(tipos, roles, version)
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    tabla, _ = autores.cargar_autores(version)
+    tipo_producto = datos.cargar_productos(columnas=["tipo_producto"])["tipo_producto"] if tipos is not None else None
+    tabla = colaboracion.filtrar_tabla(tabla, tipos, roles, tipo_producto)
+    metricas = calcular_metricas(
+        colaboracion.cargar_grafo(tipos, roles, version), tabla, autores.cargar_identidades(version), procesos=procesos
+    )
+    metricas.to_parquet(ruta + ".tmp", index=False)
+    os.replace(ruta + ".tmp", ruta)
+    return metricas
+
+
+if __name__ == "__main__":
+    procesos = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    for tipos in VARIANTES_APPS:
+        metricas = cargar_metricas(tipos=tipos, procesos=procesos)
+        print(f"{'todos' if tipos is None else 'publicaciones'}: {len(metricas)} autores, "
+              f"{metricas['componente'].max() + 1} componentes, {metricas['comunidad'].max() + 1} comunidades")
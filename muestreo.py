@@ -0,0 +1,100 @@
+"""Lotes de entrenamiento balanceados sobre las matrices mapeadas de promocion.py.
+
+``RandomUnderSampler`` y ``RandomOverSampler`` materializan una copia remuestreada
+de X_train. Aquí el remuestreo es de índices: en cada época se eligen las filas
+(``under``: todas las de la clase minoritaria y otras tantas de la mayoritaria;
+``over``: todas las de la mayoritaria y la minoritaria repetida hasta igualarla;
+``weight``: todas, con pesos de clase balanceados) y cada lote lee del ``.npy``
+mapeado sólo sus filas. La memoria depende del tamaño del lote y de los índices,
+no del tamaño de X_train.
+
+``LotesBalanceados`` es un ``keras.utils.PyDataset``, así que sirve tanto para
+``tuner.search`` como para ``fit``; la validación se separa también por índices
+(las últimas filas, como ``validation_split``). La clase se arma al pedirla por
+primera vez, así que importar el módulo (para ``particion`` o ``indices_epoca``)
+no importa keras.
+"""
+import functools
+import math
+
+import numpy as np
+
+# Igual que el batch_size por omisión de fit
+TAMANO_LOTE = 32
+VALIDACION = 0.2
+SEMILLA = 42
+
+
+def particion(n, validacion=VALIDACION):
+    """Posiciones de ajuste y de validación (las últimas ``validacion`` filas, como ``validation_split``)"""
+    corte = int(n * (1 - validacion))
+    return np.arange(corte), np.arange(corte, n)
+
+
+def pesos_clase(y, indices):
+    """Pesos balanceados de cada clase (``n / (clases × n_clase)``, como ``compute_class_weight``)"""
+    cuenta = np.bincount(np.asarray(y[indices], dtype=np.int64), minlength=2)
+    return len(indices) / (len(cuenta) * np.maximum(cuenta, 1))
+
+
+def indices_epoca(y, indices, estrategia, rng):
+    """Filas de una época: remuestreo de ``indices`` por clase según la estrategia, en orden aleatorio"""
+    if estrategia in ("under", "over"):
+        clase = np.asarray(y[indices])
+        por_clase = [indices[clase == c] for c in (0, 1)]
+        n = min(map(len, por_clase)) if estrategia == "under" else max(map(len, por_clase))
+        indices = np.concatenate([
+            p if len(p) == n else rng.choice(p, n, replace=estrategia == "over") for p in por_clase
+        ])
+    return rng.permutation(indices)
+
+
+@functools.cache
+def _lotes_balanceados():
+    """Clase ``LotesBalanceados``; keras se importa aquí y no al importar el módulo"""
+    import keras
+
+    class LotesBalanceados(keras.utils.PyDataset):
+        """Lotes ``(X, y)`` (o ``(X, y, peso)`` con ``weight``) leídos por índice de matrices en memoria o mapeadas.
+
+        Con ``fijo`` las filas se eligen una vez (para validación o evaluación; sin
+        estrategia, en orden) en lugar de remuestrearse en cada época.
+        """
+
+        def __init__(self, X, y, indices=None, estrategia=None, tamano_lote=TAMANO_LOTE, fijo=False, semilla=SEMILLA,
+                     **kwargs):
+            super().__init__(**kwargs)
+            self.X, self.y = X, y
+            self.indices = np.arange(len(y)) if indices is None else np.asarray(indices)
+            self.estrategia, self.tamano_lote, self.fijo = estrategia, tamano_lote, fijo
+            self.rng = np.random.default_rng(semilla)
+            self.pesos = pesos_clase(y, self.indices).astype(np.float32) if estrategia == "weight" else None
+            if fijo and estrategia in (None, "weight"):
+                self.orden = self.indices
+            else:
+                self.orden = indices_epoca(y, self.indices, estrategia, self.rng)
+
+        def on_epoch_end(self):
+            if not self.fijo:
+                self.orden = indices_epoca(self.y, self.indices, self.estrategia, self.rng)
+
+        def __len__(self):
+            return math.ceil(len(self.orden) / self.tamano_lote)
+
+        def __getitem__(self, i):
+            # En orden de fila para leer el archivo mapeado hacia adelante
+            filas = np.sort(self.orden[i * self.tamano_lote:(i + 1) * self.tamano_lote])
+            X = np.asarray(self.X[filas])
+            y = np.asarray(self.y[filas], dtype=np.float32)
+            if self.pesos is None:
+                return X, y
+            return X, y, self.pesos[np.asarray(self.y[filas], dtype=np.int64)]
+
+    LotesBalanceados.__qualname__ = "LotesBalanceados"
+    return LotesBalanceados
+
+
+def __getattr__(nombre):
+    if nombre == "LotesBalanceados":
+        return _lotes_balanceados()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+import numpy as np
+
+import datos
+import fuerzas
+
+SEMILLA = 42
+# Iteraciones al reacomodar una red ego partiendo de las coordenadas globales
+ITERACIONES_EGO = 15
+
+
+def huella(G):
+    """Hash del conjunto de nodos y aristas de un grafo networkx"""
+    h = hashlib.sha1()
+    for nodo in sorted(map(str, G.nodes())):
+        h.update(nodo.encode("utf-8") + b"\n")
+    h.update(b"--\n")
+    for arista in sorted("\t".join(sorted(map(str, e))) for e in G.edges()):
+        h.update(arista.encode("utf-8") + b"\n")
+    return h.hexdigest()[:16]
+
+
+def _directorio(version):
+    ruta = os.path.join(datos.directorio_version(version), "layouts")
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+
+def _guardar(ruta, arreglo):
+    # Varios procesos (vistas.calentar) pueden guardar el mismo layout a la vez
+    tmp = f"{ruta}.{os.getpid()}.tmp.npy"
+    np.save(tmp, arreglo.astype(np.float32))
+    os.replace(tmp, ruta)
+
+
+def spring_layout(G, variante, version=None, inicial=None, iteraciones=50):
+    """``nx.spring_layout(G, seed=42)`` calculado una sola vez y guardado como float32.
+
+    La clave es la versión de los datos, la ``variante`` (qué grafo se dibuja) y la
+    huella del grafo. ``inicial`` son posiciones de arranque (p.ej. las globales).
+    """
+    version = version or datos.version_datos()
+    nodos = sorted(G.nodes())
+    ruta = os.path.join(_directorio(version), f"{variante}_{huella(G)}.npy")
+    if os.path.exists(ruta):
+        return dict(zip(nodos, np.load(ruta)))
+
+    import networkx as nx
+
+    pos = nx.spring_layout(G, pos=inicial, seed=SEMILLA, iterations=iteraciones)
+    arreglo = np.array([pos[n] for n in nodos], dtype=np.float32).reshape(-1, 2)
+    _guardar(ruta, arreglo)
+    return dict(zip(nodos, arreglo))
+
+
+def layout_global(grafo, variante, version=None, inicial=None):
+    """Posiciones de todo un CollaborationGraph como arreglo float32 indexado por autor_id (NaN sin aristas).
+
+    Se calcula con ``fuerzas.layout``. ``inicial`` (mismo formato que el resultado,
+    p.ej. el layout de una versión anterior) sólo se refina, y los autores nuevos
+    (NaN) se ubican junto a sus colaboradores.
+    """
+    version = version or datos.version_datos()
+    ruta = os.path.join(_directorio(version), f"{variante}_global.npy")
+    if os.path.exists(ruta):
+        return np.load(ruta)
+
+    conectado = grafo.subgrafo(grafo.nodos())
+    arranque = None if inicial is None else inicial[conectado.ids]
+    arreglo = np.full((len(grafo.nombres), 2), np.nan, dtype=np.float32)
+    arreglo[conectado.ids] = fuerzas.layout(conectado.adyacencia, inicial=arranque)
+    _guardar(ruta, arreglo)
+    return arreglo
+
+
+def como_diccionario(coordenadas, nombres, nodos):
+    """Posiciones {nombre: (x, y)} de los ``nodos`` de un grafo networkx a partir de un arreglo por autor_id"""
+    nodos = list(nodos)
+    return dict(zip(nodos, coordenadas[nombres.get_indexer(nodos)]))
+
+
+def layout_ego(G, coordenadas, nombres, variante, version=None, iteraciones=ITERACIONES_EGO):
+    """Layout de una red ego que arranca de las coordenadas globales y sólo las reacomoda unas iteraciones"""
+    inicial = None
+    if len(G):
+        nodos = list(G.nodes())
+        xy = coordenadas[nombres.get_indexer(nodos)]
+        if not np.isnan(xy).any():
+            inicial = dict(zip(nodos, xy.astype(float)))
+    return spring_layout(G, variante, version, inicial=inicial,
+                         iteraciones=iteraciones if inicial else 50)
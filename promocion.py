@@ -0,0 +1,264 @@
+"""Preprocesamiento del ejercicio de promoción de empleados (empleado.py) como pipeline ajustable.
+
+Los pasos son los del cuaderno: banderas de imputación, relleno de faltantes,
+``log1p`` del número de capacitaciones, one-hot de las columnas categóricas (todo
+a entero, como en el cuaderno) y escalamiento MinMax/Robust. Aquí se ajustan con
+el conjunto de entrenamiento y quedan como parámetros en un JSON, así que el mismo
+preprocesamiento se aplica a cualquier conjunto nuevo (las categorías que no se
+vieron al ajustar quedan en ceros). Los escaladores reproducen las fórmulas de
+``MinMaxScaler`` y ``RobustScaler`` de scikit-learn con NumPy.
+
+Las matrices de entrenamiento y prueba se escriben una sola vez como ``.npy``
+float32 en ``cache/promocion/<hash del CSV>``; cada experimento las abre con
+``mmap`` en lugar de volver a preprocesar y convertir con ``np.nan_to_num``. El CSV
+se procesa por lotes, así que puede ser más grande que la memoria.
+
+Uso: python promocion.py [employee_promotion.csv]
+"""
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+FUENTE = "employee_promotion.csv"
+DIR_MATRICES = os.path.join("cache", "promocion")
+# Sube cuando cambia el preprocesamiento, para no reutilizar matrices de otra versión
+REVISION = 2
+
+OBJETIVO = "is_promoted"
+ID = "employee_id"
+CATEGORICAS = ["department", "region", "education", "gender", "recruitment_channel"]
+# Columnas con faltantes: se marca cuáles se imputaron
+IMPUTADAS = ["education", "previous_year_rating", "avg_training_score"]
+COLUMNAS_OUTLIERS = ["no_of_trainings", "age", "previous_year_rating", "length_of_service", "avg_training_score"]
+MINMAX = ["age", "previous_year_rating", "avg_training_score"]
+ROBUST = ["length_of_service"]
+MATRICES = ["X_train", "X_test", "y_train", "y_test"]
+# Filas del CSV (y de las matrices) por lote
+LOTE = 100_000
+# Relleno que no depende de los datos; el de avg_training_score es su media en entrenamiento
+RELLENO = {"education": "Bachelor's", "previous_year_rating": 3.0}
+
+
+def outliers(df, columnas=COLUMNAS_OUTLIERS, k=4):
+    """Máscara de los valores a más de ``k`` desviaciones estándar de la mediana de su columna"""
+    x = df[columnas]
+    return (x - x.median()).abs() > k * x.std()
+
+
+def _percentiles(conteo, qs):
+    """Percentiles (interpolación lineal, como ``np.percentile``) de valores dados con su frecuencia"""
+    valores = np.array(sorted(conteo), dtype=float)
+    acumulado = np.cumsum([conteo[v] for v in valores])
+    posicion = np.asarray(qs) / 100 * (acumulado[-1] - 1)
+    abajo, arriba = np.floor(posicion), np.ceil(posicion)
+    v_abajo = valores[np.searchsorted(acumulado, abajo, side="right")]
+    v_arriba = valores[np.searchsorted(acumulado, arriba, side="right")]
+    return v_abajo + (v_arriba - v_abajo) * (posicion - abajo)
+
+
+class Preprocesamiento:
+    """Parámetros ajustados del preprocesamiento (columnas de entrada, relleno, categorías, escalas y columnas finales)
+
+    Se puede ajustar con un DataFrame (``ajustar``) o por partes, sin tener el
+    archivo completo en memoria: ``ajustar_codificacion`` con los lotes de
+    entrenamiento y ``ajustar_escalas`` con la matriz codificada (mapeada).
+    """
+
+    def __init__(self, entradas=None, relleno=None, categorias=None, escalas=None, columnas=None):
+        self.entradas, self.relleno, self.categorias = entradas, relleno, categorias
+        self.escalas, self.columnas = escalas, columnas
+
+    def ajustar(self, df):
+        self.ajustar_codificacion([df])
+        X, _ = self.codificar(df)
+        self.ajustar_escalas(X)
+        return self
+
+    def ajustar_codificacion(self, lotes):
+        """Columnas de entrada, relleno y categorías, en una pasada por los DataFrames de entrenamiento"""
+        suma, cuenta = 0.0, 0
+        valores = {col: set() for col in CATEGORICAS}
+        vacio = None
+        for df in lotes:
+            if vacio is None:
+                vacio = df.iloc[:0]
+            if self.entradas is None:
+                self.entradas = df.columns.tolist()
+            suma += float(df["avg_training_score"].sum())
+            cuenta += int(df["avg_training_score"].count())
+            for col in CATEGORICAS:
+                serie = df[col].fillna(RELLENO[col]) if col in RELLENO else df[col]
+                valores[col].update(serie.dropna().unique().tolist())
+        if vacio is None:
+            raise ValueError("No hay filas de entrenamiento para ajustar el preprocesamiento")
+        self.relleno = {**RELLENO, "avg_training_score": round(suma / cuenta, 2)}
+        self.categorias = {col: sorted(valores[col]) for col in CATEGORICAS}
+        # Las columnas finales salen de codificar un DataFrame vacío
+        self.columnas = [c for c in self._codificar(vacio).columns if c not in (OBJETIVO, ID)]
+        return self
+
+    def ajustar_escalas(self, X, lote=LOTE):
+        """Parámetros de MinMax y Robust de la matriz sin escalar (en memoria o mapeada), por lotes de filas"""
+        minimos = {col: np.inf for col in MINMAX}
+        maximos = {col: -np.inf for col in MINMAX}
+        conteos = {col: Counter() for col in ROBUST}
+        for inicio in range(0, len(X), lote):
+            bloque = np.asarray(X[inicio:inicio + lote])
+            for col in MINMAX:
+                j = self.columnas.index(col)
+                minimos[col] = min(minimos[col], float(bloque[:, j].min()))
+                maximos[col] = max(maximos[col], float(bloque[:, j].max()))
+            for col in ROBUST:
+                valores, cuenta = np.unique(bloque[:, self.columnas.index(col)], return_counts=True)
+                conteos[col].update(dict(zip(valores.tolist(), cuenta.tolist())))
+        self.escalas = {}
+        for col in MINMAX:
+            self.escalas[col] = [minimos[col], (maximos[col] - minimos[col]) or 1.0]
+        for col in ROBUST:
+            q25, mediana, q75 = _percentiles(conteos[col], [25, 50, 75])
+            self.escalas[col] = [float(mediana), float(q75 - q25) or 1.0]
+        return self
+
+    def _codificar(self, df):
+        """Banderas, relleno, log de capacitaciones y one-hot con las categorías del ajuste"""
+        # Otras columnas del archivo (nombres, fechas, ...) no forman parte del modelo,
+        # y la columna objetivo sale aparte (puede faltar en algunas filas)
+        df = df[[c for c in self.entradas if c in df.columns and c != OBJETIVO]].copy()
+        for col in IMPUTADAS:
+            df[f"imp_{col}"] = df[col].isnull().astype("int")
+        df = df.fillna(self.relleno)
+        df["log_no_of_trainings"] = np.log1p(df["no_of_trainings"])
+        df = df.drop(columns="no_of_trainings")
+        for col in CATEGORICAS:
+            df[col] = pd.Categorical(df[col], categories=self.categorias[col])
+        # Todo a entero, igual que el cuaderno
+        return pd.get_dummies(df, columns=CATEGORICAS, drop_first=False).astype(int)
+
+    def codificar(self, df):
+        """Matriz float32 sin escalar (filas × ``columnas``) y, si ``df`` trae la columna objetivo, las etiquetas.
+
+        Las etiquetas son float32, con NaN en las filas sin ``is_promoted``.
+        """
+        base = self._codificar(df)
+        X = base.reindex(columns=self.columnas, fill_value=0).to_numpy(np.float32)
+        y = pd.to_numeric(df[OBJETIVO]).to_numpy(np.float32, na_value=np.nan) if OBJETIVO in df else None
+        return np.ascontiguousarray(X), y
+
+    def escalar(self, X, lote=LOTE):
+        """Escala las columnas de ``X`` en su lugar (en memoria o mapeada, por lotes de filas)"""
+        for inicio in range(0, len(X), lote):
+            for col, (centro, escala) in self.escalas.items():
+                j = self.columnas.index(col)
+                X[inicio:inicio + lote, j] = (X[inicio:inicio + lote, j] - centro) / escala
+        return X
+
+    def transformar(self, df):
+        """Matriz float32 preprocesada y, si ``df`` trae la columna objetivo, las etiquetas"""
+        X, y = self.codificar(df)
+        return self.escalar(X), y
+
+    def guardar(self, ruta):
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(vars(self), f, ensure_ascii=False, indent=1)
+        os.replace(ruta + ".tmp", ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def dividir(y, test_size=0.2, semilla=42):
+    """Posiciones de entrenamiento y prueba estratificadas por la clase, con la misma partición que el cuaderno"""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(np.arange(len(y)), stratify=y, test_size=test_size, random_state=semilla)
+
+
+def _huella(ruta):
+    h = hashlib.sha256(f"r{REVISION}".encode("ascii"))
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def directorio(fuente=FUENTE):
+    return os.path.join(DIR_MATRICES, _huella(fuente))
+
+
+def abrir(ruta):
+    """``(X_train, X_test, y_train, y_test)`` mapeadas en memoria desde un directorio de matrices"""
+    return tuple(np.load(os.path.join(ruta, f"{nombre}.npy"), mmap_mode="r") for nombre in MATRICES)
+
+
+def preparar(fuente=FUENTE, lote=LOTE):
+    """Matrices de entrenamiento y prueba preprocesadas; se escriben la primera vez y después sólo se abren.
+
+    El CSV se lee por lotes de ``lote`` filas (sólo la columna objetivo se lee
+    completa, para la partición) y cada lote codificado se escribe directamente en
+    su lugar de las matrices mapeadas; al final se ajustan y aplican las escalas
+    sobre las matrices, también por lotes.
+    """
+    ruta = directorio(fuente)
+    archivos = [f"{nombre}.npy" for nombre in MATRICES] + ["pipeline.json"]
+    if all(os.path.exists(os.path.join(ruta, archivo)) for archivo in archivos):
+        return abrir(ruta)
+
+    os.makedirs(ruta, exist_ok=True)
+    y = pd.read_csv(fuente, usecols=[OBJETIVO])[OBJETIVO].to_numpy()
+    entrenamiento, prueba = dividir(y)
+    # Conjunto (0 entrenamiento, 1 prueba) y renglón de cada fila del CSV, en el orden de la partición
+    conjunto = np.zeros(len(y), dtype=np.int8)
+    conjunto[prueba] = 1
+    renglon = np.empty(len(y), dtype=np.int64)
+    renglon[entrenamiento] = np.arange(len(entrenamiento))
+    renglon[prueba] = np.arange(len(prueba))
+
+    pipeline = Preprocesamiento().ajustar_codificacion(
+        df[conjunto[df.index.to_numpy()] == 0] for df in pd.read_csv(fuente, chunksize=lote))
+
+    tmp = {nombre: os.path.join(ruta, f"{nombre}.tmp.npy") for nombre in MATRICES}
+    tamanos = (len(entrenamiento), len(prueba))
+    X = [open_memmap(tmp[nombre], mode="w+", dtype=np.float32, shape=(n, len(pipeline.columnas)))
+         for nombre, n in zip(MATRICES[:2], tamanos)]
+    Y = [open_memmap(tmp[nombre], mode="w+", dtype=np.int8, shape=(n,)) for nombre, n in zip(MATRICES[2:], tamanos)]
+    for df in pd.read_csv(fuente, chunksize=lote):
+        filas = df.index.to_numpy()
+        X_lote, y_lote = pipeline.codificar(df)
+        for k in (0, 1):
+            elegidas = conjunto[filas] == k
+            X[k][renglon[filas[elegidas]]] = X_lote[elegidas]
+            Y[k][renglon[filas[elegidas]]] = y_lote[elegidas]
+    pipeline.ajustar_escalas(X[0], lote)
+    for matriz in X:
+        pipeline.escalar(matriz, lote)
+    for matriz in X + Y:
+        matriz.flush()
+    del X, Y
+    # El preprocesamiento va antes que las matrices: si se interrumpe entre los dos no queda uno viejo
+    pipeline.guardar(os.path.join(ruta, "pipeline.json"))
+    for nombre in MATRICES:
+        os.replace(tmp[nombre], os.path.join(ruta, f"{nombre}.npy"))
+    return abrir(ruta)
+
+
+def cargar_pipeline(fuente=FUENTE):
+    """Preprocesamiento ajustado junto con las matrices de ``fuente`` (para transformar datos nuevos)"""
+    return Preprocesamiento.cargar(os.path.join(directorio(fuente), "pipeline.json"))
+
+
+if __name__ == "__main__":
+    fuente = sys.argv[1] if len(sys.argv) > 1 else FUENTE
+    df = pd.read_csv(fuente)
+    conteo = outliers(df).sum()
+    for col, n in conteo[conteo > 0].items():
+        print(f"En la columna {col} hay {n}/{len(df)} outliers")
+    X_train, X_test, y_train, y_test = preparar(fuente)
+    print(f"X_train {X_train.shape}, X_test {X_test.shape} en {directorio(fuente)}")
@@ -8,19 +8,30 @@ st.set_page_config(
     page_icon="📚"
 )
 
-# 📌 Importar módulos después de configurar Streamlit
-import coordinacion
-import erdos
-
 st.title("Ejemplo de análisis de datos de producción científica")
 
+# Cada vista es un fragmento: sus widgets sólo vuelven a ejecutar esa vista. Los
+# módulos (y plotly/networkx) se importan la primera vez que se abre la vista.
+@st.fragment
+def vista_coordinacion():
+    import coordinacion
+    coordinacion.graficos()
+
+@st.fragment
+def vista_investigador():
+    import erdos
+    erdos.erdos_graph()
+
+# Sólo se ejecuta la pestaña abierta; cambiar de pestaña vuelve a ejecutar la app
 tab1, tab2 = st.tabs([
     "**📚 Análisis por coordinación**", 
     "**🔗 Análisis por investigador**"
-])
+], key="vista", on_change="rerun")
 
 with tab1:
-    coordinacion.graficos()
+    if tab1.open:
+        vista_coordinacion()
 
 with tab2:
-    erdos.erdos_graph()
+    if tab2.open:
+        vista_investigador()
@@ -0,0 +1,196 @@
+"""Puntuación por lotes de empleados con los modelos de promoción guardados.
+
+Carga los modelos que deja experimentos.py (``salida/<estrategia>/modelo.keras``)
+y el preprocesamiento ajustado de promocion.py, y recorre el archivo de
+empleados (CSV o Parquet) por lotes de ``LOTE`` filas: cada lote se preprocesa
+una vez y se puntúa con todos los modelos, así que la memoria depende del lote y
+no del tamaño del archivo.
+
+Si el archivo trae ``is_promoted`` se acumulan las matrices de confusión de cada
+estrategia en cada umbral y se regresa una tabla de métricas; con ``salida`` se
+escriben, también por lotes, las probabilidades de cada estrategia por empleado.
+
+Uso: python puntuacion.py empleados.csv [--umbrales 0.3 0.5 0.7] [--estrategias under over weight]
+     [--salida probabilidades.parquet] [--entrenamiento employee_promotion.csv]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import promocion
+import experimentos
+
+# Filas por lote al leer el archivo y al pasar por los modelos
+LOTE = 65536
+UMBRALES = (0.5,)
+
+
+def leer_lotes(ruta, lote=LOTE):
+    """DataFrames de hasta ``lote`` filas de un CSV o un Parquet"""
+    if ruta.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for bloque in pq.ParquetFile(ruta).iter_batches(batch_size=lote):
+            yield bloque.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=lote)
+
+
+def cargar_modelos(estrategias=experimentos.ESTRATEGIAS):
+    """Modelos guardados por experimentos.py, por estrategia"""
+    import keras
+
+    return {estrategia: keras.models.load_model(os.path.join(experimentos.DIR_SALIDA, estrategia, "modelo.keras"))
+            for estrategia in estrategias}
+
+
+def probabilidades(modelos, X, lote=LOTE):
+    """Probabilidad de promoción de cada fila de ``X`` (una columna por modelo)"""
+    return np.column_stack([modelo.predict(X, batch_size=lote, verbose=0).ravel() for modelo in modelos.values()])
+
+
+def confusion(y, probabilidad, umbrales=UMBRALES):
+    """Matrices de confusión (umbral × real × predicho) de las probabilidades de un modelo.
+
+    Se predice 1 cuando la probabilidad pasa del umbral (``p > umbral``): en 0.5 es
+    lo mismo que ``np.round`` del cuaderno, que redondea 0.5 a 0. Las filas sin
+    etiqueta (NaN) no cuentan.
+    """
+    y = np.asarray(y, dtype=np.float64).ravel()
+    etiquetadas = ~np.isnan(y)
+    y = y[etiquetadas].astype(np.int64)
+    probabilidad = np.asarray(probabilidad).ravel()[etiquetadas]
+    prediccion = probabilidad[None, :] > np.asarray(umbrales)[:, None]
+    codigo = 4 * np.arange(len(umbrales))[:, None] + 2 * y[None, :] + prediccion
+    return np.bincount(codigo.ravel(), minlength=4 * len(umbrales)).reshape(len(umbrales), 2, 2)
+
+
+def metricas(matriz):
+    """Exactitud, precisión, exhaustividad y F1 de una matriz de confusión 2 × 2"""
+    (vn, fp), (fn, vp) = np.asarray(matriz).tolist()
+    precision = vp / (vp + fp) if vp + fp else 0.0
+    exhaustividad = vp / (vp + fn) if vp + fn else 0.0
+    return {
+        "matriz": [[vn, fp], [fn, vp]],
+        "exactitud": (vp + vn) / max(vn + fp + fn + vp, 1),
+        "precision": precision,
+        "exhaustividad": exhaustividad,
+        "f1": 2 * precision * exhaustividad / (precision + exhaustividad) if precision + exhaustividad else 0.0,
+    }
+
+
+def _tabla(matrices, umbrales):
+    filas = []
+    for estrategia, por_umbral in matrices.items():
+        for umbral, matriz in zip(umbrales, por_umbral):
+            resultado = metricas(matriz)
+            (vn, fp), (fn, vp) = resultado.pop("matriz")
+            filas.append({"estrategia": estrategia, "umbral": umbral, "vn": vn, "fp": fp, "fn": fn, "vp": vp,
+                          **resultado})
+    return pd.DataFrame(filas)
+
+
+def matrices(modelos, X, y, umbrales=UMBRALES, lote=LOTE):
+    """Matrices de confusión (umbral × real × predicho) de cada modelo sobre matrices ya preprocesadas, por lotes"""
+    resultado = {estrategia: np.zeros((len(umbrales), 2, 2), dtype=np.int64) for estrategia in modelos}
+    for inicio in range(0, len(X), lote):
+        p = probabilidades(modelos, np.asarray(X[inicio:inicio + lote]), lote)
+        for j, estrategia in enumerate(modelos):
+            resultado[estrategia] += confusion(y[inicio:inicio + lote], p[:, j], umbrales)
+    return resultado
+
+
+def evaluar(modelos, X, y, umbrales=UMBRALES, lote=LOTE):
+    """Métricas de todos los modelos sobre matrices ya preprocesadas (p. ej. X_test con mmap), por lotes"""
+    return _tabla(matrices(modelos, X, y, umbrales, lote), umbrales)
+
+
+class _Escritor:
+    """Probabilidades por lotes a un CSV o un Parquet"""
+
+    def __init__(self, ruta):
+        self.ruta, self._parquet = ruta, None
+        self._tmp = ruta + ".tmp"
+        self._primero = True
+
+    def escribir(self, df):
+        if self.ruta.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._tmp, tabla.schema)
+            self._parquet.write_table(tabla)
+        else:
+            df.to_csv(self._tmp, mode="w" if self._primero else "a", header=self._primero, index=False)
+        self._primero = False
+
+    def cerrar(self, completo=True):
+        """Cierra el archivo; sólo si se escribió completo reemplaza a ``ruta``, si no se borra"""
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._primero:
+            return
+        if completo:
+            os.replace(self._tmp, self.ruta)
+        else:
+            os.remove(self._tmp)
+
+
+def puntuar(ruta, estrategias=experimentos.ESTRATEGIAS, umbrales=UMBRALES, salida=None,
+            entrenamiento=promocion.FUENTE, lote=LOTE):
+    """Puntúa un archivo de empleados por lotes con todas las estrategias.
+
+    Regresa la tabla de métricas por estrategia y umbral si el archivo trae
+    ``is_promoted`` (si no, None). Con ``salida`` escribe ``employee_id`` y la
+    probabilidad de cada estrategia.
+    """
+    pipeline = promocion.cargar_pipeline(entrenamiento)
+    modelos = cargar_modelos(estrategias)
+    acumuladas = {estrategia: np.zeros((len(umbrales), 2, 2), dtype=np.int64) for estrategia in modelos}
+    etiquetado = False
+    escritor = _Escritor(salida) if salida else None
+    completo = False
+    try:
+        for df in leer_lotes(ruta, lote):
+            X, y = pipeline.transformar(df)
+            p = probabilidades(modelos, X, lote)
+            if y is not None:
+                etiquetado = True
+                for j, estrategia in enumerate(modelos):
+                    acumuladas[estrategia] += confusion(y, p[:, j], umbrales)
+            if escritor is not None:
+                columnas = {f"prob_{estrategia}": p[:, j] for j, estrategia in enumerate(modelos)}
+                if promocion.ID in df:
+                    columnas = {promocion.ID: df[promocion.ID].to_numpy()} | columnas
+                escritor.escribir(pd.DataFrame(columnas))
+        completo = True
+    finally:
+        # Un error a media lectura (o Ctrl-C) no deja un archivo truncado en ``salida``
+        if escritor is not None:
+            escritor.cerrar(completo)
+    return _tabla(acumuladas, umbrales) if etiquetado else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ruta", help="CSV o Parquet de empleados")
+    parser.add_argument("--umbrales", type=float, nargs="+", default=list(UMBRALES))
+    parser.add_argument("--estrategias", nargs="+", default=list(experimentos.ESTRATEGIAS),
+                        choices=experimentos.ESTRATEGIAS)
+    parser.add_argument("--salida", help="CSV o Parquet con las probabilidades por empleado")
+    parser.add_argument("--entrenamiento", default=promocion.FUENTE, help="CSV con el que se ajustó el preprocesamiento")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+    tabla = puntuar(args.ruta, args.estrategias, args.umbrales, args.salida, args.entrenamiento, args.lote)
+    if tabla is not None:
+        print(tabla.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if args.salida:
+        print(f"Probabilidades en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Construcción de Autores.csv (conteos por autor de correspondencia) y Colaboradores.parquet.
+
+Versión importable del proceso de ``01_limpieza de datos.ipynb``. Cada texto de
+autores se normaliza una sola vez por producto y los nombres se buscan todos a la
+vez con un autómata de Aho-Corasick, en lugar de normalizar y recorrer todos los
+productos para cada autor. La coincidencia sigue siendo la del cuaderno: el nombre
+normalizado aparece como subcadena del texto normalizado.
+
+Los colaboradores de cada autor se guardan como lista de aristas (autor_id = fila
+de Autores.csv, colaborador, n) en Parquet, no como un diccionario de Python
+dentro del CSV.
+
+Uso: python resumen_autores.py [Autores.csv] [Colaboradores.parquet]
+"""
+import re
+import sys
+from collections import deque
+
+import pandas as pd
+from unidecode import unidecode
+
+import datos
+
+COL_CORRESPONDENCIA = "*Autor de correspondencia"
+COL_AUTORES = "Autores | *Autor de correspondencia | ªEstudiante"
+SALIDA = "Autores.csv"
+SALIDA_COLABORADORES = "Colaboradores.parquet"
+
+# Captura "Nombre (Institución)"
+PATRON_AUTOR = re.compile(r"(.+?)\s*\(([^)]*)\)")
+_NO_ALFANUMERICO = re.compile(r'[^a-z\.0-9\s]')
+
+
+def limpiar_texto(texto):
+    """Minúsculas, sin acentos y sólo letras, números, puntos y espacios"""
+    return _NO_ALFANUMERICO.sub('', unidecode(texto.lower()))
+
+
+def limpiar_nombre(nombre):
+    """Quita * y ª de un nombre de la lista de autores"""
+    return nombre.strip().lstrip("*").lstrip("ª").strip()
+
+
+def _normalizar(serie):
+    """``limpiar_texto`` aplicado una vez por valor distinto de la columna"""
+    serie = serie.fillna("").astype(str)
+    unicos = serie.drop_duplicates()
+    return serie.map(dict(zip(unicos, map(limpiar_texto, unicos))))
+
+
+class Buscador:
+    """Autómata de Aho-Corasick: encuentra en una pasada qué patrones aparecen en un texto"""
+
+    def __init__(self, patrones):
+        self.patrones = list(patrones)
+        self._siguiente, self._falla, self._salida = [{}], [0], [[]]
+        for i, patron in enumerate(self.patrones):
+            estado = 0
+            for c in patron:
+                if c not in self._siguiente[estado]:
+                    self._siguiente.append({})
+                    self._falla.append(0)
+                    self._salida.append([])
+                    self._siguiente[estado][c] = len(self._siguiente) - 1
+                estado = self._siguiente[estado][c]
+            self._salida[estado].append(i)
+
+        # Enlaces de falla por anchura: el sufijo propio más largo que también es prefijo
+        cola = deque(self._siguiente[0].values())
+        while cola:
+            r = cola.popleft()
+            for c, s in self._siguiente[r].items():
+                cola.append(s)
+                f = self._falla[r]
+                while f and c not in self._siguiente[f]:
+                    f = self._falla[f]
+                self._falla[s] = self._siguiente[f].get(c, 0)
+                self._salida[s] = self._salida[s] + self._salida[self._falla[s]]
+
+    def buscar(self, texto):
+        """Índices de los patrones que aparecen en ``texto``"""
+        siguiente, falla, salida = self._siguiente, self._falla, self._salida
+        encontrados = set(salida[0])
+        estado = 0
+        for c in texto:
+            while estado and c not in siguiente[estado]:
+                estado = falla[estado]
+            estado = siguiente[estado].get(c, 0)
+            if salida[estado]:
+                encontrados.update(salida[estado])
+        return encontrados
+
+
+def autores_correspondencia(df):
+    """Nombre e institución de cada autor de correspondencia distinto"""
+    separados = (
+        df[COL_CORRESPONDENCIA].astype(str).str.strip()
+        .str.split(";").explode().str.strip().str.lstrip("*")
+    )
+    filas = []
+    for elemento in separados.dropna().unique():
+        match = PATRON_AUTOR.match(elemento)
+        if match:
+            nombre, institucion = match.groups()
+            filas.append((nombre.strip(), institucion.strip()))
+    return pd.DataFrame(filas, columns=["Nombre", "Institución"])
+
+
+def _coincidencias(buscador, textos):
+    """Pares (patrón, fila) de los patrones encontrados en cada texto"""
+    return pd.DataFrame(
+        [(patron, fila) for fila, texto in enumerate(textos) for patron in buscador.buscar(texto)],
+        columns=["patron", "fila"], dtype="int64"
+    )
+
+
+def _colaboradores(df, nombres):
+    """Aristas (autor_id, colaborador, n) recorriendo cada lista de autores una sola vez.
+
+    Un autor repetido en Autores.csv (mismo nombre, otra institución) acumula sus
+    colaboraciones en su primera fila; las aristas quedan agrupadas por autor_id y,
+    dentro de cada autor, en el orden en que aparece cada colaborador.
+    """
+    posicion = {}
+    for i, nombre in enumerate(nombres):
+        posicion.setdefault(nombre, i)
+    colaboradores = [{} for _ in nombres]
+    for texto in df[COL_AUTORES]:
+        lista = [limpiar_nombre(n) for n in texto.split(";") if n.strip()]
+        for nombre in lista:
+            if nombre in posicion:
+                conteo = colaboradores[posicion[nombre]]
+                for colaborador in lista:
+                    if colaborador != nombre:
+                        conteo[colaborador] = conteo.get(colaborador, 0) + 1
+
+    aristas = pd.DataFrame(
+        [(i, colaborador, n) for i, conteo in enumerate(colaboradores) for colaborador, n in conteo.items()],
+        columns=["autor_id", "colaborador", "n"]
+    )
+    return aristas.astype({"autor_id": "int32", "colaborador": "category", "n": "int32"})
+
+
+def construir_resumen(df):
+    """Tablas de Autores.csv y Colaboradores.parquet.
+
+    La primera tiene los documentos de cada autor como autor de correspondencia
+    (AC), como autor (No AC) y por tipo de producto; la segunda sus colaboradores.
+    """
+    df = df.reset_index(drop=True)
+    autores = autores_correspondencia(df)
+    normalizados = autores["Nombre"].map(limpiar_texto)
+    patrones = pd.Index(normalizados.unique())
+    patron_autor = patrones.get_indexer(normalizados)
+    buscador = Buscador(patrones)
+
+    ac = _coincidencias(buscador, _normalizar(df[COL_CORRESPONDENCIA].astype(str).str.strip()))
+    autores["No. Documentos AC"] = ac["patron"].value_counts().reindex(patron_autor, fill_value=0).to_numpy()
+
+    no_ac = _coincidencias(buscador, _normalizar(df[COL_AUTORES]))
+    autores["No. Documentos No AC"] = no_ac["patron"].value_counts().reindex(patron_autor, fill_value=0).to_numpy()
+    tipos = df["tipo_producto"].astype(str)
+    por_tipo = pd.crosstab(no_ac["patron"], tipos.to_numpy()[no_ac["fila"]])
+    for tipo in tipos.unique():
+        conteo = por_tipo[tipo] if tipo in por_tipo else pd.Series(dtype="int64")
+        autores["No. " + tipo] = conteo.reindex(patron_autor, fill_value=0).to_numpy().astype(int)
+
+    return autores, _colaboradores(df, autores["Nombre"].tolist())
+
+
+def guardar_resumen(ruta=SALIDA, ruta_colaboradores=SALIDA_COLABORADORES, df=None):
+    """Escribe Autores.csv y Colaboradores.parquet a partir del snapshot de productos validados"""
+    autores, aristas = construir_resumen(datos.cargar_productos() if df is None else df)
+    autores.to_csv(ruta, index=False)
+    aristas.to_parquet(ruta_colaboradores, index=False)
+    return autores, aristas
+
+
+if __name__ == "__main__":
+    guardar_resumen(*sys.argv[1:3])
@@ -0,0 +1,100 @@
+"""Agregados por año, coordinación y tipo de producto para las tendencias de coordinacion.py.
+
+La tabla tiene una fila por (eje, año, coordinación, tipo de producto), donde el
+eje es el año de publicación o el de registro. Para cada combinación de
+coordinación y tipo que aparece en los datos están todos los años del rango del
+eje (con 0 productos si no hubo), así que la suma acumulada y la móvil de
+``VENTANA`` años se calculan una vez al construirla. Un rango de años se responde
+sólo cortando la tabla: lo acumulado desde el inicio del rango es la resta de dos
+acumulados.
+
+Se guarda en el directorio de la versión de los datos; la ingesta la reconstruye
+(es una agregación de los productos, sin operaciones de texto).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import datos
+
+# Columna del año de cada eje
+EJES = {"publicacion": "ano_publicacion", "registro": "*ano_registro"}
+# Años de la suma móvil
+VENTANA = 3
+GRUPO = ["eje", "coordinacion", "tipo_producto"]
+
+
+def construir_tendencias(df, ventana=VENTANA):
+    """Productos, registros extemporáneos y sus sumas acumuladas y móviles por año"""
+    partes = []
+    for eje, columna in EJES.items():
+        # Los productos sin año en este eje no entran en su serie
+        llaves = pd.DataFrame({
+            "anio": df[columna],
+            "coordinacion": df["coordinacion"],
+            "tipo_producto": df["tipo_producto"],
+            "productos": np.int32(1),
+            "extemporaneos": df["registro_extemporaneo"].eq("SI").astype("int32"),
+        }).dropna(subset=["anio", "coordinacion", "tipo_producto"])
+        llaves["anio"] = llaves["anio"].astype("int16")
+        conteo = llaves.groupby(["coordinacion", "tipo_producto", "anio"], observed=True)[
+            ["productos", "extemporaneos"]].sum()
+
+        # Todos los años del rango para cada combinación presente
+        combinaciones = conteo.index.droplevel("anio").unique()
+        anios = np.arange(llaves["anio"].min(), llaves["anio"].max() + 1, dtype="int16")
+        completo = pd.MultiIndex.from_tuples(
+            [(c, t, a) for c, t in combinaciones for a in anios], names=conteo.index.names
+        )
+        conteo = conteo.reindex(completo, fill_value=0).reset_index()
+        conteo.insert(0, "eje", eje)
+        partes.append(conteo)
+
+    tabla = pd.concat(partes, ignore_index=True)
+    tabla = tabla.astype({"eje": "category", "coordinacion": "category", "tipo_producto": "category"})
+    tabla = tabla.sort_values(GRUPO + ["anio"], ignore_index=True)
+    grupos = tabla.groupby(GRUPO, observed=True, sort=False)
+    for columna in ("productos", "extemporaneos"):
+        tabla[f"{columna}_acumulado"] = grupos[columna].cumsum().astype("int32")
+        tabla[f"{columna}_movil"] = (
+            grupos[columna].rolling(ventana, min_periods=1).sum().reset_index(level=GRUPO, drop=True)
+            .sort_index().astype("int32")
+        )
+    return tabla
+
+
+def cargar_tendencias(version=None):
+    """Tabla de tendencias de una versión de los datos; se construye una vez y se guarda en disco"""
+    version = version or datos.version_datos()
+    ruta = os.path.join(datos.directorio_version(version), "tendencias.parquet")
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    tabla = construir_tendencias(datos.cargar_productos())
+    guardar_tendencias(tabla, version)
+    return tabla
+
+
+def guardar_tendencias(tabla, version):
+    ruta = os.path.join(datos.directorio_version(version), "tendencias.parquet")
+    tmp = ruta + ".tmp"
+    tabla.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def rango(tabla, eje):
+    """Primer y último año del eje"""
+    anios = tabla.loc[tabla["eje"] == eje, "anio"]
+    return int(anios.min()), int(anios.max())
+
+
+def serie(tabla, eje, coordinaciones, tipos, desde, hasta):
+    """Por año y coordinación, sumando los tipos: productos, extemporáneos, acumulados desde ``desde`` y móviles"""
+    corte = tabla[(tabla["eje"] == eje) & tabla["coordinacion"].isin(coordinaciones)
+                  & tabla["tipo_producto"].isin(tipos) & tabla["anio"].between(desde - 1, hasta)]
+    suma = corte.groupby(["coordinacion", "anio"], observed=True).sum(numeric_only=True).reset_index()
+    for columna in ("productos", "extemporaneos"):
+        # Lo acumulado hasta el año anterior al rango se resta
+        previo = suma.loc[suma["anio"] == desde - 1].set_index("coordinacion")[f"{columna}_acumulado"]
+        suma[f"{columna}_acumulado"] -= suma["coordinacion"].map(previo).astype("float").fillna(0).astype("int32")
+    return suma[suma["anio"] >= desde].reset_index(drop=True)
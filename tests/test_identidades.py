@@ -0,0 +1,76 @@
+"""Pares de nombres que la resolución de identidades debe unir y que no debe unir."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import identidades
+
+UNIR = [
+    ("Aguirre Sánchez J.", "Aguirre-Sanchez J."),
+    ("Aguirre Sánchez J.", "Aguirre Sánchez J.R."),
+    ("Lizárraga Velázquez C.E.", "Lizarraga velazquez C."),
+    ("Torres Areola W.", "TORRES ARREOLA W."),
+    ("Ávila Quezada G.D.", "Avila Quezada G.D."),
+    ("Del Toro-Sánchez C.", "Del-Toro-Sánchez C."),
+    ("Ruiz-Cruz S.", "Ruiz Cruz S."),
+    ("Preciado Rodríguez J.M.", "PRECIADO RODRIGUEZ J."),
+]
+
+SEPARAR = [
+    ("Morelos Moreno A.", "Morales Moreno A."),
+    ("Morelos Moreno A.", "MORALES MORENO A."),
+    ("Aguirre Sánchez J.R.", "Aguirre Sánchez J.A."),
+    ("Hernández González G.", "Hernández González M."),
+    ("García López M.", "García Pérez M."),
+    ("Castro Enríquez D.", "Castillo Enríquez D."),
+]
+
+
+def _resolver(nombres, productos=None):
+    """Canónico de cada nombre; por omisión cada nombre firma un producto distinto"""
+    nombres = pd.Index(nombres, name="nombre")
+    productos = productos or [[i] for i in range(len(nombres))]
+    filas = [(autor_id, fila) for autor_id, suyas in enumerate(productos) for fila in suyas]
+    tabla = pd.DataFrame(filas, columns=["autor_id", "fila"])
+    return nombres, identidades.resolver(nombres, tabla)
+
+
+@pytest.mark.parametrize("a, b", UNIR)
+def test_unir(a, b):
+    _, canonico = _resolver([a, b])
+    assert canonico[0] == canonico[1]
+
+
+@pytest.mark.parametrize("a, b", SEPARAR)
+def test_separar(a, b):
+    _, canonico = _resolver([a, b])
+    assert canonico[0] != canonico[1]
+
+
+def test_coautores_no_se_unen():
+    # Dos variantes que firman el mismo producto son dos personas
+    _, canonico = _resolver(["Ruiz-Cruz S.", "Ruiz Cruz S."], productos=[[0], [0]])
+    assert canonico[0] != canonico[1]
+
+
+@pytest.mark.parametrize("variantes, esperado", [
+    # La variante bien escrita gana aunque la otra tenga más productos
+    (["Lizarraga velazquez C.", "Lizárraga Velázquez C.E."], "Lizárraga Velázquez C.E."),
+    (["MORALES MORENO A.", "Morales Moreno A."], "Morales Moreno A."),
+    (["Avila Quezada G.D.", "Ávila Quezada G.D."], "Ávila Quezada G.D."),
+])
+def test_representante(variantes, esperado):
+    nombres, canonico = _resolver(variantes, productos=[[0, 1, 2], [3]])
+    assert np.all(canonico == canonico[0])
+    assert nombres[canonico[0]] == esperado
+
+
+def test_previo_conserva_grupos():
+    # Con el mapa anterior los grupos existentes no cambian y los nombres nuevos se unen a uno de ellos o no
+    _, previo = _resolver(["Aguirre Sánchez J.", "Morales Moreno A."])
+    nombres = pd.Index(["Aguirre Sánchez J.", "Morales Moreno A.", "Aguirre-Sanchez J.", "Morelos Moreno A."])
+    tabla = pd.DataFrame({"autor_id": [0, 1, 2, 3], "fila": [0, 1, 2, 3]})
+    canonico = identidades.resolver(nombres, tabla, previo=previo)
+    assert canonico[:2].tolist() == previo.tolist()
+    assert canonico[2] == previo[0]
+    assert canonico[3] not in (canonico[0], canonico[1])
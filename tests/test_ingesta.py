@@ -0,0 +1,123 @@
+"""La ingesta incremental deja los mismos artefactos que reconstruirlos desde cero."""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datos
+import autores
+import colaboracion
+import cubo
+import distancias
+import identidades
+import ingesta
+import tendencias
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILAS = 300
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Copia reducida de la fuente en un directorio propio (las rutas de datos.py son relativas)"""
+    fuente = pd.read_csv(os.path.join(RAIZ, datos.FUENTE_CSV), dtype=str).head(FILAS)
+    fuente.to_csv(tmp_path / datos.FUENTE_CSV, index=False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _exportacion(ruta):
+    """Dos productos cambiados (autores y tipo), uno con un autor nuevo, y un producto nuevo"""
+    df = pd.read_csv(datos.FUENTE_CSV, dtype=str)
+    cambiadas = df.iloc[[0, 1, 2]].copy()
+    cambiadas.iloc[0, cambiadas.columns.get_loc(autores.COL_AUTORES)] += "; Quintero Zazueta P."
+    autores_1 = cambiadas.iloc[1][autores.COL_AUTORES].split(";")
+    cambiadas.iloc[1, cambiadas.columns.get_loc(autores.COL_AUTORES)] = ";".join(autores_1[:max(len(autores_1) - 1, 1)])
+    otro_tipo = next(t for t in df["tipo_producto"].dropna().unique() if t != cambiadas.iloc[2]["tipo_producto"])
+    cambiadas.iloc[2, cambiadas.columns.get_loc("tipo_producto")] = otro_tipo
+    nueva = df.iloc[[3]].copy()
+    nueva["id_producto"] = "999999999"
+    nueva["titulo"] = "Producto agregado por la ingesta"
+    nueva[autores.COL_AUTORES] = "Nuevoautor Ramírez Q.; " + df.iloc[3][autores.COL_AUTORES]
+    pd.concat([cambiadas, nueva]).to_csv(ruta, index=False)
+
+
+def _por_nombre(tabla, nombres):
+    x = tabla.assign(nombre=nombres[tabla["autor_id"]].to_numpy()).drop(columns="autor_id")
+    x = x.astype({"institucion": object, "rol": str})
+    return x.sort_values(["fila", "posicion"]).reset_index(drop=True)
+
+
+def _aristas(grafo, nombres):
+    u, v, peso = grafo.aristas()
+    return {(min(a, b), max(a, b), int(p)) for a, b, p in zip(nombres[u], nombres[v], peso)}
+
+
+def test_ingesta_igual_a_reconstruir(directorio):
+    # Artefactos de la versión inicial
+    publicaciones = (datos.TIPOS_PUBLICACION, None)
+    correspondencia = (None, [autores.CORRESPONDENCIA])
+    autores.cargar_indice_productos()
+    for tipos, roles in (publicaciones, correspondencia):
+        colaboracion.cargar_grafo(tipos, roles)
+    distancias.cargar_indice(tipos=datos.TIPOS_PUBLICACION)
+    cubo.cargar_cubo()
+    tendencias.cargar_tendencias()
+    anterior = datos.version_datos()
+
+    _exportacion(directorio / "exportacion.csv")
+    version = ingesta.ingerir(str(directorio / "exportacion.csv"))
+    assert version != anterior
+
+    # Lo mismo construido desde cero con el snapshot nuevo
+    df = datos.cargar_productos()
+    assert "999999999" in df["id_producto"].astype(str).tolist()
+    tabla_completa, nombres_completos = autores.construir_tabla_autores(df)
+    tabla_completa = identidades.aplicar(tabla_completa, identidades.resolver(nombres_completos, tabla_completa))
+    tabla, nombres = autores.cargar_autores(version)
+
+    # El vocabulario incremental conserva los nombres que ya no aparecen (sus autor_id siguen siendo válidos)
+    presentes = set(nombres[np.unique(tabla["autor_id"])])
+    assert presentes == set(nombres_completos[np.unique(tabla_completa["autor_id"])])
+    pd.testing.assert_frame_equal(_por_nombre(tabla, nombres), _por_nombre(tabla_completa, nombres_completos))
+
+    completo = autores.IndiceProductos.desde_tabla(tabla_completa, len(nombres_completos))
+    incremental = autores.cargar_indice_productos(version)
+    for nombre in ("Quintero Zazueta P.", "Nuevoautor Ramírez Q."):
+        a, b = nombres_completos.get_loc(nombre), nombres.get_loc(nombre)
+        for x, y in zip(completo.productos(a), incremental.productos(b)):
+            np.testing.assert_array_equal(x, y)
+
+    for tipos, roles in (publicaciones, correspondencia):
+        filtrada = colaboracion.filtrar_tabla(tabla_completa, tipos, roles, df["tipo_producto"])
+        esperado = colaboracion.CollaborationGraph.desde_tabla(filtrada, nombres_completos)
+        grafo = colaboracion.cargar_grafo(tipos, roles, version)
+        assert _aristas(grafo, nombres) == _aristas(esperado, nombres_completos)
+
+        if tipos is not None:
+            indice_completo = distancias.IndiceErdos.desde_grafo(esperado)
+            indice = distancias.cargar_indice(tipos=tipos, version=version)
+            for nombre in sorted(presentes):
+                a, b = nombres_completos.get_loc(nombre), nombres.get_loc(nombre)
+                for k in range(1, distancias.K_MAX + 1):
+                    (n1, d1), (n2, d2) = indice_completo.capas(a, k), indice.capas(b, k)
+                    assert sorted(zip(nombres_completos[n1], d1.tolist())) == sorted(zip(nombres[n2], d2.tolist()))
+                    (h1, p1), (h2, p2) = indice_completo.enlaces(a, k), indice.enlaces(b, k)
+                    assert (sorted(zip(nombres_completos[h1], nombres_completos[p1]))
+                            == sorted(zip(nombres[h2], nombres[p2])))
+
+    dimensiones = {d: object for d in cubo.DIMENSIONES}
+    pd.testing.assert_frame_equal(cubo.cargar_cubo(version).astype(dimensiones),
+                                  cubo.construir_cubo(df).astype(dimensiones), check_like=True)
+    pd.testing.assert_frame_equal(tendencias.cargar_tendencias(version), tendencias.construir_tendencias(df))
+
+
+def test_ingesta_repetida_no_cambia_nada(directorio):
+    autores.cargar_autores()
+    _exportacion(directorio / "exportacion.csv")
+    version = ingesta.ingerir(str(directorio / "exportacion.csv"))
+    assert ingesta.ingerir(str(directorio / "exportacion.csv")) == version
+    shutil.copy(directorio / "exportacion.csv", directorio / "copia.csv")
+    assert ingesta.ingerir(str(directorio / "copia.csv")) == version
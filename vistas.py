@@ -0,0 +1,224 @@
+"""Figuras de la red de Erdős de cada investigador, guardadas en una caché en disco.
+
+La figura de ``erdos.py`` sólo depende de la versión de los datos, del investigador
+y del número de Erdős, así que se puede generar antes de que alguien la pida.
+``calentar`` genera las de todos los autores de correspondencia repartiéndolos en
+un pool de procesos; ``figura`` regresa la guardada si existe y si no la genera.
+
+La caché es un directorio de JSON comprimidos de tamaño acotado (``LIMITE_BYTES``).
+Cada lectura actualiza la fecha de modificación del archivo, y al pasar el límite
+se borran los de acceso más antiguo (LRU). La versión de los datos forma parte de
+la clave, así que las figuras de versiones anteriores simplemente dejan de leerse
+y se van desalojando.
+
+Uso: python vistas.py [procesos]
+"""
+import gzip
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import datos
+import autores
+import colaboracion
+import distancias
+import posiciones
+import dibujo
+
+TIPOS = datos.TIPOS_PUBLICACION
+# Mayor número de Erdős que se puede elegir en erdos.py
+MAX_ERDOS = 2
+DIR_VISTAS = os.path.join(datos.DIR_CACHE, "vistas")
+LIMITE_BYTES = 256 * 2 ** 20
+# Autores que un proceso genera por tarea
+AUTORES_POR_TAREA = 16
+
+
+class CacheDisco:
+    """Textos guardados por clave en archivos gzip, con límite de bytes y desalojo LRU por fecha de acceso"""
+
+    def __init__(self, directorio=DIR_VISTAS, limite=LIMITE_BYTES):
+        self.directorio, self.limite = directorio, limite
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(clave.encode("utf-8")).hexdigest()[:20] + ".json.gz")
+
+    def obtener(self, clave):
+        """Texto guardado con ``clave`` o None; marca el archivo como usado"""
+        ruta = self._ruta(clave)
+        try:
+            os.utime(ruta)
+            with gzip.open(ruta, "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            # No existe, o se desalojó entre las dos operaciones
+            return None
+
+    def guardar(self, clave, texto, podar=True):
+        ruta = self._ruta(clave)
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(texto)
+        os.replace(tmp, ruta)
+        if podar:
+            self.podar()
+
+    def podar(self):
+        """Borra los archivos de acceso más antiguo hasta quedar dentro del límite. Regresa los bytes en uso"""
+        entradas = []
+        with os.scandir(self.directorio) as archivos:
+            for archivo in archivos:
+                if archivo.name.endswith(".json.gz"):
+                    estado = archivo.stat()
+                    entradas.append((estado.st_mtime, estado.st_size, archivo.path))
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.limite:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+        return total
+
+
+class Contexto:
+    """Todo lo que necesita la figura de un investigador, para una versión de los datos"""
+
+    def __init__(self, version, nombres, indice, coordenadas, estudiantes):
+        self.version, self.nombres, self.indice = version, nombres, indice
+        self.coordenadas, self.estudiantes = coordenadas, pd.Index(estudiantes)
+
+    @classmethod
+    def cargar(cls, version=None):
+        """Carga (y construye la primera vez) el índice de distancias, el layout global y los estudiantes"""
+        version = version or datos.version_datos()
+        _, nombres = autores.cargar_autores(version)
+        indice = distancias.cargar_indice(tipos=TIPOS, version=version)
+        coordenadas = posiciones.layout_global(colaboracion.cargar_grafo(tipos=TIPOS, version=version), "erdos", version)
+        _, estudiantes = opciones(version)
+        return cls(version, nombres, indice, coordenadas, estudiantes)
+
+
+def opciones(version=None):
+    """Autores de correspondencia de productos de ``TIPOS`` (en orden alfabético) y los estudiantes"""
+    version = version or datos.version_datos()
+    tabla, nombres = autores.cargar_autores(version)
+    indice = autores.cargar_indice_productos(version)
+    permitido = datos.cargar_productos(columnas=["tipo_producto"])["tipo_producto"].isin(TIPOS).to_numpy()
+    autor = np.repeat(np.arange(len(indice.ptr) - 1), np.diff(indice.ptr))
+    correspondencia = np.unique(autor[indice.correspondencia & permitido[indice.filas]])
+    # Los autores que llegan en una ingesta quedan al final de ``nombres``
+    lista = nombres[correspondencia].sort_values().tolist()
+    tabla = tabla[permitido[tabla["fila"].to_numpy()]]
+    return lista, nombres[autores.estudiantes(tabla)].tolist()
+
+
+def numeros_erdos(indice, autor_id):
+    """Números de Erdős que se pueden elegir para un autor"""
+    return list(range(1, min(max(indice.max_distancia(autor_id), 1), MAX_ERDOS) + 1))
+
+
+def construir_figura(contexto, autor_id, k):
+    """Figura de Plotly con la red de Erdős de ``autor_id`` hasta distancia ``k``"""
+    import networkx as nx
+
+    nombres = contexto.nombres
+    # Grafo con restricciones de conexión: cada nodo se une a sus vecinos del nivel anterior
+    hijos, padres = contexto.indice.enlaces(autor_id, k)
+    G_filtered = nx.Graph()
+    G_filtered.add_edges_from(zip(nombres[hijos], nombres[padres]))
+
+    # Layout guardado en disco; parte de las coordenadas de la red completa
+    pos = posiciones.layout_ego(G_filtered, contexto.coordenadas, nombres, "erdos", contexto.version)
+
+    nodos, xy, u, v, _ = dibujo.desde_networkx(G_filtered, pos)
+    nodos_index = pd.Index(nodos)
+    node_color = np.where(nodos_index == nombres[autor_id], "yellow",
+                          np.where(nodos_index.isin(contexto.estudiantes), "red", "blue"))
+
+    fig_graph = go.Figure()
+    fig_graph.add_traces(dibujo.trazas_aristas(xy, u, v, color='black', max_aristas=dibujo.MAX_ARISTAS))
+    fig_graph.add_trace(dibujo.traza_nodos(xy, nodos, color=node_color.tolist()))
+
+    # Fondo personalizado y sin ejes
+    fig_graph.update_layout(
+        title="Grafo de Colaboraciones con Número de Erdős"
+              + (f" ({dibujo.MAX_ARISTAS} de {len(u)} conexiones)" if len(u) > dibujo.MAX_ARISTAS else ""),
+        showlegend=False,
+        xaxis=dict(showgrid=False, zeroline=False, visible=False),
+        yaxis=dict(showgrid=False, zeroline=False, visible=False),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        font=dict(color="black")
+    )
+    return fig_graph
+
+
+def _clave(contexto, autor_id, k):
+    return f"erdos|{contexto.version}|{autor_id}|{k}"
+
+
+def figura(contexto, autor_id, k, cache=None):
+    """Figura guardada en la caché; si no está, se construye y se guarda"""
+    cache = cache or CacheDisco()
+    clave = _clave(contexto, autor_id, k)
+    texto = cache.obtener(clave)
+    if texto is not None:
+        return pio.from_json(texto)
+    fig = construir_figura(contexto, autor_id, k)
+    cache.guardar(clave, fig.to_json())
+    return fig
+
+
+_CONTEXTO = None
+
+
+def _iniciar(version):
+    global _CONTEXTO
+    _CONTEXTO = Contexto.cargar(version)
+
+
+def _generar(autor_ids, forzar=False):
+    """Genera y guarda las figuras de varios autores (en un proceso del pool). Regresa cuántas generó"""
+    cache, generadas = CacheDisco(), 0
+    for autor_id in autor_ids:
+        for k in numeros_erdos(_CONTEXTO.indice, autor_id):
+            clave = _clave(_CONTEXTO, autor_id, k)
+            if not forzar and os.path.exists(cache._ruta(clave)):
+                continue
+            cache.guardar(clave, construir_figura(_CONTEXTO, autor_id, k).to_json(), podar=False)
+            generadas += 1
+    return generadas
+
+
+def calentar(version=None, procesos=None, forzar=False):
+    """Genera las figuras de todos los autores de correspondencia. Regresa cuántas generó"""
+    version = version or datos.version_datos()
+    # Los artefactos compartidos se construyen una vez aquí, antes de repartir el trabajo
+    contexto = Contexto.cargar(version)
+    lista, _ = opciones(version)
+    autor_ids = contexto.nombres.get_indexer(lista)
+    tareas = [autor_ids[i:i + AUTORES_POR_TAREA] for i in range(0, len(autor_ids), AUTORES_POR_TAREA)]
+    if procesos == 1:
+        global _CONTEXTO
+        _CONTEXTO = contexto
+        generadas = sum(_generar(tarea, forzar) for tarea in tareas)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar, initargs=(version,)) as ejecutor:
+            generadas = sum(ejecutor.map(_generar, tareas, [forzar] * len(tareas)))
+    CacheDisco().podar()
+    return generadas
+
+
+if __name__ == "__main__":
+    procesos = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(f"{calentar(procesos=procesos)} figuras generadas")